@@ -0,0 +1,59 @@
+"""Background import jobs
+
+Revision ID: 48d5f66aa673
+Revises: e35fda845d28
+Create Date: 2025-06-25 11:23:40.775912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '48d5f66aa673'
+down_revision: Union[str, None] = 'e35fda845d28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('import_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('country', sa.String(), nullable=False),
+    sa.Column('state', sa.String(), nullable=True),
+    sa.Column('year_from', sa.Integer(), nullable=False),
+    sa.Column('year_to', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('progress', sa.Float(), nullable=False),
+    sa.Column('candidates', sa.Integer(), nullable=True),
+    sa.Column('imported', sa.Integer(), nullable=True),
+    sa.Column('rows_per_second', sa.Float(), nullable=True),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.Column('owner_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_import_jobs_id'), 'import_jobs', ['id'], unique=False)
+    op.create_index(op.f('ix_import_jobs_status'), 'import_jobs', ['status'], unique=False)
+    op.create_index(
+        'uq_import_jobs_active',
+        'import_jobs',
+        ['country', 'state', 'year_from', 'year_to'],
+        unique=True,
+        postgresql_nulls_not_distinct=True,
+        postgresql_where=sa.text("status IN ('queued', 'running')"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_import_jobs_active', table_name='import_jobs')
+    op.drop_index(op.f('ix_import_jobs_status'), table_name='import_jobs')
+    op.drop_index(op.f('ix_import_jobs_id'), table_name='import_jobs')
+    op.drop_table('import_jobs')
@@ -0,0 +1,50 @@
+"""Unique natural key for imported holidays
+
+Revision ID: 4d8db7cdea3a
+Revises: d43519d8d4e4
+Create Date: 2025-06-14 10:12:03.418230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '4d8db7cdea3a'
+down_revision: Union[str, None] = 'd43519d8d4e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Удаляем дубликаты, которые мог оставить старый построчный импорт,
+    # иначе уникальный индекс не создастся
+    op.execute(
+        """
+        DELETE FROM holidays h
+        USING holidays d
+        WHERE h.id > d.id
+          AND h.is_custom IS NOT TRUE
+          AND d.is_custom IS NOT TRUE
+          AND h.country = d.country
+          AND h.state IS NOT DISTINCT FROM d.state
+          AND h.date = d.date
+          AND h.name = d.name
+        """
+    )
+    op.execute("UPDATE holidays SET is_custom = false WHERE is_custom IS NULL")
+    op.create_index(
+        'uq_holidays_natural_key',
+        'holidays',
+        ['country', 'state', 'date', 'name'],
+        unique=True,
+        postgresql_nulls_not_distinct=True,
+        postgresql_where=sa.text('is_custom = false'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_holidays_natural_key', table_name='holidays')
@@ -0,0 +1,37 @@
+"""Composite indexes for the dominant holiday query shapes
+
+Revision ID: 55b2f62740b8
+Revises: 4d8db7cdea3a
+Create Date: 2025-06-18 09:41:27.602114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '55b2f62740b8'
+down_revision: Union[str, None] = '4d8db7cdea3a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_holidays_country_state_date', 'holidays', ['country', 'state', 'date'], unique=False)
+    op.create_index('ix_holidays_country_federal_date', 'holidays', ['country', 'federal', 'date'], unique=False)
+    op.create_index(
+        'ix_holidays_custom_owner_date',
+        'holidays',
+        ['owner_id', 'date'],
+        unique=False,
+        postgresql_where=sa.text('is_custom = true'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_holidays_custom_owner_date', table_name='holidays')
+    op.drop_index('ix_holidays_country_federal_date', table_name='holidays')
+    op.drop_index('ix_holidays_country_state_date', table_name='holidays')
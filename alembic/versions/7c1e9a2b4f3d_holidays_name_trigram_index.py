@@ -0,0 +1,35 @@
+"""Trigram index on holiday names
+
+Revision ID: 7c1e9a2b4f3d
+Revises: 48d5f66aa673
+Create Date: 2025-07-02 10:12:05.318470
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = '7c1e9a2b4f3d'
+down_revision: Union[str, None] = '48d5f66aa673'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'ix_holidays_name_trgm',
+        'holidays',
+        ['name'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'name': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Расширение pg_trgm оставляем: его могут использовать другие объекты базы
+    op.drop_index('ix_holidays_name_trgm', table_name='holidays')
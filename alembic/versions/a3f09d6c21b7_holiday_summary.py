@@ -0,0 +1,45 @@
+"""Holiday counts summary for aggregation endpoints
+
+Revision ID: a3f09d6c21b7
+Revises: 7c1e9a2b4f3d
+Create Date: 2025-07-09 11:40:27.902314
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'a3f09d6c21b7'
+down_revision: Union[str, None] = '7c1e9a2b4f3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('holiday_summary',
+    sa.Column('country', sa.String(), nullable=False),
+    sa.Column('state', sa.String(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Integer(), nullable=False),
+    sa.Column('federal', sa.Boolean(), nullable=False),
+    sa.Column('is_custom', sa.Boolean(), nullable=False),
+    sa.Column('holidays', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('country', 'state', 'year', 'month', 'federal', 'is_custom')
+    )
+    # Начальное заполнение; дальше таблицу поддерживают записи в holidays
+    op.execute("""
+        INSERT INTO holiday_summary (country, state, year, month, federal, is_custom, holidays)
+        SELECT coalesce(country, ''), coalesce(state, ''),
+               CAST(extract(year FROM date) AS INTEGER), CAST(extract(month FROM date) AS INTEGER),
+               coalesce(federal, false), coalesce(is_custom, false), count(*)
+        FROM holidays
+        GROUP BY 1, 2, 3, 4, 5, 6
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('holiday_summary')
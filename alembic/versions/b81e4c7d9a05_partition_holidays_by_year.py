@@ -0,0 +1,134 @@
+"""Partition holidays by year
+
+Revision ID: b81e4c7d9a05
+Revises: a3f09d6c21b7
+Create Date: 2025-07-16 09:27:44.615208
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'b81e4c7d9a05'
+down_revision: Union[str, None] = 'a3f09d6c21b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+COLUMNS = "id, name, date, country, state, federal, notes, is_custom, owner_id"
+
+
+def create_holiday_indexes() -> None:
+    op.create_index(op.f('ix_holidays_id'), 'holidays', ['id'], unique=False)
+    op.create_index(op.f('ix_holidays_name'), 'holidays', ['name'], unique=False)
+    op.create_index(op.f('ix_holidays_date'), 'holidays', ['date'], unique=False)
+    op.create_index(op.f('ix_holidays_country'), 'holidays', ['country'], unique=False)
+    op.create_index(op.f('ix_holidays_state'), 'holidays', ['state'], unique=False)
+    op.create_index(
+        'uq_holidays_natural_key',
+        'holidays',
+        ['country', 'state', 'date', 'name'],
+        unique=True,
+        postgresql_nulls_not_distinct=True,
+        postgresql_where=sa.text('is_custom = false'),
+    )
+    op.create_index('ix_holidays_country_state_date', 'holidays', ['country', 'state', 'date'], unique=False)
+    op.create_index('ix_holidays_country_federal_date', 'holidays', ['country', 'federal', 'date'], unique=False)
+    op.create_index(
+        'ix_holidays_custom_owner_date',
+        'holidays',
+        ['owner_id', 'date'],
+        unique=False,
+        postgresql_where=sa.text('is_custom = true'),
+    )
+    op.create_index(
+        'ix_holidays_name_trgm',
+        'holidays',
+        ['name'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'name': 'gin_trgm_ops'},
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    # Праздник без даты не может попасть ни в одну секцию: молча терять такие
+    # строки нельзя, их нужно исправить или удалить до миграции
+    undated = bind.execute(sa.text("SELECT count(*) FROM holidays WHERE date IS NULL")).scalar_one()
+    if undated:
+        raise RuntimeError(
+            f"holidays has {undated} row(s) with a NULL date; set or delete them before partitioning by year"
+        )
+    first, last = bind.execute(sa.text(
+        "SELECT CAST(extract(year FROM min(date)) AS INTEGER), CAST(extract(year FROM max(date)) AS INTEGER) FROM holidays"
+    )).one()
+    current = date.today().year
+    first = min(first or current, current - 1)
+    last = max(last or current, current + 1)
+
+    # Последовательность id переживает пересоздание таблицы
+    op.execute("ALTER SEQUENCE holidays_id_seq OWNED BY NONE")
+    # Ключ секционирования обязан входить в первичный ключ
+    op.execute("""
+        CREATE TABLE holidays_partitioned (
+            id INTEGER NOT NULL DEFAULT nextval('holidays_id_seq'),
+            name VARCHAR,
+            date DATE NOT NULL,
+            country VARCHAR,
+            state VARCHAR,
+            federal BOOLEAN,
+            notes VARCHAR,
+            is_custom BOOLEAN,
+            owner_id INTEGER,
+            CONSTRAINT holidays_partitioned_pkey PRIMARY KEY (id, date),
+            CONSTRAINT holidays_partitioned_owner_id_fkey FOREIGN KEY (owner_id) REFERENCES users (id)
+        ) PARTITION BY RANGE (date)
+    """)
+    for year in range(first, last + 1):
+        op.execute(
+            f"CREATE TABLE holidays_y{year} PARTITION OF holidays_partitioned "
+            f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+        )
+    # Строки вне созданных лет (пользовательские праздники далеких лет)
+    op.execute("CREATE TABLE holidays_default PARTITION OF holidays_partitioned DEFAULT")
+
+    op.execute(f"INSERT INTO holidays_partitioned ({COLUMNS}) SELECT {COLUMNS} FROM holidays")
+    op.execute("DROP TABLE holidays")
+    op.execute("ALTER TABLE holidays_partitioned RENAME TO holidays")
+    op.execute("ALTER TABLE holidays RENAME CONSTRAINT holidays_partitioned_pkey TO holidays_pkey")
+    op.execute("ALTER TABLE holidays RENAME CONSTRAINT holidays_partitioned_owner_id_fkey TO holidays_owner_id_fkey")
+    op.execute("ALTER SEQUENCE holidays_id_seq OWNED BY holidays.id")
+    create_holiday_indexes()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER SEQUENCE holidays_id_seq OWNED BY NONE")
+    op.execute("""
+        CREATE TABLE holidays_plain (
+            id INTEGER NOT NULL DEFAULT nextval('holidays_id_seq'),
+            name VARCHAR,
+            date DATE,
+            country VARCHAR,
+            state VARCHAR,
+            federal BOOLEAN,
+            notes VARCHAR,
+            is_custom BOOLEAN,
+            owner_id INTEGER,
+            CONSTRAINT holidays_plain_pkey PRIMARY KEY (id),
+            CONSTRAINT holidays_plain_owner_id_fkey FOREIGN KEY (owner_id) REFERENCES users (id)
+        )
+    """)
+    op.execute(f"INSERT INTO holidays_plain ({COLUMNS}) SELECT {COLUMNS} FROM holidays")
+    # Удаляет и все секции
+    op.execute("DROP TABLE holidays")
+    op.execute("ALTER TABLE holidays_plain RENAME TO holidays")
+    op.execute("ALTER TABLE holidays RENAME CONSTRAINT holidays_plain_pkey TO holidays_pkey")
+    op.execute("ALTER TABLE holidays RENAME CONSTRAINT holidays_plain_owner_id_fkey TO holidays_owner_id_fkey")
+    op.execute("ALTER SEQUENCE holidays_id_seq OWNED BY holidays.id")
+    create_holiday_indexes()
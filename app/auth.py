@@ -1,18 +1,59 @@
+from collections import namedtuple
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import event, inspect
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
+from app.cache import TTLCache
 from app.database import get_db
+from app.metrics import registry
 from app.crud import get_user_by_email
 from app.models import User
+from app.notifications import change_listener, publish_sync
 from app.config import settings
 from app.schemas import TokenData
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
+
+# Только поля, нужные для авторизации; ключ кеша - subject токена (email)
+AuthUser = namedtuple("AuthUser", ["id", "email", "is_active"])
+
+user_cache = TTLCache(max_size=settings.user_cache_max_size, ttl=settings.user_cache_ttl_seconds)
+
+token_checks = registry.counter("auth_token_checks_total", "Bearer token checks by outcome", ["outcome"])
+
+# Ключ session.info с email пользователей, измененных в текущей транзакции
+_CHANGED_USERS = "changed_user_emails"
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target):
+    state = inspect(target)
+    emails = [target.email, *state.attrs.email.history.deleted]
+    # Сбрасываем кеш только после коммита: до него параллельный запрос
+    # прочитал бы из базы старую строку и снова положил ее в кеш
+    if state.session is not None:
+        state.session.info.setdefault(_CHANGED_USERS, set()).update(emails)
+    # Остальные воркеры сбросят пользователя после коммита
+    publish_sync(connection, {"t": "users", "emails": emails})
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session):
+    for email in session.info.pop(_CHANGED_USERS, ()):
+        user_cache.invalidate(email)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_users(session):
+    session.info.pop(_CHANGED_USERS, None)
+
+change_listener.add_user_handler(user_cache.invalidate)
+change_listener.add_flush_handler(user_cache.clear)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -21,28 +62,47 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> User:
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> AuthUser:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
         email: Optional[str] = payload.get("sub")
         if email is None:
+            token_checks.inc(outcome="invalid_token")
             raise credentials_exception
     except JWTError:
+        token_checks.inc(outcome="invalid_token")
         raise credentials_exception
-    user = await get_user_by_email(db, email=email)
+    user = user_cache.get(email)
     if user is None:
-        raise credentials_exception
+        db_user = await get_user_by_email(db, email=email)
+        if db_user is None:
+            token_checks.inc(outcome="unknown_user")
+            raise credentials_exception
+        user = AuthUser(id=db_user.id, email=db_user.email, is_active=db_user.is_active)
+        user_cache.set(email, user)
+        token_checks.inc(outcome="valid")
+    else:
+        token_checks.inc(outcome="cached")
     return user
 
-async def get_current_active_user(current_user: User = Depends(get_current_user)):
+async def get_current_active_user(current_user: AuthUser = Depends(get_current_user)) -> AuthUser:
     if not current_user.is_active:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
-    return current_user
\ No newline at end of file
+    return current_user
+
+async def get_optional_active_user(
+    token: Optional[str] = Depends(optional_oauth2_scheme), db: AsyncSession = Depends(get_db)
+) -> Optional[AuthUser]:
+    """Like get_current_active_user, but returns None for anonymous requests."""
+    if token is None:
+        return None
+    user = await get_current_user(token=token, db=db)
+    return await get_current_active_user(current_user=user)
@@ -0,0 +1,9 @@
+"""Start of the worker's boot.
+
+``app.main`` imports this module before anything else, so ``BOOT_STARTED``
+is taken before the application modules are imported.
+"""
+import time
+
+# Отсчет времени запуска воркера: от импорта приложения до готовности принимать запросы
+BOOT_STARTED = time.perf_counter()
@@ -0,0 +1,196 @@
+"""Business-day arithmetic over precomputed per-year bitsets.
+
+For every jurisdiction ``(country, state, owner_id)`` and year a single integer
+is cached in which bit ``i`` is set when day ``i`` of the year (0-based) is a
+business day, i.e. neither a weekend nor a holiday. Checking a date is then a
+bit test and counting business days in a range is a popcount.
+
+Conventions follow ``numpy.busday_count``/``busday_offset``:
+
+* ``business_days_between(a, b)`` counts business days in ``[a, b)`` and is
+  negative when ``b < a``;
+* ``add_business_days(d, n)`` returns the ``n``-th business day after ``d``
+  (before ``d`` for negative ``n``); ``n == 0`` rolls ``d`` forward to the
+  nearest business day.
+"""
+from calendar import isleap
+from datetime import MAXYEAR, MINYEAR, date, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import select, or_, and_, false
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.calendar_index import calendar_index
+from app.models import Holiday
+
+
+# Суббота и воскресенье (date.weekday())
+WEEKEND = (5, 6)
+
+# Верхняя граница числа закешированных битсетов (юрисдикция x год)
+MAX_CACHED_MASKS = 50_000
+
+CalendarKey = Tuple[str, Optional[str], Optional[int]]
+
+
+def _popcount(value: int) -> int:
+    return bin(value).count("1")
+
+
+def _weekday_mask(year: int) -> int:
+    """Bitset of all non-weekend days of ``year``."""
+    first = date(year, 1, 1)
+    days = 366 if isleap(year) else 365
+    mask = 0
+    weekday = first.weekday()
+    for day in range(days):
+        if (weekday + day) % 7 not in WEEKEND:
+            mask |= 1 << day
+    return mask
+
+
+class BusinessCalendar:
+    def __init__(self):
+        self._masks: Dict[Tuple[CalendarKey, int], int] = {}
+        self._weekdays: Dict[int, int] = {}
+
+    def invalidate(self):
+        """Drop all cached bitsets; called by the holiday write paths."""
+        self._masks.clear()
+
+    def invalidate_jurisdictions(self, jurisdictions: Iterable[Tuple[str, Optional[str]]], years: range):
+        """Drop the bitsets a change of ``jurisdictions`` in ``years`` can affect.
+
+        A national holiday (state None) affects every state of its country.
+        """
+        national = {country for country, state in jurisdictions if state is None}
+        regional = {(country, state) for country, state in jurisdictions if state is not None}
+        for key, year in list(self._masks):
+            if year in years and (key[0] in national or key[:2] in regional):
+                del self._masks[(key, year)]
+
+    async def _load_holidays(
+        self, db: AsyncSession, key: CalendarKey, start: date, end: date
+    ) -> Iterable[date]:
+        country, state, owner_id = key
+        if calendar_index.loaded and owner_id is None:
+            states = {None, state}
+            return [
+                record.date
+                for record in calendar_index.between(country, states, start, end)
+                if not record.is_custom
+            ]
+
+        ownership = Holiday.is_custom == false()
+        if owner_id is not None:
+            ownership = or_(ownership, and_(Holiday.is_custom, Holiday.owner_id == owner_id))
+        jurisdiction = Holiday.state.is_(None)
+        if state is not None:
+            jurisdiction = or_(jurisdiction, Holiday.state == state)
+        result = await db.execute(
+            select(Holiday.date).filter(
+                Holiday.country == country,
+                jurisdiction,
+                ownership,
+                Holiday.date >= start,
+                Holiday.date <= end,
+            )
+        )
+        return result.scalars().all()
+
+    async def prepare(self, db: AsyncSession, key: CalendarKey, years: Iterable[int]):
+        """Build missing bitsets for ``years`` with a single holiday lookup."""
+        missing = sorted({year for year in years if (key, year) not in self._masks})
+        if not missing:
+            return
+        masks = {}
+        for year in missing:
+            if year not in self._weekdays:
+                self._weekdays[year] = _weekday_mask(year)
+            masks[year] = self._weekdays[year]
+
+        holidays = await self._load_holidays(db, key, date(missing[0], 1, 1), date(missing[-1], 12, 31))
+        for holiday_date in holidays:
+            if holiday_date.year in masks:
+                day = holiday_date.timetuple().tm_yday - 1
+                masks[holiday_date.year] &= ~(1 << day)
+
+        if len(self._masks) + len(masks) > MAX_CACHED_MASKS:
+            self._masks.clear()
+        for year, mask in masks.items():
+            self._masks[(key, year)] = mask
+
+    def _mask(self, key: CalendarKey, year: int) -> int:
+        try:
+            return self._masks[(key, year)]
+        except KeyError:
+            raise LookupError(f"Business calendar for {key} {year} is not prepared") from None
+
+    def is_business_day(self, key: CalendarKey, day: date) -> bool:
+        return bool(self._mask(key, day.year) >> (day.timetuple().tm_yday - 1) & 1)
+
+    def business_days_between(self, key: CalendarKey, start: date, end: date) -> int:
+        if end < start:
+            return -self.business_days_between(key, end, start)
+        total = 0
+        for year in range(start.year, end.year + 1):
+            mask = self._mask(key, year)
+            lo = start.timetuple().tm_yday - 1 if year == start.year else 0
+            if year == end.year:
+                mask &= (1 << (end.timetuple().tm_yday - 1)) - 1
+            total += _popcount(mask >> lo)
+        return total
+
+    def add_business_days(self, key: CalendarKey, day: date, n: int) -> date:
+        if n == 0:
+            return day if self.is_business_day(key, day) else self.add_business_days(key, day, 1)
+
+        year = day.year
+        offset = day.timetuple().tm_yday - 1
+        remaining = abs(n)
+        while True:
+            mask = self._mask(key, year)
+            if n > 0:
+                candidates = mask >> (offset + 1) << (offset + 1)
+            else:
+                candidates = mask & ((1 << offset) - 1)
+            available = _popcount(candidates)
+            if available >= remaining:
+                break
+            remaining -= available
+            year += 1 if n > 0 else -1
+            # Для следующего года рассматриваем все дни целиком
+            offset = -1 if n > 0 else (366 if isleap(year) else 365)
+
+        for _ in range(remaining - 1):
+            if n > 0:
+                candidates &= candidates - 1
+            else:
+                candidates &= ~(1 << (candidates.bit_length() - 1))
+        if n > 0:
+            position = (candidates & -candidates).bit_length() - 1
+        else:
+            position = candidates.bit_length() - 1
+        return date(year, 1, 1) + timedelta(days=position)
+
+    def next_business_day(self, key: CalendarKey, day: date) -> date:
+        return self.add_business_days(key, day, 1)
+
+    async def offset(self, db: AsyncSession, key: CalendarKey, day: date, n: int) -> date:
+        """``add_business_days`` that prepares as many years as the offset needs."""
+        span = abs(n) // 200 + 1
+        while True:
+            if n >= 0:
+                years = range(day.year, min(day.year + span, MAXYEAR) + 1)
+            else:
+                years = range(max(day.year - span, MINYEAR), day.year + 1)
+            await self.prepare(db, key, years)
+            try:
+                return self.add_business_days(key, day, n)
+            except LookupError:
+                if span > MAXYEAR:
+                    raise ValueError("Business day offset is out of the supported date range")
+                span *= 2
+
+
+business_calendar = BusinessCalendar()
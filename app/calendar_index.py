@@ -0,0 +1,313 @@
+"""In-process calendar index over the holidays table.
+
+Rows are grouped by jurisdiction ``(country, state)``. Each jurisdiction keeps
+date ordinals in a sorted ``array`` with a parallel list of compact records,
+so date-range, year and month filters are answered by bisection instead of a
+database round trip. The index is built once at startup and patched by the
+write paths in ``app.crud``.
+"""
+import heapq
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.filters import HolidayFilter, decode_cursor, period_range, sort_fields
+from app.models import Holiday
+
+
+HolidayRecord = namedtuple(
+    "HolidayRecord",
+    ["id", "name", "date", "country", "state", "federal", "notes", "is_custom", "owner_id"],
+)
+
+RECORD_COLUMNS = [getattr(Holiday, field) for field in HolidayRecord._fields]
+
+Jurisdiction = Tuple[str, Optional[str]]
+
+
+class _Descending:
+    """Sort-key wrapper that inverts comparison for ``-field`` ordering."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+def sort_key(order_by: List[str]):
+    """Build a key function matching the SQL ordering of ``apply_filters``.
+
+    Like PostgreSQL, NULLs sort last in ascending and first in descending order.
+    """
+    fields = [(HolidayRecord._fields.index(name), desc) for name, desc in sort_fields(order_by)]
+
+    def key(record):
+        parts = []
+        for position, desc in fields:
+            value = record[position]
+            if desc:
+                parts.append((value is not None, _Descending(value)))
+            else:
+                parts.append((value is None, value))
+        return tuple(parts)
+
+    return key
+
+
+class _JurisdictionCalendar:
+    __slots__ = ("ordinals", "records")
+
+    def __init__(self):
+        self.ordinals = array("l")
+        self.records: List[HolidayRecord] = []
+
+    def insert(self, record: HolidayRecord):
+        ordinal = record.date.toordinal()
+        position = bisect_right(self.ordinals, ordinal)
+        self.ordinals.insert(position, ordinal)
+        self.records.insert(position, record)
+
+    def remove(self, record: HolidayRecord):
+        ordinal = record.date.toordinal()
+        lo = bisect_left(self.ordinals, ordinal)
+        hi = bisect_right(self.ordinals, ordinal)
+        for position in range(lo, hi):
+            if self.records[position].id == record.id:
+                del self.ordinals[position]
+                del self.records[position]
+                return
+
+    def between(self, start: Optional[date], end: Optional[date]) -> List[HolidayRecord]:
+        lo = bisect_left(self.ordinals, start.toordinal()) if start else 0
+        hi = bisect_right(self.ordinals, end.toordinal()) if end else len(self.ordinals)
+        return self.records[lo:hi]
+
+
+class CalendarIndex:
+    def __init__(self):
+        self.loaded = False
+        self._calendars: Dict[Jurisdiction, _JurisdictionCalendar] = {}
+        self._by_id: Dict[int, HolidayRecord] = {}
+        self._pending: Optional[list] = None
+
+    def __len__(self):
+        return len(self._by_id)
+
+    async def rebuild(self, db: AsyncSession):
+        """Load every holiday row and atomically replace the index contents."""
+        self._pending = []
+        try:
+            result = await db.execute(select(*RECORD_COLUMNS).order_by(Holiday.date, Holiday.id))
+            calendars: Dict[Jurisdiction, _JurisdictionCalendar] = {}
+            by_id: Dict[int, HolidayRecord] = {}
+            for row in result:
+                record = HolidayRecord(*row)
+                calendar = calendars.setdefault((record.country, record.state), _JurisdictionCalendar())
+                calendar.ordinals.append(record.date.toordinal())
+                calendar.records.append(record)
+                by_id[record.id] = record
+            pending = self._pending
+        finally:
+            self._pending = None
+
+        self._calendars = calendars
+        self._by_id = by_id
+        self.loaded = True
+        # Изменения, пришедшие во время загрузки, применяем поверх снимка
+        for method, argument in pending:
+            method(argument)
+
+    def invalidate(self):
+        """Stop serving from the index until the next rebuild."""
+        self.loaded = False
+        self._calendars = {}
+        self._by_id = {}
+
+    def clear(self):
+        """Empty the index after the holidays table has been truncated."""
+        if self._pending is not None:
+            self._pending.append((self._clear, None))
+        self._clear()
+
+    def _clear(self, _=None):
+        self._calendars = {}
+        self._by_id = {}
+
+    def upsert(self, holiday):
+        """Add or replace a holiday given an ORM object or a row mapping."""
+        if isinstance(holiday, dict):
+            record = HolidayRecord(**{field: holiday.get(field) for field in HolidayRecord._fields})
+        elif not isinstance(holiday, HolidayRecord):
+            record = HolidayRecord(*(getattr(holiday, field) for field in HolidayRecord._fields))
+        else:
+            record = holiday
+        if self._pending is not None:
+            self._pending.append((self._upsert, record))
+        if self.loaded:
+            self._upsert(record)
+
+    def upsert_many(self, holidays: Iterable):
+        for holiday in holidays:
+            self.upsert(holiday)
+
+    async def refresh(self, db: AsyncSession, ids: Iterable[int]):
+        """Re-read the given rows after another process changed them."""
+        ids = set(ids)
+        result = await db.execute(select(*RECORD_COLUMNS).filter(Holiday.id.in_(ids)))
+        for row in result:
+            record = HolidayRecord(*row)
+            ids.discard(record.id)
+            self.upsert(record)
+        for holiday_id in ids:
+            self.remove(holiday_id)
+
+    async def refresh_range(
+        self, db: AsyncSession, jurisdictions: Optional[Iterable[Jurisdiction]], start: date, end: date
+    ):
+        """Re-read all rows of ``jurisdictions`` (None = all) dated within ``[start, end]``."""
+        jurisdictions = set(jurisdictions) if jurisdictions is not None else None
+        stale = [
+            record.id
+            for jurisdiction, calendar in list(self._calendars.items())
+            if jurisdictions is None or jurisdiction in jurisdictions
+            for record in calendar.between(start, end)
+        ]
+        query = select(*RECORD_COLUMNS).filter(Holiday.date >= start, Holiday.date <= end)
+        if jurisdictions is not None:
+            query = query.filter(Holiday.country.in_({country for country, _ in jurisdictions}))
+        result = await db.execute(query)
+        for holiday_id in stale:
+            self.remove(holiday_id)
+        for row in result:
+            record = HolidayRecord(*row)
+            if jurisdictions is None or (record.country, record.state) in jurisdictions:
+                self.upsert(record)
+
+    def remove(self, holiday_id: int):
+        if self._pending is not None:
+            self._pending.append((self._remove, holiday_id))
+        if self.loaded:
+            self._remove(holiday_id)
+
+    def _upsert(self, record: HolidayRecord):
+        self._remove(record.id)
+        self._calendars.setdefault((record.country, record.state), _JurisdictionCalendar()).insert(record)
+        self._by_id[record.id] = record
+
+    def _remove(self, holiday_id: int):
+        record = self._by_id.pop(holiday_id, None)
+        if record is None:
+            return
+        calendar = self._calendars.get((record.country, record.state))
+        if calendar is not None:
+            calendar.remove(record)
+
+    def _jurisdictions(self, country: Optional[str], states: Optional[set]) -> List[_JurisdictionCalendar]:
+        return [
+            calendar
+            for (calendar_country, calendar_state), calendar in self._calendars.items()
+            if (country is None or calendar_country == country)
+            and (states is None or calendar_state in states)
+        ]
+
+    def between(
+        self, country: str, states: set, start: date, end: date
+    ) -> Iterable[HolidayRecord]:
+        """Records of ``country`` for the given states (None = national) in [start, end]."""
+        for calendar in self._jurisdictions(country, states):
+            yield from calendar.between(start, end)
+
+    def _candidates(
+        self,
+        filters: HolidayFilter,
+        year: Optional[int],
+        month: Optional[int],
+        states: Optional[List[str]],
+    ) -> Optional[List[HolidayRecord]]:
+        if not self.loaded:
+            return None
+        name = filters.name.lower() if filters.name else None
+        if name and ("%" in name or "_" in name):
+            return None
+
+        start, end = filters.start_date, filters.end_date
+        if year:
+            period_start, period_end = period_range(year, month)
+            period_end = period_end - timedelta(days=1) if period_end else date.max
+            start = max(start, period_start) if start else period_start
+            end = min(end, period_end) if end else period_end
+
+        # Все условия по штатам объединяются через AND, как в SQL-запросе
+        state_sets = [set(s) for s in (filters.states, states) if s]
+        if filters.state:
+            state_sets.append({filters.state})
+        allowed_states = set.intersection(*state_sets) if state_sets else None
+
+        candidates = []
+        for calendar in self._jurisdictions(filters.country, allowed_states):
+            for record in calendar.between(start, end):
+                if month and record.date.month != month:
+                    continue
+                if filters.federal is not None and record.federal != filters.federal:
+                    continue
+                if filters.is_custom is not None and record.is_custom != filters.is_custom:
+                    continue
+                if name and (record.name is None or name not in record.name.lower()):
+                    continue
+                candidates.append(record)
+        return candidates
+
+    def count(
+        self,
+        filters: HolidayFilter,
+        year: Optional[int] = None,
+        month: Optional[int] = None,
+        states: Optional[List[str]] = None,
+    ) -> Optional[int]:
+        """Number of records matching the filters (ignoring the cursor), or None."""
+        candidates = self._candidates(filters, year, month, states)
+        return None if candidates is None else len(candidates)
+
+    def query(
+        self,
+        filters: HolidayFilter,
+        year: Optional[int] = None,
+        month: Optional[int] = None,
+        states: Optional[List[str]] = None,
+        skip: int = 0,
+        limit: Optional[int] = None,
+    ) -> Optional[List[HolidayRecord]]:
+        """Answer a ``GET /holidays`` query, or return None if it needs the DB.
+
+        Raises ValueError for a cursor that does not match ``filters.order_by``.
+        """
+        candidates = self._candidates(filters, year, month, states)
+        if candidates is None:
+            return None
+
+        key = sort_key(filters.order_by)
+        if filters.cursor:
+            position = dict(zip(
+                (name for name, _ in sort_fields(filters.order_by)),
+                decode_cursor(filters.cursor, filters.order_by),
+            ))
+            boundary = key(HolidayRecord(**{field: position.get(field) for field in HolidayRecord._fields}))
+            candidates = [record for record in candidates if key(record) > boundary]
+
+        if limit is None:
+            return sorted(candidates, key=key)[skip:]
+        return heapq.nsmallest(skip + limit, candidates, key=key)[skip:]
+
+
+calendar_index = CalendarIndex()
@@ -0,0 +1,93 @@
+"""Single-flight coalescing of identical concurrent reads.
+
+When many clients ask for the same listing at once (the first minutes of a
+month, say), ``SingleFlight.run`` lets the first request execute the query
+and makes the others with the same key await that one execution and share
+its result. Keys must include the data version (``GET /holidays`` uses its
+ETag), so a request never joins a read started before a write it may have
+to see.
+
+The shared execution runs as its own task: a leader that disconnects does
+not cancel it for the requests waiting on it. An optional micro-cache
+(``COALESCE_CACHE_TTL_SECONDS``, off by default) also serves the result to
+identical requests arriving shortly after the execution finished.
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+from app.cache import TTLCache
+from app.config import settings
+from app.metrics import registry
+
+
+T = TypeVar("T")
+
+_MISSING = object()
+
+coalesced_requests = registry.counter(
+    "request_coalescing_total",
+    "Coalesced reads by flight and outcome (executed, coalesced, cached)",
+    ["flight", "outcome"],
+)
+inflight_reads = registry.gauge("request_coalescing_in_flight", "Shared executions currently running", ["flight"])
+
+
+class SingleFlight:
+    def __init__(self, name: str, cache_ttl: float, cache_max_size: int):
+        self.name = name
+        self.cache = TTLCache(max_size=cache_max_size, ttl=cache_ttl)
+        self.executed = 0
+        self.coalesced = 0
+        self.cached = 0
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    async def run(self, key: Hashable, fetch: Callable[[], Awaitable[T]]) -> T:
+        """Result of ``fetch()``, shared with concurrent calls for the same ``key``."""
+        value = self.cache.get(key, _MISSING)
+        if value is not _MISSING:
+            self.cached += 1
+            coalesced_requests.inc(flight=self.name, outcome="cached")
+            return value
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+            inflight_reads.set(len(self._inflight), flight=self.name)
+            task.add_done_callback(lambda done: self._finished(key, done))
+            self.executed += 1
+            coalesced_requests.inc(flight=self.name, outcome="executed")
+        else:
+            self.coalesced += 1
+            coalesced_requests.inc(flight=self.name, outcome="coalesced")
+        # Отмена одного ожидающего запроса не должна отменять общее выполнение
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            inflight_reads.set(len(self._inflight), flight=self.name)
+        if not task.cancelled() and task.exception() is None:
+            self.cache.set(key, task.result())
+
+    def clear(self):
+        self.cache.clear()
+
+    def stats(self) -> dict:
+        total = self.executed + self.coalesced + self.cached
+        return {
+            "in_flight": len(self._inflight),
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "cached": self.cached,
+            "shared_ratio": round((self.coalesced + self.cached) / total, 4) if total else 0.0,
+            "cache": self.cache.stats(),
+        }
+
+
+# Общие выполнения страниц GET /holidays, ключ — ETag запроса
+listing_flight = SingleFlight(
+    "holidays_list",
+    cache_ttl=settings.coalesce_cache_ttl_seconds,
+    cache_max_size=settings.coalesce_cache_max_size,
+)
@@ -1,12 +1,43 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
+from typing import Optional
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env")
 
     database_url: str = Field(..., env="DATABASE_URL")
+    db_pool_size: int = Field(default=10, env="DB_POOL_SIZE")
+    db_max_overflow: int = Field(default=20, env="DB_MAX_OVERFLOW")
+    db_pool_timeout: float = Field(default=30, env="DB_POOL_TIMEOUT")
+    db_pool_recycle: int = Field(default=1800, env="DB_POOL_RECYCLE")
+    db_pool_pre_ping: bool = Field(default=True, env="DB_POOL_PRE_PING")
+    db_statement_cache_size: int = Field(default=100, env="DB_STATEMENT_CACHE_SIZE")
+    replica_database_url: Optional[str] = Field(default=None, env="REPLICA_DATABASE_URL")
+    replica_max_lag_seconds: float = Field(default=5.0, env="REPLICA_MAX_LAG_SECONDS")
+    replica_check_interval: float = Field(default=1.0, env="REPLICA_CHECK_INTERVAL")
     secret_key: str = Field(..., env="SECRET_KEY")
     algorithm: str = Field(default="HS256", env="ALGORITHM")
     access_token_expire_minutes: int = Field(default=30, env="ACCESS_TOKEN_EXPIRE_MINUTES")
+    metrics_enabled: bool = Field(default=True, env="METRICS_ENABLED")
+    calendar_index_enabled: bool = Field(default=True, env="CALENDAR_INDEX_ENABLED")
+    fast_json_enabled: bool = Field(default=True, env="FAST_JSON_ENABLED")
+    coalesce_requests_enabled: bool = Field(default=True, env="COALESCE_REQUESTS_ENABLED")
+    coalesce_cache_ttl_seconds: float = Field(default=0, env="COALESCE_CACHE_TTL_SECONDS")
+    coalesce_cache_max_size: int = Field(default=256, env="COALESCE_CACHE_MAX_SIZE")
+    bcrypt_rounds: int = Field(default=12, env="BCRYPT_ROUNDS")
+    password_hash_workers: int = Field(default=4, env="PASSWORD_HASH_WORKERS")
+    password_hash_queue_size: int = Field(default=32, env="PASSWORD_HASH_QUEUE_SIZE")
+    user_cache_ttl_seconds: float = Field(default=60, env="USER_CACHE_TTL_SECONDS")
+    user_cache_max_size: int = Field(default=10_000, env="USER_CACHE_MAX_SIZE")
+    autocomplete_cache_ttl_seconds: float = Field(default=300, env="AUTOCOMPLETE_CACHE_TTL_SECONDS")
+    autocomplete_cache_max_size: int = Field(default=1024, env="AUTOCOMPLETE_CACHE_MAX_SIZE")
+    data_version_check_interval: float = Field(default=1.0, env="DATA_VERSION_CHECK_INTERVAL")
+    change_notifications_enabled: bool = Field(default=True, env="CHANGE_NOTIFICATIONS_ENABLED")
+    import_job_workers: int = Field(default=2, env="IMPORT_JOB_WORKERS")
+    import_job_stale_seconds: float = Field(default=300, env="IMPORT_JOB_STALE_SECONDS")
+    import_processes: int = Field(default=4, env="IMPORT_PROCESSES")
+    partition_lock_timeout_ms: int = Field(default=500, env="PARTITION_LOCK_TIMEOUT_MS")
+    partition_lock_retries: int = Field(default=5, env="PARTITION_LOCK_RETRIES")
+    holiday_snapshot_path: Optional[str] = Field(default=None, env="HOLIDAY_SNAPSHOT_PATH")
 
 settings = Settings()
\ No newline at end of file
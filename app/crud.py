@@ -1,23 +1,57 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete, text, and_
+from sqlalchemy import select, insert, update, delete, text, or_, false, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import selectinload
-from typing import List, Optional, Union
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Union
 from datetime import date
-import holidays
+import json
+import time
 
-from app.models import User, Holiday
-from app.schemas import UserCreate, HolidayCreate, HolidayUpdate
+from app.business_days import business_calendar
+from app.calendar_index import calendar_index, HolidayRecord, RECORD_COLUMNS
+from app.data_version import data_version
+from app.holiday_generation import GenerationUnit, holiday_generator
+from app.models import User, Holiday, HolidaysDataVersion, HolidaySummary
+from app.schemas import (
+    UserCreate, HolidayCreate, HolidayUpdate, HolidayImportResult, HolidayInDB,
+    HolidayBulkCreate, HolidayBulkUpdate, BulkItemResult, BulkResult, HolidayChange, HolidayReconcileResult
+)
+from app.metrics import registry
+from app.passwords import PasswordHasherBusy, password_hasher
+from app.summary import apply_summary_delta, count_delta, rebuild_summary, summary_key
+from app.notifications import holidays_event, publish
+from app.partitions import partition_catalog, retry_on_lock_conflict, year_bounds
+from app.reconcile import diff_holidays
 
-from passlib.context import CryptContext
 
+# Размер пачки для INSERT ... ON CONFLICT при импорте
+IMPORT_BATCH_SIZE = 1000
+# Колонки уникального индекса uq_holidays_natural_key
+NATURAL_KEY = ["country", "state", "date", "name"]
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Колонки праздника, которые нельзя обнулить при редактировании
+REQUIRED_HOLIDAY_FIELDS = ("name", "date", "country")
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+# Колбэк прогресса импорта: (готово единиц, всего единиц, вставлено строк)
+ImportProgress = Callable[[int, int, int], Awaitable[None]]
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+login_attempts = registry.counter("auth_login_attempts_total", "Password logins by outcome", ["outcome"])
+import_candidates = registry.counter(
+    "holiday_import_candidates_total", "Library holidays generated by imports", ["country"]
+)
+import_rows = registry.counter("holiday_import_rows_total", "Library holidays inserted by imports", ["country"])
+import_duration = registry.histogram(
+    "holiday_import_duration_seconds", "Duration of library holiday imports",
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+
+async def get_password_hash(password: str) -> str:
+    return await password_hasher.hash(password)
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    verified, _ = await password_hasher.verify_and_update(plain_password, hashed_password)
+    return verified
 
 async def get_user(db: AsyncSession, user_id: int):
     result = await db.execute(select(User).filter(User.id == user_id))
@@ -31,8 +65,28 @@ async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100):
     result = await db.execute(select(User).offset(skip).limit(limit))
     return result.scalars().all()
 
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[User]:
+    """Return the user if the password matches, rehashing it if the bcrypt cost changed."""
+    user = await get_user_by_email(db, email)
+    if user is None or not user.hashed_password:
+        login_attempts.inc(outcome="unknown_user")
+        return None
+    try:
+        verified, new_hash = await password_hasher.verify_and_update(password, user.hashed_password)
+    except PasswordHasherBusy:
+        login_attempts.inc(outcome="busy")
+        raise
+    if not verified:
+        login_attempts.inc(outcome="wrong_password")
+        return None
+    login_attempts.inc(outcome="success")
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+    return user
+
 async def create_user(db: AsyncSession, user: UserCreate):
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash(user.password)
     db_user = User(email=user.email, hashed_password=hashed_password)
     db.add(db_user)
     await db.commit()
@@ -50,95 +104,540 @@ async def get_holidays(db: AsyncSession, skip: int = 0, limit: int = 100):
 async def get_holidays_query(db: AsyncSession):
     return select(Holiday)
 
-async def get_count(query):
-    return len((await db.execute(query)).all())
+async def get_count(db: AsyncSession, query, estimate: bool = False) -> int:
+    """Count rows matched by ``query`` with ``SELECT count(*)``.
+
+    With ``estimate=True`` on PostgreSQL the planner's row estimate from
+    ``EXPLAIN`` is returned instead, which never touches the table.
+    """
+    query = query.order_by(None).limit(None).offset(None)
+    if estimate and db.get_bind().dialect.name == "postgresql":
+        statement = query.compile(dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True})
+        connection = await db.connection()
+        result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}")
+        plan = result.scalar_one()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    result = await db.execute(select(func.count()).select_from(query.subquery()))
+    return result.scalar_one()
 
-async def get_holidays_with_pagination(query, page: int, per_page: int):
+async def get_holidays_with_pagination(db: AsyncSession, query, page: int, per_page: int):
     offset = (page - 1) * per_page
     result = await db.execute(query.offset(offset).limit(per_page))
     return result.scalars().all()
 
+async def bump_data_version(db: AsyncSession):
+    """Increment the holidays data version inside the current transaction.
+
+    Returns the new ``(version, updated_at)``; publish it with
+    ``data_version.set`` once the transaction has committed.
+    """
+    result = await db.execute(
+        update(HolidaysDataVersion)
+        .where(HolidaysDataVersion.id == 1)
+        .values(version=HolidaysDataVersion.version + 1, updated_at=func.now())
+        .returning(HolidaysDataVersion.version, HolidaysDataVersion.updated_at)
+    )
+    row = result.one_or_none()
+    if row is None:
+        result = await db.execute(
+            _insert(db)(HolidaysDataVersion)
+            .values(id=1, version=1, updated_at=func.now())
+            .on_conflict_do_nothing()
+            .returning(HolidaysDataVersion.version, HolidaysDataVersion.updated_at)
+        )
+        row = result.one_or_none() or (await db.execute(
+            select(HolidaysDataVersion.version, HolidaysDataVersion.updated_at).where(HolidaysDataVersion.id == 1)
+        )).one()
+    return tuple(row)
+
+def _record(holiday) -> HolidayRecord:
+    return HolidayRecord(*(getattr(holiday, field) for field in HolidayRecord._fields))
+
 async def create_holiday(db: AsyncSession, holiday: HolidayCreate, user_id: int):
     db_holiday = Holiday(**holiday.dict(), owner_id=user_id, is_custom=True)
     db.add(db_holiday)
+    await apply_summary_delta(db, count_delta(added=[db_holiday]))
+    version = await bump_data_version(db)
+    await db.flush()
+    await publish(db, holidays_event(version[0], [db_holiday]))
     await db.commit()
+    data_version.set(*version)
     await db.refresh(db_holiday)
+    calendar_index.upsert(db_holiday)
+    business_calendar.invalidate()
     return db_holiday
 
 async def update_holiday(db: AsyncSession, holiday_id: int, holiday: HolidayUpdate):
     db_holiday = await get_holiday(db, holiday_id)
+    if db_holiday is None:
+        return None
+    old_record = _record(db_holiday)
+    old_key = summary_key(db_holiday)
     update_data = holiday.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_holiday, field, value)
+    delta = count_delta(added=[db_holiday])
+    delta[old_key] -= 1
+    await apply_summary_delta(db, delta)
+    version = await bump_data_version(db)
+    await publish(db, holidays_event(version[0], [old_record, db_holiday]))
     await db.commit()
+    data_version.set(*version)
     await db.refresh(db_holiday)
+    calendar_index.upsert(db_holiday)
+    business_calendar.invalidate()
     return db_holiday
 
 async def delete_holiday(db: AsyncSession, holiday_id: int):
     db_holiday = await get_holiday(db, holiday_id)
     await db.delete(db_holiday)
+    await apply_summary_delta(db, count_delta(removed=[db_holiday]))
+    version = await bump_data_version(db)
+    await publish(db, holidays_event(version[0], [db_holiday]))
     await db.commit()
+    data_version.set(*version)
+    calendar_index.remove(holiday_id)
+    business_calendar.invalidate()
 
-async def import_holidays_from_lib(db: AsyncSession, year: int):
-    imported_count = 0
-
-    us_federal_holidays = holidays.US(years=year)
-    for date_obj, name in us_federal_holidays.items():
-        existing_holiday = await db.execute(
-            select(Holiday).filter(
-                and_(
-                    Holiday.date == date_obj,
-                    Holiday.name == name,
-                    Holiday.country == "US",
-                    Holiday.state.is_(None)
-                )
-            )
+async def _owned_custom_holidays(db: AsyncSession, ids: List[int], user_id: int, atomic: bool):
+    """Check ownership for a bulk update/delete in one query.
+
+    Returns ``(rows_by_index, errors_by_index)``; in atomic mode any error
+    leaves ``rows_by_index`` empty.
+    """
+    result = await db.execute(select(Holiday).filter(Holiday.id.in_(set(ids))))
+    found = {holiday.id: holiday for holiday in result.scalars()}
+    rows, errors, seen = {}, {}, set()
+    for index, holiday_id in enumerate(ids):
+        holiday = found.get(holiday_id)
+        if holiday_id in seen:
+            errors[index] = "Повторяющийся id в запросе"
+        elif holiday is None or not holiday.is_custom:
+            errors[index] = "Праздник не найден или не является пользовательским"
+        elif holiday.owner_id != user_id:
+            errors[index] = "Нет прав на изменение этого праздника"
+        else:
+            rows[index] = holiday
+        seen.add(holiday_id)
+    if atomic and errors:
+        rows = {}
+    return rows, errors
+
+def _bulk_result(count: int, applied: dict, errors: dict, status: str) -> BulkResult:
+    results = []
+    for index in range(count):
+        if index in applied:
+            record = applied[index]
+            holiday = None if status == "deleted" else HolidayInDB.model_validate(record)
+            results.append(BulkItemResult(index=index, id=record.id, status=status, holiday=holiday))
+        elif index in errors:
+            results.append(BulkItemResult(index=index, status="failed", error=errors[index]))
+        else:
+            results.append(BulkItemResult(index=index, status="skipped"))
+    return BulkResult(
+        committed=bool(applied),
+        succeeded=len(applied),
+        failed=len(errors),
+        results=results,
+    )
+
+async def _commit_bulk(db: AsyncSession, changed: Sequence):
+    version = await bump_data_version(db)
+    await publish(db, holidays_event(version[0], changed))
+    await db.commit()
+    data_version.set(*version)
+    business_calendar.invalidate()
+
+async def bulk_create_holidays(
+    db: AsyncSession, holidays: List[HolidayBulkCreate], user_id: int, atomic: bool = True
+) -> BulkResult:
+    """Create custom holidays with batched multi-row INSERTs in one transaction.
+
+    Items missing a required column fail; in atomic mode nothing is created then.
+    """
+    errors = {}
+    for index, item in enumerate(holidays):
+        missing = [field for field in REQUIRED_HOLIDAY_FIELDS if getattr(item, field) is None]
+        if missing:
+            errors[index] = f"Поля не могут быть пустыми: {', '.join(missing)}"
+    valid = [] if atomic and errors else [index for index in range(len(holidays)) if index not in errors]
+    if not valid:
+        return _bulk_result(len(holidays), {}, errors, "created")
+
+    rows = [dict(**holidays[index].dict(), owner_id=user_id, is_custom=True) for index in valid]
+    created = []
+    for offset in range(0, len(rows), IMPORT_BATCH_SIZE):
+        result = await db.execute(
+            insert(Holiday).values(rows[offset:offset + IMPORT_BATCH_SIZE]).returning(*RECORD_COLUMNS)
         )
-        if not existing_holiday.scalar_one_or_none():
-            db_holiday = Holiday(
-                name=name,
-                date=date_obj,
-                country="US",
-                state=None,
-                federal=True,
-                is_custom=False
-            )
-            db.add(db_holiday)
-            imported_count += 1
-
-    for state in holidays.US_STATES:
-        state_holidays = holidays.US(years=year, state=state)
-        for date_obj, name in state_holidays.items():
-            if date_obj in us_federal_holidays and name == us_federal_holidays[date_obj]:
-                continue
-
-            existing_holiday = await db.execute(
-                select(Holiday).filter(
-                    and_(
-                        Holiday.date == date_obj,
-                        Holiday.name == name,
-                        Holiday.country == "US",
-                        Holiday.state == state
-                    )
-                )
-            )
-            if not existing_holiday.scalar_one_or_none():
-                db_holiday = Holiday(
-                    name=name,
-                    date=date_obj,
-                    country="US",
-                    state=state,
-                    federal=False,
-                    is_custom=False
-                )
-                db.add(db_holiday)
-                imported_count += 1
+        created.extend(HolidayRecord(*row) for row in result)
+    # RETURNING сохраняет порядок VALUES в PostgreSQL и SQLite
+    await apply_summary_delta(db, count_delta(added=created))
+    await _commit_bulk(db, created)
+    calendar_index.upsert_many(created)
+    return _bulk_result(len(holidays), dict(zip(valid, created)), errors, "created")
+
+async def bulk_update_holidays(
+    db: AsyncSession, updates: List[HolidayBulkUpdate], user_id: int, atomic: bool = True
+) -> BulkResult:
+    """Apply partial updates to the user's custom holidays in one transaction.
+
+    Rows are updated with a single executemany UPDATE by primary key.
+    Items that null a required column fail like items the user does not own.
+    """
+    targets, errors = await _owned_custom_holidays(db, [item.id for item in updates], user_id, False)
+    for index, item in enumerate(updates):
+        nulls = [
+            field for field in REQUIRED_HOLIDAY_FIELDS
+            if field in item.model_fields_set and getattr(item, field) is None
+        ]
+        if nulls and index not in errors:
+            errors[index] = f"Поля не могут быть пустыми: {', '.join(nulls)}"
+            targets.pop(index, None)
+    if atomic and errors:
+        targets = {}
+    if not targets:
+        return _bulk_result(len(updates), {}, errors, "updated")
+
+    old_records = [_record(holiday) for holiday in targets.values()]
+    old_keys = [summary_key(record) for record in old_records]
+    parameters = [
+        {**updates[index].dict(exclude_unset=True, exclude={"id"}), "id": holiday.id}
+        for index, holiday in targets.items()
+    ]
+    await db.execute(update(Holiday), parameters)
+    result = await db.execute(
+        select(*RECORD_COLUMNS).filter(Holiday.id.in_([holiday.id for holiday in targets.values()]))
+    )
+    records = {record.id: record for record in (HolidayRecord(*row) for row in result)}
+    delta = count_delta(added=records.values())
+    delta.subtract(old_keys)
+    await apply_summary_delta(db, delta)
+    await _commit_bulk(db, [*old_records, *records.values()])
+    calendar_index.upsert_many(records.values())
+    applied = {index: records[holiday.id] for index, holiday in targets.items()}
+    return _bulk_result(len(updates), applied, errors, "updated")
+
+async def bulk_delete_holidays(db: AsyncSession, ids: List[int], user_id: int, atomic: bool = True) -> BulkResult:
+    """Delete the user's custom holidays with a single DELETE ... WHERE id IN."""
+    targets, errors = await _owned_custom_holidays(db, ids, user_id, atomic)
+    if not targets:
+        return _bulk_result(len(ids), {}, errors, "deleted")
+
+    await db.execute(
+        delete(Holiday)
+        .where(Holiday.id.in_([holiday.id for holiday in targets.values()]))
+        .execution_options(synchronize_session=False)
+    )
+    await apply_summary_delta(db, count_delta(removed=targets.values()))
+    await _commit_bulk(db, list(targets.values()))
+    for holiday in targets.values():
+        calendar_index.remove(holiday.id)
+    return _bulk_result(len(ids), targets, errors, "deleted")
+
+def _insert(db: AsyncSession):
+    """Dialect-specific INSERT construct supporting ON CONFLICT."""
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite_insert
+    return pg_insert
+
+async def insert_holiday_rows(db: AsyncSession, rows: List[dict]) -> List[HolidayRecord]:
+    """Insert library holidays in batches, skipping rows that already exist.
+
+    Returns the rows that were actually inserted.
+    """
+    insert = _insert(db)
+    inserted = []
+    for offset in range(0, len(rows), IMPORT_BATCH_SIZE):
+        stmt = insert(Holiday).values(rows[offset:offset + IMPORT_BATCH_SIZE])
+        stmt = stmt.on_conflict_do_nothing(
+            index_elements=NATURAL_KEY,
+            index_where=Holiday.is_custom == false(),
+        ).returning(*RECORD_COLUMNS)
+        result = await db.execute(stmt)
+        inserted.extend(HolidayRecord(*row) for row in result)
+    return inserted
+
+async def import_holidays(
+    db: AsyncSession,
+    countries: Sequence[str],
+    year_from: int,
+    year_to: int,
+    subdivisions: Optional[Sequence[str]] = None,
+    progress: Optional[ImportProgress] = None,
+) -> HolidayImportResult:
+    """Import library holidays for several countries and years in one transaction.
 
+    Rows are generated per ``(country, year)`` on the process pool of
+    ``holiday_generator`` and inserted as each unit completes. ``subdivisions``
+    restricts regional holidays and is only meaningful for a single country;
+    by default all subdivisions are imported. ``progress`` is awaited after
+    every unit with ``(units_done, units_total, rows_inserted)``.
+    """
+    started = time.perf_counter()
+    years = list(range(year_from, year_to + 1))
+    regions = tuple(subdivisions) if subdivisions else None
+    units: List[GenerationUnit] = [(country, year, regions) for country in countries for year in years]
+    # Секции создаем отдельной короткой транзакцией: DDL блокирует всю таблицу
+    if await partition_catalog.ensure_year_partitions(db, years):
+        await db.commit()
+
+    candidates = 0
+    inserted: List[HolidayRecord] = []
+    done = 0
+    async for (country, _, _), rows in holiday_generator.generate(units):
+        candidates += len(rows)
+        unit_inserted = await insert_holiday_rows(db, rows)
+        inserted.extend(unit_inserted)
+        import_candidates.inc(len(rows), country=country)
+        import_rows.inc(len(unit_inserted), country=country)
+        done += 1
+        if progress is not None:
+            await progress(done, len(units), len(inserted))
+
+    await apply_summary_delta(db, count_delta(added=inserted))
+    version = await bump_data_version(db) if inserted else None
+    if version:
+        await publish(db, holidays_event(version[0], inserted))
     await db.commit()
-    return imported_count
+    if version:
+        data_version.set(*version)
+    calendar_index.upsert_many(inserted)
+    business_calendar.invalidate()
+
+    elapsed = time.perf_counter() - started
+    import_duration.observe(elapsed)
+    return HolidayImportResult(
+        country=",".join(countries),
+        years=years,
+        candidates=candidates,
+        imported=len(inserted),
+        elapsed_seconds=round(elapsed, 3),
+        rows_per_second=round(candidates / elapsed, 1) if elapsed else 0.0,
+    )
+
+def _change(action: str, row: dict, previous: Optional[dict] = None) -> HolidayChange:
+    return HolidayChange(
+        action=action, id=row.get("id"), country=row["country"], state=row["state"],
+        date=row["date"], name=row["name"], previous=previous,
+    )
+
+async def reconcile_holidays(
+    db: AsyncSession,
+    countries: Sequence[str],
+    year_from: int,
+    year_to: int,
+    subdivisions: Optional[Sequence[str]] = None,
+    dry_run: bool = False,
+) -> HolidayReconcileResult:
+    """Make the stored library holidays equal to the library's output.
+
+    Unlike ``import_holidays`` this also updates renamed or moved holidays
+    and deletes rows the library no longer produces (see ``app.reconcile``).
+    Each ``(country, year)`` unit costs one indexed read; the changes of all
+    units are applied in one transaction, or only reported with ``dry_run``.
+    Custom holidays and, with ``subdivisions``, other regions are untouched.
+    """
+    started = time.perf_counter()
+    years = list(range(year_from, year_to + 1))
+    regions = tuple(subdivisions) if subdivisions else None
+    units: List[GenerationUnit] = [(country, year, regions) for country in countries for year in years]
+    if not dry_run and await partition_catalog.ensure_year_partitions(db, years):
+        await db.commit()
+
+    inserts: List[dict] = []
+    updates: List[tuple] = []
+    deletes: List[HolidayRecord] = []
+    unchanged = 0
+    async for (country, year, _), rows in holiday_generator.generate(units):
+        start, end = year_bounds(year)
+        query = select(*RECORD_COLUMNS).filter(
+            Holiday.country == country,
+            Holiday.date >= start,
+            Holiday.date < end,
+            Holiday.is_custom == false(),
+        )
+        if regions:
+            query = query.filter(or_(Holiday.state.is_(None), Holiday.state.in_(regions)))
+        stored = [HolidayRecord(*row) for row in await db.execute(query)]
+        diff = diff_holidays(stored, rows)
+        inserts.extend(diff.inserts)
+        updates.extend(diff.updates)
+        deletes.extend(diff.deletes)
+        unchanged += diff.unchanged
+        import_candidates.inc(len(rows), country=country)
+
+    inserted: List[HolidayRecord] = []
+    if (inserts or updates or deletes) and not dry_run:
+        # Сначала удаления и переименования: они освобождают естественные ключи для вставок
+        if deletes:
+            await db.execute(
+                delete(Holiday)
+                .where(Holiday.id.in_([record.id for record in deletes]))
+                .execution_options(synchronize_session=False)
+            )
+        if updates:
+            await db.execute(update(Holiday), [{**values, "id": record.id} for record, values in updates])
+        inserted = await insert_holiday_rows(db, inserts)
+        result = await db.execute(
+            select(*RECORD_COLUMNS).filter(Holiday.id.in_([record.id for record, _ in updates]))
+        )
+        updated = [HolidayRecord(*row) for row in result]
+        old_records = [record for record, _ in updates]
+
+        changed = [*deletes, *old_records, *updated, *inserted]
+
+        await apply_summary_delta(db, count_delta(added=[*inserted, *updated], removed=[*deletes, *old_records]))
+        version = await bump_data_version(db)
+        await publish(db, holidays_event(version[0], changed))
+        await db.commit()
+        data_version.set(*version)
+        for record in deletes:
+            calendar_index.remove(record.id)
+        calendar_index.upsert_many([*updated, *inserted])
+        business_calendar.invalidate_jurisdictions(
+            {(record.country, record.state) for record in changed}, range(year_from, year_to + 1)
+        )
+        for country in countries:
+            import_rows.inc(sum(1 for record in inserted if record.country == country), country=country)
+    else:
+        await db.rollback()
+
+    # Без dry_run вставленные строки берем из RETURNING: в отчете будут их id
+    inserted_rows = [record._asdict() for record in inserted] if not dry_run else inserts
+    changes = [_change("deleted", record._asdict()) for record in deletes]
+    changes.extend(
+        _change("updated", {**record._asdict(), **values}, {field: getattr(record, field) for field in values})
+        for record, values in updates
+    )
+    changes.extend(_change("inserted", row) for row in inserted_rows)
+    elapsed = time.perf_counter() - started
+    import_duration.observe(elapsed)
+    return HolidayReconcileResult(
+        country=",".join(countries),
+        years=years,
+        dry_run=dry_run,
+        inserted=len(inserted_rows),
+        updated=len(updates),
+        deleted=len(deletes),
+        unchanged=unchanged,
+        elapsed_seconds=round(elapsed, 3),
+        changes=changes,
+    )
+
+async def import_holidays_from_lib(
+    db: AsyncSession,
+    year: int,
+    country: str = "US",
+    state: Optional[str] = None,
+    end_year: Optional[int] = None,
+    progress: Optional[ImportProgress] = None,
+) -> HolidayImportResult:
+    """Import holidays of one country (or one state) for ``year``..``end_year`` inclusive."""
+    return await import_holidays(
+        db, [country], year, end_year or year, [state] if state else None, progress
+    )
 
 async def clear_holidays_table(db: AsyncSession):
     """Clear all records from the holidays table and reset the sequence."""
-    await db.execute(text("DELETE FROM holidays"))
-    await db.execute(text("ALTER SEQUENCE holidays_id_seq RESTART WITH 1"))
-    await db.commit()
\ No newline at end of file
+    if await partition_catalog.is_partitioned(db):
+        await db.execute(text("TRUNCATE holidays"))
+    else:
+        await db.execute(text("DELETE FROM holidays"))
+    if db.get_bind().dialect.name == "postgresql":
+        await db.execute(text("ALTER SEQUENCE holidays_id_seq RESTART WITH 1"))
+    await db.execute(delete(HolidaySummary))
+    version = await bump_data_version(db)
+    await publish(db, holidays_event(version[0], clear=True))
+    await db.commit()
+    data_version.set(*version)
+    calendar_index.clear()
+    business_calendar.invalidate()
+
+async def _year_replaced(db: AsyncSession, year: int):
+    """Finish a whole-year change: summary, data version and caches of every worker."""
+    start, end = year_bounds(year)
+    last_day = date(year, 12, 31)
+    await rebuild_summary(db, year)
+    version = await bump_data_version(db)
+    await publish(db, holidays_event(version[0], period=(start, last_day)))
+    await db.commit()
+    data_version.set(*version)
+    await calendar_index.refresh_range(db, None, start, last_day)
+    business_calendar.invalidate()
+
+async def reimport_year(db: AsyncSession, year: int, countries: Sequence[str]) -> HolidayImportResult:
+    """Replace the library holidays of ``countries`` in ``year`` with a fresh import.
+
+    Custom holidays and other countries are kept. On a partitioned table the
+    year is built in a staging copy while the live partition keeps serving
+    reads and writes and then swapped in under a short exclusive lock, so
+    no write is lost and readers see either the old year or the new one,
+    never a half-imported mix. Elsewhere the old rows are deleted and the
+    new ones inserted in a single transaction.
+    """
+    started = time.perf_counter()
+    countries = list(countries)
+    units: List[GenerationUnit] = [(country, year, None) for country in countries]
+    generated: Dict[str, List[dict]] = {}
+    async for (country, _, _), unit_rows in holiday_generator.generate(units):
+        generated.setdefault(country, []).extend(unit_rows)
+        import_candidates.inc(len(unit_rows), country=country)
+    candidates = sum(len(country_rows) for country_rows in generated.values())
+    inserted: Dict[str, int] = {}
+
+    start, end = year_bounds(year)
+    if await partition_catalog.is_partitioned(db):
+        if await partition_catalog.ensure_year_partitions(db, [year]):
+            await db.commit()
+        await partition_catalog.create_staging(db, year)
+        for country, country_rows in generated.items():
+            inserted[country] = await partition_catalog.insert_staging(db, year, country_rows)
+        # Замена в той же транзакции: блокировка holidays держится до коммита
+        await retry_on_lock_conflict(db, lambda: partition_catalog.swap_staging(
+            db, year, "is_custom IS TRUE OR country <> ALL(:countries)", {"countries": countries}
+        ))
+    else:
+        await db.execute(
+            delete(Holiday)
+            .where(
+                Holiday.is_custom == false(),
+                Holiday.country.in_(countries),
+                Holiday.date >= start,
+                Holiday.date < end,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        for country, country_rows in generated.items():
+            inserted[country] = len(await insert_holiday_rows(db, country_rows))
+    await _year_replaced(db, year)
+    for country, count in inserted.items():
+        import_rows.inc(count, country=country)
+
+    elapsed = time.perf_counter() - started
+    import_duration.observe(elapsed)
+    return HolidayImportResult(
+        country=",".join(countries),
+        years=[year],
+        candidates=candidates,
+        imported=sum(inserted.values()),
+        elapsed_seconds=round(elapsed, 3),
+        rows_per_second=round(candidates / elapsed, 1) if elapsed else 0.0,
+    )
+
+async def drop_holiday_year(db: AsyncSession, year: int):
+    """Delete every holiday of ``year``, library and custom alike.
+
+    A partitioned table drops the year's partition instead of deleting rows.
+    """
+    start, end = year_bounds(year)
+    by_date = delete(Holiday).where(Holiday.date >= start, Holiday.date < end)
+    if await partition_catalog.is_partitioned(db):
+        if not await retry_on_lock_conflict(db, lambda: partition_catalog.drop_year_partition(db, year)):
+            # Год без своей секции хранится в секции по умолчанию
+            await db.execute(by_date.execution_options(synchronize_session=False))
+    else:
+        await db.execute(by_date.execution_options(synchronize_session=False))
+    await _year_replaced(db, year)
@@ -0,0 +1,94 @@
+"""Version of the holidays data used for conditional GET.
+
+Every write to the holidays table bumps a single-row counter in the same
+transaction (``crud.bump_data_version``). Listing responses carry a strong
+ETag derived from that version and the normalised request parameters, so a
+client presenting a matching ``If-None-Match`` gets 304 without the query
+running. Within a worker the version is updated right after local writes;
+writes from other workers are picked up after ``check_interval`` seconds.
+"""
+import hashlib
+import json
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional, Tuple
+
+from fastapi import Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import HolidaysDataVersion
+
+
+class DataVersion:
+    def __init__(self, check_interval: float):
+        self.check_interval = check_interval
+        self.version: Optional[int] = None
+        self.updated_at: Optional[datetime] = None
+        self._checked_at = 0.0
+
+    def set(self, version: int, updated_at: datetime):
+        if updated_at.tzinfo is None:
+            updated_at = updated_at.replace(tzinfo=timezone.utc)
+        self.version = version
+        self.updated_at = updated_at
+        self._checked_at = time.monotonic()
+
+    def invalidate(self):
+        self.version = None
+
+    async def current(self, db: AsyncSession) -> Tuple[int, datetime]:
+        if self.version is None or time.monotonic() - self._checked_at > self.check_interval:
+            row = (await db.execute(
+                select(HolidaysDataVersion.version, HolidaysDataVersion.updated_at)
+                .where(HolidaysDataVersion.id == 1)
+            )).one_or_none()
+            if row is None:
+                self.set(0, datetime(1970, 1, 1, tzinfo=timezone.utc))
+            else:
+                self.set(*row)
+        return self.version, self.updated_at
+
+
+data_version = DataVersion(check_interval=settings.data_version_check_interval)
+
+
+def data_version_for(db: AsyncSession) -> DataVersion:
+    """Version tracker of the database behind ``db`` (a replica has its own)."""
+    return db.info.get("data_version", data_version)
+
+
+def make_etag(version: int, params: dict) -> str:
+    """Strong ETag for a listing: data version plus normalised parameters."""
+    normalized = json.dumps(
+        {key: value for key, value in params.items() if value is not None},
+        sort_keys=True,
+        default=str,
+        separators=(",", ":"),
+    )
+    digest = hashlib.sha1(normalized.encode()).hexdigest()[:20]
+    return f'"v{version}-{digest}"'
+
+
+def http_date(value: datetime) -> str:
+    return format_datetime(value.astimezone(timezone.utc).replace(microsecond=0), usegmt=True)
+
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime) -> bool:
+    """Evaluate If-None-Match, falling back to If-Modified-Since (RFC 9110)."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return etag in tags or f"W/{etag}" in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return last_modified.replace(microsecond=0) <= since
+    return False
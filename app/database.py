@@ -1,15 +1,68 @@
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 from app.config import settings
+from app.db_pool import InstrumentedPool, pool_stats
+from app.metrics import instrument_engine
+
+
+def engine_options(database_url: str) -> dict:
+    """Pool and driver options for ``create_async_engine`` from ``Settings``."""
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        # In-memory SQLite живет в одном соединении, пул для нее не настраиваем
+        return {}
+    options = dict(
+        poolclass=InstrumentedPool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+    )
+    if url.get_driver_name() == "asyncpg":
+        # Кеш подготовленных выражений asyncpg и кеш диалекта SQLAlchemy поверх него;
+        # за PgBouncer в режиме transaction оба нужно выключать (0)
+        options["connect_args"] = {
+            "statement_cache_size": settings.db_statement_cache_size,
+            "prepared_statement_cache_size": settings.db_statement_cache_size,
+        }
+    return options
+
 
 # Создаем асинхронный движок SQLAlchemy
-engine = create_async_engine(settings.DATABASE_URL)
+engine = create_async_engine(settings.database_url, **engine_options(settings.database_url))
+pool_stats.attach(engine.sync_engine)
+if settings.metrics_enabled:
+    instrument_engine(engine.sync_engine)
 
 # Создаем фабрику асинхронных сессий
 async_session = sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
 
+# Сессии для маршрутов, которые только читают: без BEGIN/ROLLBACK вокруг
+# каждого запроса, каждый SELECT выполняется в собственной неявной транзакции
+readonly_session = sessionmaker(
+    engine.execution_options(isolation_level="AUTOCOMMIT"), class_=AsyncSession, expire_on_commit=False
+)
+
+# Необязательная реплика для маршрутов чтения (см. app.replica). Статистика
+# пула в /db/pool относится только к основной базе
+replica_engine = None
+replica_session = None
+if settings.replica_database_url:
+    replica_options = engine_options(settings.replica_database_url)
+    if "poolclass" in replica_options:
+        replica_options["poolclass"] = AsyncAdaptedQueuePool
+    replica_engine = create_async_engine(settings.replica_database_url, **replica_options)
+    if settings.metrics_enabled:
+        instrument_engine(replica_engine.sync_engine)
+    replica_session = sessionmaker(
+        replica_engine.execution_options(isolation_level="AUTOCOMMIT"), class_=AsyncSession, expire_on_commit=False
+    )
+
 # Базовый класс для декларативных моделей
 Base = declarative_base()
 
@@ -19,4 +72,9 @@ async def get_db():
         try:
             yield session
         finally:
-            await session.close()
\ No newline at end of file
+            await session.close()
+
+# Зависимость для маршрутов только на чтение
+async def get_readonly_db():
+    async with readonly_session() as session:
+        yield session
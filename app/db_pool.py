@@ -0,0 +1,134 @@
+"""Connection pool instrumentation.
+
+``InstrumentedPool`` times how long callers wait for a connection and counts
+checkout timeouts; pool events keep the remaining counters (checkouts,
+connects, invalidations, peaks of checked-out and overflow connections).
+``pool_stats.snapshot()`` backs ``GET /db/pool`` and the ``db_pool_*``
+series of ``GET /metrics``.
+"""
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
+
+from app.metrics import registry, sample_lines
+
+
+# Поля snapshot(), которые попадают в /metrics, и их тип в Prometheus
+_EXPORTED = {
+    "pool_size": "gauge",
+    "checked_out": "gauge",
+    "overflow": "gauge",
+    "checkouts": "counter",
+    "timeouts": "counter",
+    "wait_seconds_total": "counter",
+}
+
+
+class PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.engine: Optional[Engine] = None
+        self.reset()
+
+    @property
+    def pool(self) -> Optional[Pool]:
+        # engine.dispose() заменяет пул новым (обработчики событий переходят к нему)
+        return self.engine.pool if self.engine is not None else None
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.connects = 0
+            self.invalidations = 0
+            self.timeouts = 0
+            self.waits = 0
+            self.wait_seconds = 0.0
+            self.max_wait_seconds = 0.0
+            self.peak_checked_out = 0
+            self.peak_overflow = 0
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self.waits += 1
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def attach(self, engine: Engine):
+        """Collect the stats of the pool of ``engine`` (a sync engine), whichever it currently is."""
+        self.engine = engine
+        event.listen(engine.pool, "connect", self._on_connect)
+        event.listen(engine.pool, "checkout", self._on_checkout)
+        event.listen(engine.pool, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+            pool = self.pool
+            if isinstance(pool, AsyncAdaptedQueuePool):
+                self.peak_checked_out = max(self.peak_checked_out, pool.checkedout())
+                self.peak_overflow = max(self.peak_overflow, pool.overflow())
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stats = {
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds, 6),
+                "wait_seconds_avg": round(self.wait_seconds / self.waits, 6) if self.waits else 0.0,
+                "wait_seconds_max": round(self.max_wait_seconds, 6),
+                "peak_checked_out": self.peak_checked_out,
+                "peak_overflow": self.peak_overflow,
+            }
+        pool = self.pool
+        if isinstance(pool, AsyncAdaptedQueuePool):
+            # overflow() отрицателен, пока пул не заполнен до pool_size
+            stats.update(
+                pool_size=pool.size(),
+                max_overflow=pool._max_overflow,
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+            )
+        return stats
+
+    def metric_lines(self):
+        stats = self.snapshot()
+        lines = []
+        for key, kind in _EXPORTED.items():
+            if key in stats:
+                lines += sample_lines(f"db_pool_{key}", f"Connection pool {key.replace('_', ' ')}", stats[key], kind)
+        return lines
+
+
+pool_stats = PoolStats()
+registry.add_collector(pool_stats.metric_lines)
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that reports checkout wait time to ``pool_stats``."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            pool_stats.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        pool_stats.record_wait(time.perf_counter() - started)
+        return connection
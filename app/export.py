@@ -0,0 +1,170 @@
+"""Streaming export of holidays as NDJSON, CSV or iCalendar.
+
+Rows are read through a server-side cursor in chunks of ``EXPORT_CHUNK_SIZE``
+and each chunk is encoded straight to text, so memory use does not depend on
+how many rows are exported.
+"""
+import csv
+import io
+import json
+from datetime import timedelta
+from typing import AsyncIterator, Iterable
+
+import anyio
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.calendar_index import HolidayRecord, RECORD_COLUMNS
+from app.database import async_session
+from app.metrics import registry
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+export_errors = registry.counter("holiday_export_errors_total", "Exports aborted by an error mid-stream", ["format"])
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "ics": "text/calendar; charset=utf-8",
+}
+
+EXTENSIONS = {"ndjson": "ndjson", "csv": "csv", "ics": "ics"}
+
+
+def _ndjson(records: Iterable[HolidayRecord]) -> str:
+    return "".join(
+        json.dumps(record._asdict(), default=str, ensure_ascii=False) + "\n" for record in records
+    )
+
+
+def _csv(records: Iterable[HolidayRecord], header: bool) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(HolidayRecord._fields)
+    writer.writerows(records)
+    return buffer.getvalue()
+
+
+def _ics_escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+    )
+
+
+def _ics_fold(line: str) -> str:
+    # RFC 5545: строки длиннее 75 октетов переносятся с пробелом в начале
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts, current = [], b""
+    for char in line:
+        char_bytes = char.encode()
+        if len(current) + len(char_bytes) > (75 if not parts else 74):
+            parts.append(current.decode())
+            current = b""
+        current += char_bytes
+    parts.append(current.decode())
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _ics(records: Iterable[HolidayRecord]) -> str:
+    lines = []
+    for record in records:
+        summary = record.name or ""
+        location = f"{record.country}-{record.state}" if record.state else record.country
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:holiday-{record.id}@holydays-api",
+            f"DTSTAMP:{record.date:%Y%m%d}T000000Z",
+            f"DTSTART;VALUE=DATE:{record.date:%Y%m%d}",
+            f"DTEND;VALUE=DATE:{record.date + timedelta(days=1):%Y%m%d}",
+            f"SUMMARY:{_ics_escape(summary)}",
+            f"LOCATION:{_ics_escape(location or '')}",
+            "TRANSP:TRANSPARENT",
+        ]
+        if record.notes:
+            lines.append(f"DESCRIPTION:{_ics_escape(record.notes)}")
+        lines.append("END:VEVENT")
+    return "".join(_ics_fold(line) for line in lines)
+
+
+async def _partitions(result) -> AsyncIterator[list]:
+    while True:
+        # Отключение клиента отменяет отправку ответа: если отмена придет
+        # посреди чтения, соединение останется на полуслове и не закроется
+        with anyio.CancelScope(shield=True):
+            rows = await result.fetchmany(EXPORT_CHUNK_SIZE)
+        if not rows:
+            return
+        yield rows
+
+
+async def _export_chunks(result, export_format: str) -> AsyncIterator[str]:
+    try:
+        if export_format == "ics":
+            yield "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//holydays-api//holidays export//EN\r\nCALSCALE:GREGORIAN\r\n"
+        first = True
+        async for partition in _partitions(result):
+            records = [HolidayRecord(*row) for row in partition]
+            if export_format == "ndjson":
+                yield _ndjson(records)
+            elif export_format == "csv":
+                yield _csv(records, header=first)
+            else:
+                yield _ics(records)
+            first = False
+        if export_format == "csv" and first:
+            yield _csv([], header=True)
+        if export_format == "ics":
+            yield "END:VCALENDAR\r\n"
+    except Exception:
+        # Заголовок 200 уже отправлен: исключение обрывает соединение без
+        # завершающего чанка, и клиент видит ошибку, а не усеченный файл;
+        # сервер записывает его в лог как любое необработанное исключение
+        export_errors.inc(format=export_format)
+        raise
+
+
+class ExportResponse(StreamingResponse):
+    """Streaming export that owns its database session.
+
+    Starlette runs a ``background`` task only after a complete response, so
+    the session is closed in ``__call__`` itself: after the body is sent,
+    when the client disconnects and when sending fails.
+    """
+
+    def __init__(self, session: AsyncSession, chunks: AsyncIterator[str], export_format: str):
+        super().__init__(
+            chunks,
+            media_type=MEDIA_TYPES[export_format],
+            headers={"Content-Disposition": f'attachment; filename="holidays.{EXTENSIONS[export_format]}"'},
+        )
+        self.session = session
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.body_iterator.aclose()
+            await self.session.close()
+
+
+async def stream_export(query, export_format: str) -> ExportResponse:
+    """Execute ``query`` and return a response streaming its export, chunk by chunk.
+
+    The rows are read through a server-side cursor, which needs a transaction,
+    so the export uses its own ``async_session`` rather than the request's
+    (already closed by the time a StreamingResponse body is sent). The query
+    is executed before this returns: a database error becomes an error
+    response instead of an empty 200 body.
+    """
+    statement = query.with_only_columns(*RECORD_COLUMNS).execution_options(yield_per=EXPORT_CHUNK_SIZE)
+    session = async_session()
+    try:
+        result = await session.stream(statement)
+    except BaseException:
+        await session.close()
+        raise
+    return ExportResponse(session, _export_chunks(result, export_format), export_format)
@@ -1,9 +1,23 @@
+import base64
+import json
 from datetime import date
-from typing import List, Optional
+from typing import Any, List, Optional, Tuple
 from pydantic import BaseModel
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, or_, false, literal
 from app.models import Holiday
 
+# Колонки, по которым разрешена сортировка (и, значит, курсор)
+SORTABLE_FIELDS = ("id", "name", "date", "country", "state", "federal", "notes", "is_custom", "owner_id")
+
+# Допустимые типы значений курсора по колонкам (дата передается строкой ISO)
+CURSOR_VALUE_TYPES = {
+    "id": (int,),
+    "owner_id": (int, type(None)),
+    "date": (str, type(None)),
+    "federal": (bool, type(None)),
+    "is_custom": (bool, type(None)),
+}
+
 class HolidayFilter(BaseModel):
     name: Optional[str] = None
     country: Optional[str] = None
@@ -16,6 +30,107 @@ class HolidayFilter(BaseModel):
     page: int = 1
     per_page: int = 10
     order_by: List[str] = ["id"]
+    cursor: Optional[str] = None
+
+def period_range(year: int, month: Optional[int] = None) -> Tuple[date, Optional[date]]:
+    """Half-open ``[start, end)`` date range of a year or a month of a year.
+
+    ``end`` is None when the period ends at ``date.max``.
+    """
+    if month:
+        start = date(year, month, 1)
+        if month == 12:
+            return start, date(year + 1, 1, 1) if year < date.max.year else None
+        return start, date(year, month + 1, 1)
+    return date(year, 1, 1), date(year + 1, 1, 1) if year < date.max.year else None
+
+def period_condition(year: int, month: Optional[int] = None):
+    """Sargable predicate for ``year``/``month`` that can use date indexes."""
+    start, end = period_range(year, month)
+    if end is None:
+        return Holiday.date >= start
+    return and_(Holiday.date >= start, Holiday.date < end)
+
+def sort_fields(order_by: List[str]) -> List[Tuple[str, bool]]:
+    """Parse ``order_by`` into ``(field, descending)`` pairs ending with ``id``.
+
+    The trailing ``id`` makes the ordering total, which keyset pagination needs.
+    """
+    fields = []
+    for sort_field in order_by:
+        desc = sort_field.startswith("-")
+        name = sort_field[1:] if desc else sort_field
+        if name in SORTABLE_FIELDS and name not in (f for f, _ in fields):
+            fields.append((name, desc))
+    if "id" not in (f for f, _ in fields):
+        fields.append(("id", False))
+    return fields
+
+def order_clauses(order_by: List[str]) -> list:
+    """ORDER BY clauses for ``order_by``, NULLs placed as PostgreSQL does."""
+    clauses = []
+    for sort_field, desc in sort_fields(order_by):
+        field = getattr(Holiday, sort_field)
+        clauses.append(field.desc().nulls_first() if desc else field.asc().nulls_last())
+    return clauses
+
+def encode_cursor(row, order_by: List[str]) -> str:
+    """Opaque cursor pointing right after ``row`` in the given ordering."""
+    fields = sort_fields(order_by)
+    values = []
+    for name, _ in fields:
+        value = getattr(row, name)
+        values.append(value.isoformat() if isinstance(value, date) else value)
+    payload = json.dumps({"o": [("-" if desc else "") + name for name, desc in fields], "v": values})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, order_by: List[str]) -> List[Any]:
+    """Decode a cursor produced by ``encode_cursor`` for the same ``order_by``.
+
+    Raises ValueError if the cursor is malformed or was issued for another ordering.
+    """
+    fields = sort_fields(order_by)
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        ordering, values = payload["o"], payload["v"]
+    except (ValueError, TypeError, KeyError):
+        raise ValueError("Invalid cursor")
+    if ordering != [("-" if desc else "") + name for name, desc in fields] or len(values) != len(fields):
+        raise ValueError("Cursor does not match order_by")
+    decoded = []
+    for (name, _), value in zip(fields, values):
+        allowed = CURSOR_VALUE_TYPES.get(name, (str, type(None)))
+        # bool - подкласс int: для числовых колонок его отбрасываем отдельно
+        if not isinstance(value, allowed) or (isinstance(value, bool) and bool not in allowed):
+            raise ValueError("Invalid cursor")
+        if name == "date" and value is not None:
+            try:
+                value = date.fromisoformat(value)
+            except (ValueError, TypeError):
+                raise ValueError("Invalid cursor")
+        decoded.append(value)
+    return decoded
+
+def _after(column, desc: bool, value):
+    # NULL идут последними при ASC и первыми при DESC, как в PostgreSQL
+    if value is None:
+        return column.isnot(None) if desc else false()
+    value = literal(value, column.type)
+    if desc:
+        return column < value
+    return or_(column > value, column.is_(None))
+
+def _equal(column, value):
+    return column.is_(None) if value is None else column == value
+
+def cursor_condition(order_by: List[str], values: List[Any]):
+    """Keyset predicate selecting rows strictly after the cursor position."""
+    fields = [(getattr(Holiday, name), desc) for name, desc in sort_fields(order_by)]
+    branches = []
+    for i, (column, desc) in enumerate(fields):
+        equal_prefix = [_equal(c, v) for (c, _), v in zip(fields[:i], values[:i])]
+        branches.append(and_(*equal_prefix, _after(column, desc, values[i])))
+    return or_(*branches)
 
 async def apply_filters(query, filters: HolidayFilter):
     conditions = []
@@ -43,18 +158,10 @@ async def apply_filters(query, filters: HolidayFilter):
     if filters.states:
         conditions.append(Holiday.state.in_(filters.states))
 
+    if filters.cursor:
+        conditions.append(cursor_condition(filters.order_by, decode_cursor(filters.cursor, filters.order_by)))
+
     if conditions:
         query = query.filter(and_(*conditions))
 
-    for sort_field in filters.order_by:
-        desc = False
-        if sort_field.startswith("-"):
-            desc = True
-            sort_field = sort_field[1:]
-        if hasattr(Holiday, sort_field):
-            field = getattr(Holiday, sort_field)
-            if desc:
-                field = field.desc()
-            query = query.order_by(field)
-
-    return query 
\ No newline at end of file
+    return query.order_by(*order_clauses(filters.order_by)) 
\ No newline at end of file
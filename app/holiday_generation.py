@@ -0,0 +1,135 @@
+"""Generation of library holidays on a process pool.
+
+Expanding holiday rules in the ``holidays`` library is pure CPU work that
+holds the GIL, so a multi-country, multi-year import is split into
+``(country, year)`` units that are generated in worker processes. Units are
+yielded as soon as they finish, which lets the importer write one unit to the
+database while the pool is still generating the next ones. Units covered by
+the prebuilt snapshot (``app.snapshot``) are read from it instead, and the
+``holidays`` package is only imported when something has to be generated.
+"""
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
+
+from app.config import settings
+from app.snapshot import holiday_snapshot
+
+
+# Единица генерации: (страна, год, регионы или None = все регионы страны)
+GenerationUnit = Tuple[str, int, Optional[Tuple[str, ...]]]
+
+
+def is_supported_jurisdiction(country: str, state: Optional[str] = None) -> bool:
+    import holidays
+
+    subdivisions = holidays.list_supported_countries().get(country)
+    if subdivisions is None:
+        return False
+    return state is None or state in subdivisions
+
+
+def build_holiday_rows(
+    years: Sequence[int], country: str = "US", subdivisions: Optional[Sequence[str]] = None
+) -> List[dict]:
+    """Build the full candidate set of library holidays for the given years.
+
+    National holidays are stored with ``state=None`` and ``federal=True``;
+    regional holidays that duplicate a national one are skipped. Without
+    ``subdivisions`` every subdivision of the country is generated.
+
+    Runs in pool worker processes, so it must stay a picklable module-level
+    function.
+    """
+    import holidays
+
+    national = holidays.country_holidays(country, years=years)
+    rows = [
+        dict(name=name, date=date_obj, country=country, state=None, federal=True, is_custom=False)
+        for date_obj, name in sorted(national.items())
+    ]
+
+    for subdiv in subdivisions or national.subdivisions:
+        regional = holidays.country_holidays(country, subdiv=subdiv, years=years)
+        for date_obj, name in sorted(regional.items()):
+            if national.get(date_obj) == name:
+                continue
+            rows.append(
+                dict(name=name, date=date_obj, country=country, state=subdiv, federal=False, is_custom=False)
+            )
+    return rows
+
+
+def _build_unit(unit: GenerationUnit) -> List[dict]:
+    country, year, subdivisions = unit
+    return build_holiday_rows([year], country, subdivisions)
+
+
+class HolidayGenerator:
+    def __init__(self, processes: int):
+        self.processes = processes
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _executor(self, units: int) -> Optional[Executor]:
+        """Process pool, or None to use the default thread executor.
+
+        A single unit is not worth the IPC round trip, and ``processes=0``
+        disables the pool altogether.
+        """
+        if self.processes <= 0 or units <= 1:
+            return None
+        if self._pool is None:
+            # spawn, а не fork: в процессе сервера уже работают потоки и цикл событий
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.processes, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    async def generate(self, units: Sequence[GenerationUnit]) -> AsyncIterator[Tuple[GenerationUnit, List[dict]]]:
+        """Yield ``(unit, rows)`` in completion order.
+
+        At most two units per process are in flight, so generated rows never
+        pile up faster than the caller consumes them.
+        """
+        missing = []
+        for unit in units:
+            rows = holiday_snapshot.rows(*unit)
+            if rows is None:
+                missing.append(unit)
+            else:
+                yield unit, rows
+        units = missing
+
+        loop = asyncio.get_running_loop()
+        executor = self._executor(len(units))
+        window = max(self.processes, 1) * 2
+        queued = iter(units)
+        pending = {}
+
+        def submit():
+            for unit in queued:
+                future = loop.run_in_executor(executor, _build_unit, unit)
+                pending[future] = unit
+                if len(pending) >= window:
+                    return
+
+        submit()
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    unit = pending.pop(future)
+                    yield unit, future.result()
+                submit()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+holiday_generator = HolidayGenerator(processes=settings.import_processes)
@@ -0,0 +1,247 @@
+"""Background import jobs.
+
+``POST /holidays/import`` stores an ``ImportJob`` row and returns at once; a
+pool of asyncio workers in every API process runs queued jobs. Jobs are
+persisted, and a job whose worker stopped sending heartbeats (its process
+died) is queued again by the periodic sweep of every running process, or on
+the next startup; the active-job unique index deduplicates submissions for the
+same ``(country, state, year range)``; ``country`` and ``state`` hold sorted,
+comma-separated code lists, so one job can cover several countries. A job is
+claimed with a conditional UPDATE, so with several API processes each job
+runs exactly once.
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Set, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.crud import import_holidays
+from app.database import async_session
+from app.models import ImportJob
+
+
+ACTIVE_STATUSES = ("queued", "running")
+
+# Как часто воркер пишет прогресс в таблицу задач
+PROGRESS_INTERVAL_SECONDS = 1.0
+# Heartbeat и поиск брошенных задач - несколько раз за срок устаревания
+HEARTBEATS_PER_STALE_PERIOD = 3
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+async def get_import_job(db: AsyncSession, job_id: int) -> Optional[ImportJob]:
+    result = await db.execute(select(ImportJob).filter(ImportJob.id == job_id))
+    return result.scalar_one_or_none()
+
+
+async def _find_active_job(db: AsyncSession, country: str, state: Optional[str], year_from: int, year_to: int):
+    result = await db.execute(
+        select(ImportJob).filter(
+            ImportJob.country == country,
+            ImportJob.state.is_(None) if state is None else ImportJob.state == state,
+            ImportJob.year_from == year_from,
+            ImportJob.year_to == year_to,
+            ImportJob.status.in_(ACTIVE_STATUSES),
+        )
+    )
+    return result.scalars().first()
+
+
+class ImportJobRunner:
+    def __init__(self, workers: int, stale_after: float):
+        self.workers = workers
+        self.stale_after = stale_after
+        # Очередь создается в start(), внутри цикла событий сервера
+        self._queue: Optional["asyncio.Queue[int]"] = None
+        self._tasks: List[asyncio.Task] = []
+        # Задачи, ждущие в очереди и выполняемые этим процессом
+        self._waiting: Set[int] = set()
+        self._running: Set[int] = set()
+
+    @property
+    def _sweep_interval(self) -> float:
+        return self.stale_after / HEARTBEATS_PER_STALE_PERIOD
+
+    async def submit(
+        self,
+        db: AsyncSession,
+        country: str,
+        state: Optional[str],
+        year_from: int,
+        year_to: int,
+        owner_id: Optional[int] = None,
+    ) -> Tuple[ImportJob, bool]:
+        """Queue an import; returns ``(job, deduplicated)``."""
+        existing = await _find_active_job(db, country, state, year_from, year_to)
+        if existing is not None:
+            return existing, True
+
+        job = ImportJob(
+            country=country, state=state, year_from=year_from, year_to=year_to,
+            status="queued", progress=0.0, owner_id=owner_id,
+        )
+        db.add(job)
+        try:
+            await db.commit()
+        except IntegrityError:
+            # Ту же задачу параллельно поставил другой запрос или процесс
+            await db.rollback()
+            existing = await _find_active_job(db, country, state, year_from, year_to)
+            if existing is None:
+                raise
+            return existing, True
+        await db.refresh(job)
+        if self._queue is not None:
+            self._enqueue(job.id)
+        return job, False
+
+    def _enqueue(self, job_id: int):
+        if job_id not in self._waiting:
+            self._waiting.add(job_id)
+            self._queue.put_nowait(job_id)
+
+    async def requeue_stale(self):
+        """Re-queue jobs with a stale heartbeat and pick up every queued job."""
+        async with async_session() as db:
+            stale = _now() - timedelta(seconds=self.stale_after)
+            # Задачи, чей воркер перестал отвечать (процесс упал), возвращаем в очередь
+            await db.execute(
+                update(ImportJob)
+                .where(
+                    ImportJob.status == "running",
+                    ImportJob.heartbeat_at < stale,
+                    ImportJob.id.notin_(self._running),
+                )
+                .values(status="queued", progress=0.0)
+            )
+            await db.commit()
+            # Очередь общая для всех процессов: задачу заберет тот, кто первым ее захватит
+            result = await db.execute(
+                select(ImportJob.id).filter(ImportJob.status == "queued").order_by(ImportJob.id)
+            )
+            for job_id in result.scalars():
+                self._enqueue(job_id)
+
+    async def start(self):
+        """Re-queue unfinished jobs and start the workers and the stale-job sweep."""
+        self._queue = asyncio.Queue()
+        await self.requeue_stale()
+        for number in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker(), name=f"import-worker-{number}"))
+        self._tasks.append(asyncio.create_task(self._sweep(), name="import-sweep"))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._waiting.clear()
+
+    async def _sweep(self):
+        while True:
+            await asyncio.sleep(self._sweep_interval)
+            try:
+                await self.requeue_stale()
+            except Exception as e:
+                print(f"Ошибка при поиске брошенных задач импорта: {e}")
+
+    async def _heartbeat(self, job_id: int):
+        # Импорт не всегда сообщает о прогрессе (долгая генерация одного года):
+        # heartbeat идет отдельно, чтобы живую задачу не сочли брошенной
+        while True:
+            await asyncio.sleep(self._sweep_interval)
+            try:
+                await self._set(job_id, heartbeat_at=_now())
+            except Exception as e:
+                print(f"Не удалось обновить heartbeat задачи импорта {job_id}: {e}")
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            self._waiting.discard(job_id)
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Ошибка в воркере импорта (задача {job_id}): {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _set(self, job_id: int, **values) -> bool:
+        async with async_session() as db:
+            result = await db.execute(update(ImportJob).where(ImportJob.id == job_id).values(**values))
+            await db.commit()
+            return result.rowcount > 0
+
+    async def _run(self, job_id: int):
+        now = _now()
+        async with async_session() as db:
+            # Атомарно забираем задачу: её мог уже взять другой процесс
+            claimed = await db.execute(
+                update(ImportJob)
+                .where(ImportJob.id == job_id, ImportJob.status == "queued")
+                .values(status="running", started_at=now, heartbeat_at=now, progress=0.0, error=None)
+            )
+            await db.commit()
+            if claimed.rowcount == 0:
+                return
+            job = await get_import_job(db, job_id)
+            country, state, year_from, year_to = job.country, job.state, job.year_from, job.year_to
+
+        last_report = time.monotonic()
+
+        async def report(done: int, total: int, inserted: int):
+            nonlocal last_report
+            if time.monotonic() - last_report >= PROGRESS_INTERVAL_SECONDS:
+                last_report = time.monotonic()
+                # Прогресс не критичен: ошибка его записи не должна ронять импорт
+                try:
+                    await self._set(job_id, progress=round(done / total, 4) if total else 1.0,
+                                    imported=inserted, heartbeat_at=_now())
+                except Exception as e:
+                    print(f"Не удалось обновить прогресс задачи импорта {job_id}: {e}")
+
+        self._running.add(job_id)
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        try:
+            async with async_session() as db:
+                result = await import_holidays(
+                    db, country.split(","), year_from, year_to,
+                    state.split(",") if state else None, progress=report,
+                )
+        except asyncio.CancelledError:
+            # Процесс останавливается: вернем задачу в очередь для следующего запуска
+            await asyncio.shield(self._set(job_id, status="queued", progress=0.0))
+            raise
+        except Exception as e:
+            await self._set(job_id, status="failed", error=str(e)[:1000], finished_at=_now())
+            return
+        finally:
+            heartbeat.cancel()
+            self._running.discard(job_id)
+
+        await self._set(
+            job_id,
+            status="succeeded",
+            progress=1.0,
+            candidates=result.candidates,
+            imported=result.imported,
+            rows_per_second=result.rows_per_second,
+            finished_at=_now(),
+            heartbeat_at=_now(),
+        )
+
+
+import_job_runner = ImportJobRunner(
+    workers=settings.import_job_workers,
+    stale_after=settings.import_job_stale_seconds,
+)
@@ -1,25 +1,57 @@
+# Импортируется первым: от этой отметки считается время запуска воркера
+from app.boot import BOOT_STARTED
+
+import asyncio
+import time
+from collections import namedtuple
 from datetime import date, timedelta
-from typing import List, Optional, Annotated
+from typing import List, Literal, Optional, Annotated
 
-from fastapi import FastAPI, Depends, HTTPException, status, Query
+from fastapi import FastAPI, Body, Depends, HTTPException, Request, Response, status, Query
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy import select, extract
+from sqlalchemy import select, extract, func, literal, union_all
 import uvicorn
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db, AsyncSessionLocal
-from app.models import User, Holiday
-from app.schemas import UserCreate, UserInDB, Token, HolidayCreate, HolidayInDB, HolidayUpdate
+from app.database import get_db, get_readonly_db, async_session, readonly_session
+from app.db_pool import pool_stats
+from app.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, registry
+from app.models import Holiday
+from app.schemas import (
+    UserCreate, UserInDB, Token, HolidayCreate, HolidayInDB, HolidayUpdate,
+    BusinessDayBatchRequest, BusinessDayBatchResult, MAX_BUSINESS_DAY_OFFSET, MAX_BUSINESS_DAY_SPAN_YEARS, MAX_STATE_LENGTH,
+    HolidayBulkCreate, HolidayBulkUpdate, HolidayBulkDelete, BulkResult, MAX_BULK_ITEMS,
+    ImportJobInDB, ImportJobSubmitted, HolidaySearchResult,
+    HolidayBatchQuery, HolidayBatchQueryResult, HolidayQuerySpec, HolidayGroupCount, HolidayImportResult,
+    HolidayReconcileResult
+)
 from app.crud import (
-    get_user_by_email, create_user, verify_password,
+    get_user_by_email, create_user, authenticate_user,
     create_holiday, get_holidays, get_holiday,
-    update_holiday, delete_holiday, import_holidays_from_lib, clear_holidays_table
+    update_holiday, delete_holiday, clear_holidays_table, get_count,
+    bulk_create_holidays, bulk_update_holidays, bulk_delete_holidays,
+    reimport_year, drop_holiday_year, reconcile_holidays
 )
-from app.auth import create_access_token, get_current_active_user
+from app.auth import AuthUser, create_access_token, get_current_active_user, get_optional_active_user, user_cache
 from app.config import settings
-from app.filters import HolidayFilter, apply_filters
+from app.passwords import PasswordHasherBusy, password_hasher
+from app.filters import HolidayFilter, apply_filters, encode_cursor, order_clauses, period_condition
+from app.calendar_index import calendar_index, HolidayRecord, RECORD_COLUMNS
+from app.business_days import business_calendar
+from app.jobs import get_import_job, import_job_runner
+from app.holiday_generation import holiday_generator, is_supported_jurisdiction
+from app.snapshot import holiday_snapshot
+from app.search import autocomplete_cache, autocomplete_names, search_holidays
+from app.summary import GROUP_FIELDS, aggregate_holidays, rebuild_summary, summary_is_stale
+from app.serialization import dump_holidays, encoded_response, holidays_response
+from app.export import stream_export
+from app.data_version import data_version_for, http_date, is_not_modified, make_etag
+from app.replica import DataVersionMiddleware, get_replica_db, replica_monitor
+from app.notifications import change_listener
+from app.coalescing import listing_flight
 
+_imports_done = time.perf_counter()
 
 app = FastAPI(
     title="API для управления праздничными днями",
@@ -27,45 +59,121 @@ app = FastAPI(
                 "включая государственные, региональные и пользовательские праздники.",
     version="0.1.0",
 )
+app.add_middleware(DataVersionMiddleware)
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
+# Ссылки на фоновые задачи, чтобы их не собрал сборщик мусора
+background_tasks = set()
 
 ActiveSession = Annotated[AsyncSession, Depends(get_db)]
-CurrentUser = Annotated[User, Depends(get_current_active_user)]
+ReadOnlySession = Annotated[AsyncSession, Depends(get_readonly_db)]
+# Чтение, которое может обслужить реплика (с откатом на основную базу). Рабочие
+# дни и статус импорта читают основную: их кеши и свежие задачи не должны отставать
+ReplicaSession = Annotated[AsyncSession, Depends(get_replica_db)]
+CurrentUser = Annotated[AuthUser, Depends(get_current_active_user)]
+OptionalUser = Annotated[Optional[AuthUser], Depends(get_optional_active_user)]
+
+async def build_calendar_index():
+    # Индекс, прочитанный до подписки, пропустил бы события между чтением и версией
+    await change_listener.wait_subscribed()
+    async with readonly_session() as db:
+        await calendar_index.rebuild(db)
+    print(f"Индекс календаря построен: {len(calendar_index)} записей.")
 
 @app.on_event("startup")
 async def startup_event():
-    db = AsyncSessionLocal()
+    if settings.holiday_snapshot_path:
+        if holiday_snapshot.load(settings.holiday_snapshot_path):
+            print(f"Снимок праздников загружен: {len(holiday_snapshot)} записей.")
+        else:
+            print(f"Снимок праздников {settings.holiday_snapshot_path} не найден, устарел или поврежден.")
+
+    try:
+        async with async_session() as db:
+            # База создана до появления сводной таблицы: заполняем ее один раз
+            if await summary_is_stale(db):
+                await rebuild_summary(db)
+                await db.commit()
+                print("Сводная таблица праздников пересчитана.")
+    except Exception as e:
+        print(f"Ошибка при пересчете сводной таблицы праздников: {e}")
+
+    # Импорт и построение индекса идут в фоне: воркер сразу принимает запросы
     try:
-        current_year = date.today().year
-        imported_federal = await import_holidays_from_lib(db, current_year, country="US")
-        print(f"Импортировано {imported_federal} федеральных праздников США за {current_year} год.")
+        await import_job_runner.start()
+        async with async_session() as db:
+            current_year = date.today().year
+            job, deduplicated = await import_job_runner.submit(db, "US", None, current_year, current_year)
+            print(f"Задача импорта праздников США за {current_year} год: #{job.id} ({job.status}).")
     except Exception as e:
-        print(f"Ошибка при импорте праздников: {e}")
-    finally:
-        await db.close()
+        print(f"Ошибка при постановке импорта праздников: {e}")
+    try:
+        await change_listener.start()
+    except Exception as e:
+        print(f"Ошибка при подписке на уведомления об изменениях: {e}")
+    try:
+        await replica_monitor.start()
+    except Exception as e:
+        print(f"Ошибка при запуске проверки реплики: {e}")
+    if settings.calendar_index_enabled:
+        task = asyncio.create_task(build_calendar_index())
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+
+    ready = time.perf_counter()
+    app.state.startup_seconds = round(ready - BOOT_STARTED, 3)
+    print(
+        f"Воркер готов за {app.state.startup_seconds} с "
+        f"(импорт модулей {_imports_done - BOOT_STARTED:.3f} с, запуск {ready - _imports_done:.3f} с)."
+    )
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await import_job_runner.stop()
+    await replica_monitor.stop()
+    await change_listener.stop()
+    holiday_generator.shutdown()
+    holiday_snapshot.close()
+    password_hasher.shutdown()
 
 
 @app.get("/", summary="Проверка работоспособности API")
 async def root():
     return {"message": "Добро пожаловать в API праздничных дней США!"}
 
+def password_hasher_busy_exception():
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Сервис перегружен, повторите попытку позже",
+        headers={"Retry-After": "1"},
+    )
+
 @app.post("/register", response_model=UserInDB, summary="Регистрация нового пользователя")
 async def register_user(user: UserCreate, db: ActiveSession):
     db_user = await get_user_by_email(db, email=user.email)
     if db_user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email уже зарегистрирован")
-    new_user = await create_user(db=db, user=user)
+    try:
+        new_user = await create_user(db=db, user=user)
+    except PasswordHasherBusy:
+        raise password_hasher_busy_exception()
     return new_user
 
 @app.post("/token", response_model=Token, summary="Получение JWT-токена авторизации")
 async def login_for_access_token(form_data: Annotated[OAuth2PasswordRequestForm, Depends()], db: ActiveSession):
-    user = await get_user_by_email(db, email=form_data.username)
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    try:
+        user = await authenticate_user(db, form_data.username, form_data.password)
+    except PasswordHasherBusy:
+        raise password_hasher_busy_exception()
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Неправильный email или пароль",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = create_access_token(
         data={"sub": user.email}, expires_delta=access_token_expires
     )
@@ -75,16 +183,81 @@ async def login_for_access_token(form_data: Annotated[OAuth2PasswordRequestForm,
 async def read_users_me(current_user: CurrentUser):
     return current_user
 
-@app.post("/holidays/import", status_code=status.HTTP_201_CREATED, summary="Импорт праздников из библиотеки holidays")
+@app.get("/cache/stats", summary="Статистика внутренних кешей")
+async def cache_stats():
+    return {
+        "users": user_cache.stats(),
+        "autocomplete": autocomplete_cache.stats(),
+        "notifications": change_listener.stats(),
+        "listing_coalescing": listing_flight.stats(),
+    }
+
+@app.get("/db/pool", summary="Статистика пула соединений с БД")
+async def db_pool_stats():
+    return pool_stats.snapshot()
+
+@app.get("/db/replica", summary="Состояние реплики для чтения")
+async def db_replica_stats():
+    return replica_monitor.stats()
+
+@app.get("/metrics", summary="Метрики в формате Prometheus", include_in_schema=False)
+async def metrics():
+    return Response(content=registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+def import_jurisdictions(year: int, end_year: Optional[int], country: str, state: Optional[str]):
+    """Validate import parameters; returns the normalized country and state codes."""
+    if end_year is not None and end_year < year:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="end_year не может быть меньше year")
+    countries = sorted({code.strip().upper() for code in country.split(",") if code.strip()})
+    states = sorted({code.strip().upper() for code in state.split(",") if code.strip()}) if state else []
+    if not countries:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Не указана страна для импорта")
+    if states and len(countries) > 1:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Штаты можно указать только для одной страны")
+    if not all(is_supported_jurisdiction(code) for code in countries) or not all(
+        is_supported_jurisdiction(countries[0], code) for code in states
+    ):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Страна или штат не поддерживаются библиотекой holidays")
+    return countries, states
+
+@app.post("/holidays/import", response_model=ImportJobSubmitted, status_code=status.HTTP_202_ACCEPTED, summary="Постановка импорта праздников из библиотеки holidays в очередь")
 async def import_holidays_route(
     db: ActiveSession,
     current_user: CurrentUser,
     year: Annotated[int, Query(description="Год для импорта праздников")],
-    country: Annotated[str, Query(description="Страна для импорта")] = "US",
-    state: Annotated[Optional[str], Query(description="Штат для импорта (если применимо)")] = None
+    country: Annotated[str, Query(description="Страны для импорта через запятую")] = "US",
+    state: Annotated[Optional[str], Query(description="Штаты или регионы через запятую (только для одной страны)")] = None,
+    end_year: Annotated[Optional[int], Query(description="Последний год диапазона импорта (включительно)")] = None
+):
+    countries, states = import_jurisdictions(year, end_year, country, state)
+    # Нормализованные списки храним через запятую: так работает дедупликация задач
+    job, deduplicated = await import_job_runner.submit(
+        db, ",".join(countries), ",".join(states) or None, year, end_year or year, owner_id=current_user.id
+    )
+    return {"job": job, "deduplicated": deduplicated}
+
+@app.post("/holidays/reconcile", response_model=HolidayReconcileResult, summary="Сверка праздников с библиотекой holidays")
+async def reconcile_holidays_route(
+    db: ActiveSession,
+    current_user: CurrentUser,
+    year: Annotated[int, Query(description="Первый год сверки")],
+    country: Annotated[str, Query(description="Страны через запятую")] = "US",
+    state: Annotated[Optional[str], Query(description="Штаты или регионы через запятую (только для одной страны)")] = None,
+    end_year: Annotated[Optional[int], Query(description="Последний год сверки (включительно)")] = None,
+    dry_run: Annotated[bool, Query(description="Только отчет об изменениях, без записи")] = False,
 ):
-    imported_count = await import_holidays_from_lib(db, year, country, state)
-    return {"message": f"Успешно импортировано {imported_count} праздников."}
+    """Insert, update and delete library holidays so they match the library. Only for admin users."""
+    if not current_user.email == "admin@example.com":  # Простая проверка на админа
+        raise HTTPException(status_code=403, detail="Only admin users can reconcile holidays")
+    countries, states = import_jurisdictions(year, end_year, country, state)
+    return await reconcile_holidays(db, countries, year, end_year or year, states or None, dry_run)
+
+@app.get("/holidays/import/{job_id}", response_model=ImportJobInDB, summary="Статус задачи импорта")
+async def import_job_status(job_id: int, db: ReadOnlySession, current_user: CurrentUser):
+    job = await get_import_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Задача импорта не найдена")
+    return job
 
 
 @app.post("/holidays", response_model=HolidayInDB, status_code=status.HTTP_201_CREATED, summary="Добавление нового пользовательского праздника")
@@ -93,47 +266,309 @@ async def create_new_holiday(
     db: ActiveSession,
     current_user: CurrentUser
 ):
-    new_holiday = await create_holiday(db=db, holiday=holiday, owner_id=current_user.id)
+    new_holiday = await create_holiday(db=db, holiday=holiday, user_id=current_user.id)
     return new_holiday
 
-@app.get("/holidays", response_model=List[HolidayInDB], summary="Получение списка праздников с фильтрацией")
-async def list_holidays(
-    db: ActiveSession,
-    holiday_filter: HolidayFilter = Depends(),
-    year: Optional[int] = Query(None, description="Год для фильтрации"),
-    month: Optional[int] = Query(None, description="Месяц для фильтрации"),
-    states: Optional[str] = Query(None, description="Фильтр по праздникам группы штатов (например, NY,TX,FL)"),
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, le=200)
-):
+async def holidays_query(holiday_filter: HolidayFilter, year: Optional[int], month: Optional[int], state_list: Optional[List[str]]):
     query = select(Holiday)
-    
-    # Применяем фильтры
-    query = holiday_filter.filter(query)
 
-    # Ручные фильтры для YEAR/MONTH
+    # Применяем фильтры, курсор и сортировку
+    query = await apply_filters(query, holiday_filter)
+
+    # Год и месяц превращаем в диапазон дат, чтобы работали индексы по date.
+    # Месяц без года диапазоном не выражается
     if year:
-        query = query.filter(extract('year', Holiday.date) == year)
-    if month:
+        query = query.filter(period_condition(year, month))
+    elif month:
         query = query.filter(extract('month', Holiday.date) == month)
-    
+
     # Ручная обработка 'states'
-    if states:
-        state_list = [s.strip().upper() for s in states.split(',')]
+    if state_list:
         query = query.filter(Holiday.state.in_(state_list))
+    return query
 
-    # Пагинация и сортировка
-    query = query.offset(skip).limit(limit)
-    
-    # Применяем сортировку, если она указана
-    if holiday_filter.order_by:
-        query = holiday_filter.sort(query)
+async def fetch_holidays_page(
+    db: AsyncSession,
+    holiday_filter: HolidayFilter,
+    year: Optional[int],
+    month: Optional[int],
+    state_list: Optional[List[str]],
+    skip: int,
+    limit: int,
+    total: Optional[str],
+    records: bool,
+):
+    """One page of ``GET /holidays`` from the database and the total count if requested.
 
+    With ``records`` the page holds ``HolidayRecord`` tuples instead of ORM objects.
+    """
+    query = await holidays_query(holiday_filter, year, month, state_list)
+    count = None
+    if total:
+        # Общее число не зависит от позиции курсора
+        count_query = await holidays_query(holiday_filter.copy(update={"cursor": None}), year, month, state_list)
+        count = await get_count(db, count_query, estimate=total == "estimate")
+
+    # Пагинация
+    query = query.offset(skip).limit(limit)
+    if records:
+        result = await db.execute(query.with_only_columns(*RECORD_COLUMNS))
+        return [HolidayRecord(*row) for row in result], count
     result = await db.execute(query)
-    holidays_data = result.scalars().all()
+    return result.scalars().all(), count
+
+SharedPage = namedtuple("SharedPage", ["body", "total", "next_cursor"])
+
+async def shared_holidays_page(
+    bind,
+    holiday_filter: HolidayFilter,
+    year: Optional[int],
+    month: Optional[int],
+    state_list: Optional[List[str]],
+    skip: int,
+    limit: int,
+    total: Optional[str],
+) -> SharedPage:
+    """``fetch_holidays_page`` encoded once for every request coalesced onto it.
+
+    Uses its own session on ``bind`` (the database the leading request was
+    routed to), so the execution does not depend on the leader's session.
+    """
+    async with AsyncSession(bind, expire_on_commit=False) as db:
+        holidays_data, count = await fetch_holidays_page(
+            db, holiday_filter, year, month, state_list, skip, limit, total, records=True
+        )
+    next_cursor = None
+    if holidays_data and len(holidays_data) == limit:
+        next_cursor = encode_cursor(holidays_data[-1], holiday_filter.order_by)
+    return SharedPage(dump_holidays(holidays_data), count, next_cursor)
+
+@app.get("/holidays", response_model=List[HolidayInDB], summary="Получение списка праздников с фильтрацией")
+async def list_holidays(
+    db: ReplicaSession,
+    request: Request,
+    response: Response,
+    holiday_filter: HolidayFilter = Depends(),
+    year: Optional[int] = Query(None, ge=1, le=9999, description="Год для фильтрации"),
+    month: Optional[int] = Query(None, ge=1, le=12, description="Месяц для фильтрации"),
+    states: Optional[str] = Query(None, description="Фильтр по праздникам группы штатов (например, NY,TX,FL)"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, le=200),
+    total: Optional[Literal["exact", "estimate"]] = Query(
+        None, description="Вернуть общее число записей в заголовке X-Total-Count (точно или по статистике планировщика)"
+    ),
+):
+    state_list = [s.strip().upper() for s in states.split(',')] if states else None
+
+    # Условный GET: при совпадении ETag отвечаем 304, не выполняя запрос
+    version, last_modified = await data_version_for(db).current(db)
+    etag = make_etag(version, {
+        **holiday_filter.dict(), "year": year, "month": month, "states": state_list,
+        "skip": skip, "limit": limit, "total": total,
+    })
+    cache_headers = {"ETag": etag, "Last-Modified": http_date(last_modified)}
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers)
+    response.headers.update(cache_headers)
+
+    try:
+        # Данные из библиотеки меняются только при импорте, поэтому отвечаем из памяти
+        holidays_data = None
+        if settings.calendar_index_enabled:
+            holidays_data = calendar_index.query(
+                holiday_filter, year=year, month=month, states=state_list, skip=skip, limit=limit
+            )
+            if holidays_data is not None and total:
+                response.headers["X-Total-Count"] = str(
+                    calendar_index.count(holiday_filter, year=year, month=month, states=state_list)
+                )
+
+        if holidays_data is None and settings.coalesce_requests_enabled:
+            # Одинаковые одновременные запросы (ключ — ETag) ждут одно выполнение
+            page = await listing_flight.run(
+                etag,
+                lambda: shared_holidays_page(db.bind, holiday_filter, year, month, state_list, skip, limit, total),
+            )
+            if page.total is not None:
+                response.headers["X-Total-Count"] = str(page.total)
+            if page.next_cursor:
+                response.headers["X-Next-Cursor"] = page.next_cursor
+            return encoded_response(page.body, response)
+
+        if holidays_data is None:
+            # Только нужные колонки, без ORM-объектов
+            holidays_data, count = await fetch_holidays_page(
+                db, holiday_filter, year, month, state_list, skip, limit, total, records=settings.fast_json_enabled
+            )
+            if count is not None:
+                response.headers["X-Total-Count"] = str(count)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    if holidays_data and len(holidays_data) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(holidays_data[-1], holiday_filter.order_by)
+    if settings.fast_json_enabled:
+        # Ответ кодируется сразу в байты, минуя валидацию через response_model
+        return holidays_response(holidays_data, response)
     return list(holidays_data)
 
 
+@app.get("/holidays/search", response_model=List[HolidaySearchResult], summary="Нечеткий поиск праздников по названию")
+async def search_holidays_route(
+    db: ReplicaSession,
+    q: Annotated[str, Query(min_length=2, max_length=100, description="Строка поиска")],
+    country: Annotated[Optional[str], Query(description="Страна")] = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+):
+    results = await search_holidays(db, q, country.upper() if country else None, limit)
+    return [
+        {**HolidayInDB.model_validate(holiday).model_dump(), "score": round(score, 4)}
+        for holiday, score in results
+    ]
+
+@app.get("/holidays/autocomplete", response_model=List[str], summary="Автодополнение названий праздников")
+async def autocomplete_holidays(
+    db: ReplicaSession,
+    prefix: Annotated[str, Query(min_length=1, max_length=100, description="Начало названия")],
+    country: Annotated[Optional[str], Query(description="Страна")] = None,
+    limit: Annotated[int, Query(ge=1, le=50)] = 10,
+):
+    return await autocomplete_names(db, prefix, country.upper() if country else None, limit)
+
+@app.get(
+    "/holidays/stats",
+    response_model=List[HolidayGroupCount],
+    response_model_exclude_unset=True,
+    summary="Количество праздников с группировкой по стране, штату, году, месяцу и признакам",
+)
+async def holiday_stats(
+    db: ReplicaSession,
+    group_by: Annotated[Optional[str], Query(description=f"Поля группировки через запятую: {', '.join(GROUP_FIELDS)}")] = None,
+    country: Annotated[Optional[str], Query(description="Страна")] = None,
+    state: Annotated[Optional[str], Query(description="Штат")] = None,
+    year_from: Annotated[Optional[int], Query(ge=1, le=9999, description="Первый год")] = None,
+    year_to: Annotated[Optional[int], Query(ge=1, le=9999, description="Последний год")] = None,
+    month: Annotated[Optional[int], Query(ge=1, le=12, description="Месяц")] = None,
+    federal: Annotated[Optional[bool], Query(description="Только федеральные или только нефедеральные")] = None,
+    is_custom: Annotated[Optional[bool], Query(description="Только пользовательские или только из библиотеки")] = None,
+):
+    """Counts come from the ``holiday_summary`` table, not from ``holidays``."""
+    fields = [field.strip() for field in group_by.split(",") if field.strip()] if group_by else []
+    try:
+        return await aggregate_holidays(
+            db, list(dict.fromkeys(fields)),
+            country=country.upper() if country else None,
+            state=state.upper() if state else None,
+            year_from=year_from, year_to=year_to, month=month,
+            federal=federal, is_custom=is_custom,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+def _spec_filter(spec: HolidayQuerySpec) -> HolidayFilter:
+    return HolidayFilter(**spec.model_dump(include=set(HolidayFilter.model_fields)))
+
+@app.post("/holidays/query", response_model=HolidayBatchQueryResult, summary="Пакетная выборка праздников по нескольким фильтрам за один запрос")
+async def batch_query_holidays(batch: HolidayBatchQuery, db: ReplicaSession):
+    """Answer many ``GET /holidays`` queries at once.
+
+    Sub-queries the calendar index can answer are served from memory; the
+    rest are combined with UNION ALL into one statement, so the whole batch
+    costs at most one database round trip. Each result keeps the order and
+    the cursor semantics of ``GET /holidays``: rows are numbered in the
+    database by the sub-query's ORDER BY and returned in that order.
+    """
+    grouped = {}
+    parts = []
+    try:
+        for index, spec in enumerate(batch.queries):
+            holiday_filter = _spec_filter(spec)
+            records = None
+            if settings.calendar_index_enabled:
+                records = calendar_index.query(
+                    holiday_filter, year=spec.year, month=spec.month, skip=spec.skip, limit=spec.limit
+                )
+            if records is not None:
+                grouped[index] = records
+                continue
+            query = await holidays_query(holiday_filter, spec.year, spec.month, None)
+            position = func.row_number().over(order_by=order_clauses(spec.order_by)).label("position")
+            subquery = (
+                query.with_only_columns(*RECORD_COLUMNS, position).offset(spec.skip).limit(spec.limit).subquery()
+            )
+            parts.append(select(*subquery.c, literal(index).label("query_index")))
+            grouped[index] = []
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"queries[{index}]: {e}")
+
+    if parts:
+        # UNION ALL не сохраняет порядок строк внутри частей: восстанавливаем его
+        # по номеру строки, вычисленному базой с ее же сортировкой и collation
+        combined = (parts[0] if len(parts) == 1 else union_all(*parts)).subquery()
+        statement = select(combined).order_by(combined.c.query_index, combined.c.position)
+        for row in await db.execute(statement):
+            grouped[row.query_index].append(HolidayRecord(*row[:len(RECORD_COLUMNS)]))
+
+    results = []
+    for index, spec in enumerate(batch.queries):
+        records = grouped[index]
+        next_cursor = None
+        if records and len(records) == spec.limit:
+            next_cursor = encode_cursor(records[-1], spec.order_by)
+        results.append({"index": index, "holidays": records, "next_cursor": next_cursor})
+    return {"results": results}
+
+
+BulkMode = Annotated[
+    Literal["atomic", "best_effort"],
+    Query(description="atomic - все операции или ни одной; best_effort - применить допустимые"),
+]
+
+@app.post("/holidays/bulk", response_model=BulkResult, summary="Пакетное добавление пользовательских праздников")
+async def bulk_create(
+    holidays_in: Annotated[List[HolidayBulkCreate], Body(min_length=1, max_length=MAX_BULK_ITEMS)],
+    db: ActiveSession,
+    current_user: CurrentUser,
+    mode: BulkMode = "atomic"
+):
+    return await bulk_create_holidays(db, holidays_in, user_id=current_user.id, atomic=mode == "atomic")
+
+@app.patch("/holidays/bulk", response_model=BulkResult, summary="Пакетное редактирование пользовательских праздников")
+async def bulk_update(
+    updates: Annotated[List[HolidayBulkUpdate], Body(min_length=1, max_length=MAX_BULK_ITEMS)],
+    db: ActiveSession,
+    current_user: CurrentUser,
+    mode: BulkMode = "atomic"
+):
+    return await bulk_update_holidays(db, updates, user_id=current_user.id, atomic=mode == "atomic")
+
+@app.delete("/holidays/bulk", response_model=BulkResult, summary="Пакетное удаление пользовательских праздников")
+async def bulk_delete(
+    request: HolidayBulkDelete,
+    db: ActiveSession,
+    current_user: CurrentUser,
+    mode: BulkMode = "atomic"
+):
+    return await bulk_delete_holidays(db, request.ids, user_id=current_user.id, atomic=mode == "atomic")
+
+@app.get("/holidays/export", summary="Потоковая выгрузка праздников в NDJSON, CSV или iCalendar")
+async def export_holidays(
+    holiday_filter: HolidayFilter = Depends(),
+    export_format: Literal["ndjson", "csv", "ics"] = Query("ndjson", alias="format", description="Формат выгрузки"),
+    year: Optional[int] = Query(None, ge=1, le=9999, description="Год для фильтрации"),
+    month: Optional[int] = Query(None, ge=1, le=12, description="Месяц для фильтрации"),
+    states: Optional[str] = Query(None, description="Фильтр по праздникам группы штатов (например, NY,TX,FL)"),
+):
+    state_list = [s.strip().upper() for s in states.split(',')] if states else None
+    try:
+        query = await holidays_query(holiday_filter, year, month, state_list)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    # Запрос выполняется до отправки заголовков: ошибка базы вернет 500, а не пустой 200
+    return await stream_export(query, export_format)
+
+
 @app.put("/holidays/{holiday_id}", response_model=HolidayInDB, summary="Редактирование пользовательского праздника")
 async def update_existing_holiday(
     holiday_id: int,
@@ -168,7 +603,7 @@ async def delete_existing_holiday(
 
 @app.delete("/api/holidays/clear", response_model=dict)
 async def clear_holidays(
-    current_user: User = Depends(get_current_active_user),
+    current_user: AuthUser = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Clear all records from the holidays table. Only for admin users."""
@@ -180,5 +615,114 @@ async def clear_holidays(
     await clear_holidays_table(db)
     return {"message": "All holidays have been cleared successfully"}
 
+@app.post("/holidays/years/{year}/reimport", response_model=HolidayImportResult, summary="Атомарная замена праздников библиотеки за год")
+async def reimport_holiday_year(
+    year: int,
+    db: ActiveSession,
+    current_user: CurrentUser,
+    country: Annotated[str, Query(description="Страны для переимпорта через запятую")] = "US",
+):
+    """Replace the library holidays of the given countries in one year. Only for admin users."""
+    if not current_user.email == "admin@example.com":  # Простая проверка на админа
+        raise HTTPException(status_code=403, detail="Only admin users can reimport a year")
+    countries = sorted({code.strip().upper() for code in country.split(",") if code.strip()})
+    if not countries:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Не указана страна для импорта")
+    if not all(is_supported_jurisdiction(code) for code in countries):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Страна не поддерживается библиотекой holidays")
+    return await reimport_year(db, year, countries)
+
+@app.delete("/holidays/years/{year}", response_model=dict, summary="Удаление всех праздников за год")
+async def delete_holiday_year(year: int, db: ActiveSession, current_user: CurrentUser):
+    """Drop every holiday of one year, custom ones included. Only for admin users."""
+    if not current_user.email == "admin@example.com":  # Простая проверка на админа
+        raise HTTPException(status_code=403, detail="Only admin users can drop a year")
+    await drop_holiday_year(db, year)
+    return {"message": f"Holidays of {year} have been deleted"}
+
+def business_calendar_key(country: str, state: Optional[str], include_custom: bool, user: Optional[AuthUser]):
+    if include_custom and user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Для учета пользовательских праздников нужна авторизация",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    country, state = country.upper(), state.upper() if state else None
+    # Регионы из библиотеки бывают длиннее двух букв (ENG, NSW, 971): проверяем по ней
+    if state and not is_supported_jurisdiction(country, state):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Штат или регион не поддерживается библиотекой holidays")
+    return (country, state, user.id if include_custom else None)
+
+class BusinessDayParams:
+    def __init__(
+        self,
+        current_user: OptionalUser,
+        country: Annotated[str, Query(min_length=2, max_length=2, description="Страна")] = "US",
+        state: Annotated[Optional[str], Query(min_length=1, max_length=MAX_STATE_LENGTH, description="Штат или регион")] = None,
+        include_custom: Annotated[bool, Query(description="Учитывать пользовательские праздники текущего пользователя")] = False,
+    ):
+        self.key = business_calendar_key(country, state, include_custom, current_user)
+
+@app.get("/business-days/is-business-day", summary="Проверка, является ли дата рабочим днем")
+async def is_business_day(day: Annotated[date, Query(alias="date")], params: Annotated[BusinessDayParams, Depends()], db: ReadOnlySession):
+    await business_calendar.prepare(db, params.key, [day.year])
+    return {"date": day, "is_business_day": business_calendar.is_business_day(params.key, day)}
+
+@app.get("/business-days/add", summary="Сдвиг даты на n рабочих дней")
+async def add_business_days(
+    day: Annotated[date, Query(alias="date")],
+    n: Annotated[int, Query(
+        ge=-MAX_BUSINESS_DAY_OFFSET, le=MAX_BUSINESS_DAY_OFFSET,
+        description="Количество рабочих дней (может быть отрицательным)",
+    )],
+    params: Annotated[BusinessDayParams, Depends()],
+    db: ReadOnlySession,
+):
+    try:
+        result = await business_calendar.offset(db, params.key, day, n)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {"date": day, "n": n, "result": result}
+
+@app.get("/business-days/between", summary="Количество рабочих дней в интервале [start, end)")
+async def business_days_between(start: date, end: date, params: Annotated[BusinessDayParams, Depends()], db: ReadOnlySession):
+    if abs(end.year - start.year) > MAX_BUSINESS_DAY_SPAN_YEARS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Интервал не может быть длиннее {MAX_BUSINESS_DAY_SPAN_YEARS} лет",
+        )
+    await business_calendar.prepare(db, params.key, range(min(start, end).year, max(start, end).year + 1))
+    return {"start": start, "end": end, "business_days": business_calendar.business_days_between(params.key, start, end)}
+
+@app.get("/business-days/next", summary="Следующий рабочий день после даты")
+async def next_business_day(day: Annotated[date, Query(alias="date")], params: Annotated[BusinessDayParams, Depends()], db: ReadOnlySession):
+    try:
+        result = await business_calendar.offset(db, params.key, day, 1)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {"date": day, "next_business_day": result}
+
+@app.post("/business-days/batch", response_model=BusinessDayBatchResult, summary="Пакетные вычисления рабочих дней")
+async def business_days_batch(request: BusinessDayBatchRequest, current_user: OptionalUser, db: ReadOnlySession):
+    key = business_calendar_key(request.country, request.state, request.include_custom, current_user)
+
+    # Загружаем все нужные годы одним запросом, дальше считаем только по битсетам
+    years = {d.year for d in request.is_business_day}
+    for r in request.business_days_between:
+        years.update(range(min(r.start, r.end).year, max(r.start, r.end).year + 1))
+    await business_calendar.prepare(db, key, years)
+
+    try:
+        return BusinessDayBatchResult(
+            is_business_day=[business_calendar.is_business_day(key, d) for d in request.is_business_day],
+            business_days_between=[
+                business_calendar.business_days_between(key, r.start, r.end) for r in request.business_days_between
+            ],
+            add_business_days=[await business_calendar.offset(db, key, o.date, o.n) for o in request.add_business_days],
+            next_business_day=[await business_calendar.offset(db, key, d, 1) for d in request.next_business_day],
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
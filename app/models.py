@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Date, ForeignKey
+from sqlalchemy import DDL, event, Column, Integer, BigInteger, String, Boolean, Date, DateTime, Float, ForeignKey, Index, false, true, func
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -14,9 +14,11 @@ class User(Base):
 class Holiday(Base):
     __tablename__ = "holidays"
 
+    # В PostgreSQL миграция b81e4c7d9a05 секционирует таблицу по годам (RANGE по date,
+    # первичный ключ (id, date)); для ORM id остается уникальным ключом строки
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String)
-    date = Column(Date, index=True)
+    date = Column(Date, nullable=False, index=True)
     country = Column(String, index=True)
     state = Column(String, nullable=True, index=True)
     federal = Column(Boolean, default=False)
@@ -25,4 +27,110 @@ class Holiday(Base):
     owner_id = Column(Integer, ForeignKey("users.id"))
 
     # Связь с пользователем, который добавил/изменил праздник (опционально)
-    owner = relationship("User")
\ No newline at end of file
+    owner = relationship("User")
+
+    __table_args__ = (
+        # Естественный ключ импортированных праздников: по нему работает
+        # INSERT ... ON CONFLICT DO NOTHING в import_holidays_from_lib
+        Index(
+            "uq_holidays_natural_key",
+            "country", "state", "date", "name",
+            unique=True,
+            postgresql_nulls_not_distinct=True,
+            postgresql_where=is_custom == false(),
+            sqlite_where=is_custom == false(),
+        ),
+        # Составные индексы под основные формы запросов GET /holidays
+        Index("ix_holidays_country_state_date", "country", "state", "date"),
+        Index("ix_holidays_country_federal_date", "country", "federal", "date"),
+        Index(
+            "ix_holidays_custom_owner_date",
+            "owner_id", "date",
+            postgresql_where=is_custom == true(),
+            sqlite_where=is_custom == true(),
+        ),
+        # Триграммный индекс для ILIKE '%...%', нечеткого поиска и автодополнения
+        Index(
+            "ix_holidays_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+    )
+
+
+# Для create_all: расширение pg_trgm должно существовать до индекса ix_holidays_name_trgm
+event.listen(
+    Holiday.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+
+class HolidaysDataVersion(Base):
+    """Single-row counter bumped by every write to the holidays table."""
+    __tablename__ = "holidays_data_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=1)
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+class HolidaySummary(Base):
+    """Holiday counts per group, maintained by ``app.summary`` on every write.
+
+    ``state`` is an empty string for national holidays so that the group
+    columns can form the primary key.
+    """
+    __tablename__ = "holiday_summary"
+
+    country = Column(String, primary_key=True)
+    state = Column(String, primary_key=True)
+    year = Column(Integer, primary_key=True)
+    month = Column(Integer, primary_key=True)
+    federal = Column(Boolean, primary_key=True)
+    is_custom = Column(Boolean, primary_key=True)
+    holidays = Column(BigInteger, nullable=False, default=0)
+
+
+class ImportJob(Base):
+    """Background import of library holidays, see ``app.jobs``."""
+    __tablename__ = "import_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Отсортированные коды через запятую, например "CA,DE,US"
+    country = Column(String, nullable=False)
+    state = Column(String, nullable=True)
+    year_from = Column(Integer, nullable=False)
+    year_to = Column(Integer, nullable=False)
+    status = Column(String, nullable=False, default="queued", index=True)
+    progress = Column(Float, nullable=False, default=0.0)
+    candidates = Column(Integer, nullable=True)
+    imported = Column(Integer, nullable=True)
+    rows_per_second = Column(Float, nullable=True)
+    error = Column(String, nullable=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    # Обновляется воркером во время выполнения; по нему находим брошенные задачи
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+
+    @property
+    def duration_seconds(self):
+        if self.started_at is None:
+            return None
+        finished = self.finished_at or self.heartbeat_at or self.started_at
+        return round((finished - self.started_at).total_seconds(), 3)
+
+    __table_args__ = (
+        # Одна активная задача на (страна, штат, диапазон лет)
+        Index(
+            "uq_import_jobs_active",
+            "country", "state", "year_from", "year_to",
+            unique=True,
+            postgresql_nulls_not_distinct=True,
+            postgresql_where=status.in_(["queued", "running"]),
+            sqlite_where=status.in_(["queued", "running"]),
+        ),
+    )
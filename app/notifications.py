@@ -0,0 +1,287 @@
+"""Cross-worker invalidation of in-process caches over PostgreSQL LISTEN/NOTIFY.
+
+Every write path in ``app.crud`` publishes a compact change event on
+``CHANGE_CHANNEL`` inside its transaction, so the event is delivered only if
+the write commits and in commit order::
+
+    {"v": 42, "src": "3f2a9c1e", "op": "change", "ids": [101, 102],
+     "j": [["US", null], ["US", "NY"]], "from": "2024-07-04", "to": "2024-12-25"}
+
+``v`` is the holidays data version the write produced, ``j`` and
+``from``/``to`` the jurisdictions and date range it touched. ``ids`` lists the
+changed rows, or is missing when there are more than ``MAX_EVENT_IDS``;
+``op`` is ``"clear"`` after the table was emptied; an event with a date
+range only (a year reimport) covers every row in it. User changes are
+published as ``{"t": "users", "emails": [...]}``.
+
+Each worker keeps one listener connection. An event from another worker
+patches the calendar index (re-reading the listed rows, or the whole date
+range of the touched jurisdictions), drops the affected business-day
+bitsets and refreshes the data version. Versions are consecutive, so a gap
+means events were lost (the listener was down, for example) and the worker
+flushes every cache instead. Caches filled before the listener subscribed
+cannot be patched either: every connect, the first one included, reads the
+current version and then flushes, and the startup index build waits for the
+subscription, so it is read after that version. Other backends than PostgreSQL have a single
+process in practice; there publishing is a no-op and no listener runs.
+"""
+import asyncio
+import json
+import uuid
+from datetime import date
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.business_days import business_calendar
+from app.calendar_index import calendar_index
+from app.config import settings
+from app.data_version import data_version
+from app.database import readonly_session
+from app.metrics import registry
+from app.models import HolidaysDataVersion
+from app.search import autocomplete_cache
+
+
+CHANGE_CHANNEL = "holidays_changes"
+
+# Полезная нагрузка NOTIFY ограничена 8000 байт: длинные списки id не передаем
+MAX_EVENT_IDS = 500
+MAX_EVENT_JURISDICTIONS = 200
+
+# Сколько индекс календаря при запуске ждет подписки на изменения
+SUBSCRIBE_WAIT_SECONDS = 10.0
+
+# Идентификатор процесса: свои события воркер не применяет повторно
+WORKER_ID = uuid.uuid4().hex[:8]
+
+change_events = registry.counter(
+    "cache_change_events_total", "Change notifications received by outcome", ["outcome"]
+)
+
+
+def _enabled(dialect_name: str) -> bool:
+    return settings.change_notifications_enabled and dialect_name == "postgresql"
+
+
+def holidays_event(
+    version: int, holidays: Iterable = (), clear: bool = False, period: Optional[Tuple[date, date]] = None
+) -> dict:
+    """Change event for ``holidays`` (ORM objects or records; old and new states).
+
+    ``period`` describes a change of every row in an inclusive date range
+    instead, such as a year reimport.
+    """
+    if clear:
+        return {"v": version, "src": WORKER_ID, "op": "clear"}
+    if period is not None:
+        return {"v": version, "src": WORKER_ID, "op": "change", "from": period[0].isoformat(), "to": period[1].isoformat()}
+    ids, jurisdictions, dates = set(), set(), []
+    for holiday in holidays:
+        ids.add(holiday.id)
+        jurisdictions.add((holiday.country, holiday.state))
+        dates.append(holiday.date)
+    event = {"v": version, "src": WORKER_ID, "op": "change"}
+    if len(ids) <= MAX_EVENT_IDS:
+        event["ids"] = sorted(ids)
+    if len(jurisdictions) <= MAX_EVENT_JURISDICTIONS:
+        event["j"] = sorted(jurisdictions, key=lambda item: (item[0] or "", item[1] or ""))
+    if dates:
+        event["from"], event["to"] = min(dates).isoformat(), max(dates).isoformat()
+    return event
+
+
+async def publish(db: AsyncSession, event: dict):
+    """Queue ``event`` for delivery when the current transaction commits."""
+    if not _enabled(db.get_bind().dialect.name):
+        return
+    payload = json.dumps(event, separators=(",", ":"))
+    await db.execute(select(func.pg_notify(CHANGE_CHANNEL, payload)))
+
+
+def publish_sync(connection, event: dict):
+    """``publish`` for synchronous ORM event handlers (a ``Connection``)."""
+    if not _enabled(connection.dialect.name):
+        return
+    connection.execute(select(func.pg_notify(CHANGE_CHANNEL, json.dumps(event, separators=(",", ":")))))
+
+
+class ChangeListener:
+    def __init__(self):
+        self.version: Optional[int] = None
+        self.connected = False
+        self._user_handlers: List[Callable[[str], None]] = []
+        self._flush_handlers: List[Callable[[], None]] = []
+        self._queue: Optional["asyncio.Queue[str]"] = None
+        self._subscribed: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        # Ссылки на фоновые перестроения индекса, чтобы их не собрал сборщик мусора
+        self._rebuilds = set()
+
+    def add_user_handler(self, handler: Callable[[str], None]):
+        """Register a callback invalidating one user (by email) in a cache."""
+        self._user_handlers.append(handler)
+
+    def add_flush_handler(self, handler: Callable[[], None]):
+        """Register a callback emptying a cache on a full flush."""
+        self._flush_handlers.append(handler)
+
+    async def start(self):
+        url = make_url(settings.database_url)
+        if not _enabled(url.get_backend_name()) or self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._subscribed = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._listen(url)), asyncio.create_task(self._consume())]
+
+    async def stop(self):
+        tasks = [*self._tasks, *self._rebuilds]
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        self.connected = False
+
+    async def wait_subscribed(self, timeout: float = SUBSCRIBE_WAIT_SECONDS):
+        """Wait until the listener has subscribed for the first time.
+
+        Returns at once when no listener runs, and after ``timeout`` seconds
+        at most: a cache built before the subscription is flushed by it.
+        """
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self._subscribed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _current_version(self) -> int:
+        async with readonly_session() as db:
+            version = (await db.execute(
+                select(HolidaysDataVersion.version).where(HolidaysDataVersion.id == 1)
+            )).scalar()
+        return version or 0
+
+    async def _listen(self, url):
+        import asyncpg
+
+        dsn = url.set(drivername="postgresql").render_as_string(hide_password=False)
+        delay = 1.0
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn)
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _: closed.set())
+                await connection.add_listener(
+                    CHANGE_CHANNEL, lambda _conn, _pid, _channel, payload: self._queue.put_nowait(payload)
+                )
+                # Пока подписки не было, события могли потеряться: и при первом
+                # подключении кеши могли заполниться раньше, чем прочитана версия,
+                # а события до нее дальше считались бы уже примененными
+                self.version = await self._current_version()
+                self.flush()
+                self.connected = True
+                self._subscribed.set()
+                delay = 1.0
+                await closed.wait()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Ошибка соединения для уведомлений об изменениях: {e}")
+            finally:
+                self.connected = False
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+    async def _consume(self):
+        while True:
+            payload = await self._queue.get()
+            try:
+                await self.apply(json.loads(payload))
+            except Exception as e:
+                change_events.inc(outcome="error")
+                print(f"Ошибка применения уведомления об изменении: {e}")
+                self.flush()
+
+    async def apply(self, event: dict):
+        """Bring this worker's caches up to date with one change event."""
+        if event.get("t") == "users":
+            for email in event.get("emails", []):
+                for handler in self._user_handlers:
+                    handler(email)
+            change_events.inc(outcome="users")
+            return
+
+        version = event["v"]
+        if self.version is not None and version <= self.version:
+            change_events.inc(outcome="duplicate")
+            return
+        missed = self.version is not None and version != self.version + 1
+        self.version = version
+        if missed:
+            change_events.inc(outcome="gap")
+            self.flush()
+            return
+        if event.get("src") == WORKER_ID:
+            # Свои изменения воркер уже применил в crud
+            change_events.inc(outcome="own")
+            return
+
+        data_version.invalidate()
+        if event["op"] == "clear":
+            calendar_index.clear()
+            business_calendar.invalidate()
+            change_events.inc(outcome="clear")
+            return
+
+        jurisdictions = [tuple(item) for item in event["j"]] if "j" in event else None
+        start = date.fromisoformat(event["from"]) if "from" in event else None
+        end = date.fromisoformat(event["to"]) if "to" in event else None
+        if jurisdictions is None or start is None:
+            business_calendar.invalidate()
+        else:
+            business_calendar.invalidate_jurisdictions(jurisdictions, range(start.year, end.year + 1))
+
+        if calendar_index.loaded:
+            if "ids" in event:
+                async with readonly_session() as db:
+                    await calendar_index.refresh(db, event["ids"])
+            elif start is not None:
+                async with readonly_session() as db:
+                    await calendar_index.refresh_range(db, jurisdictions, start, end)
+            else:
+                await self._rebuild_index()
+        change_events.inc(outcome="applied")
+
+    def flush(self):
+        """Drop everything cached in this worker; the calendar index is rebuilt."""
+        data_version.invalidate()
+        business_calendar.invalidate()
+        autocomplete_cache.clear()
+        for handler in self._flush_handlers:
+            handler()
+        if calendar_index.loaded:
+            calendar_index.invalidate()
+            task = asyncio.create_task(self._rebuild_index())
+            self._rebuilds.add(task)
+            task.add_done_callback(self._rebuilds.discard)
+        change_events.inc(outcome="flush")
+
+    async def _rebuild_index(self):
+        async with readonly_session() as db:
+            await calendar_index.rebuild(db)
+
+    def stats(self) -> dict:
+        return {"enabled": bool(self._tasks), "connected": self.connected, "version": self.version}
+
+
+change_listener = ChangeListener()
@@ -0,0 +1,258 @@
+"""Yearly range partitions of the holidays table (PostgreSQL).
+
+Migration ``b81e4c7d9a05`` turns ``holidays`` into a table partitioned by
+``RANGE (date)`` with one partition per year (``holidays_y2024``) and a
+``holidays_default`` partition for rows of years without one. Queries with a
+date range (``year``/``month``, ``start_date``/``end_date``) are pruned to
+the partitions of those years.
+
+Partitions let whole years be handled as tables:
+
+* ``ensure_year_partitions`` creates missing yearly partitions before an
+  import, moving any rows of those years out of the default partition;
+* ``create_staging``/``swap_staging`` load a year into a detached copy and
+  exchange it with the live partition;
+* ``drop_year_partition`` detaches and drops a year, O(1) in its row count.
+
+The swap and the drop lock the parent ``holidays`` in ACCESS EXCLUSIVE mode
+before touching the partition, the parent-then-partition order ordinary
+queries use, and hold no other lock on the table while they wait. The wait
+is bounded by ``settings.partition_lock_timeout_ms``: every new query of
+``holidays`` queues behind a waiting ACCESS EXCLUSIVE request, so on a
+timeout ``retry_on_lock_conflict`` backs off and tries again instead.
+Changes of partitions are serialized by an advisory lock.
+
+On other backends, or a PostgreSQL database created with ``create_all``,
+``is_partitioned`` is false and ``app.crud`` falls back to plain DELETEs.
+"""
+import asyncio
+import random
+from datetime import date
+from typing import Awaitable, Callable, Iterable, List, Optional, Set, Tuple, TypeVar
+
+from sqlalchemy import column, table, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.calendar_index import HolidayRecord
+from app.config import settings
+from app.metrics import registry
+
+
+DEFAULT_PARTITION = "holidays_default"
+# SQLSTATE lock_not_available (lock_timeout) и deadlock_detected
+LOCK_CONFLICT_SQLSTATES = ("55P03", "40P01")
+# Базовая пауза перед повтором после конфликта блокировок
+LOCK_RETRY_BACKOFF = 0.2
+# Ключ pg_advisory_xact_lock: замены и удаления секций идут по одной
+MAINTENANCE_LOCK_KEY = 0x686F6C69
+
+lock_conflicts = registry.counter(
+    "holiday_partition_lock_conflicts_total", "Partition changes retried after a lock conflict", ["outcome"]
+)
+
+T = TypeVar("T")
+
+
+def partition_name(year: int) -> str:
+    return f"holidays_y{year}"
+
+
+def staging_name(year: int) -> str:
+    return f"holidays_y{year}_staging"
+
+
+def year_bounds(year: int) -> Tuple[date, date]:
+    """Half-open ``[start, end)`` range of a yearly partition."""
+    return date(year, 1, 1), date(year + 1, 1, 1)
+
+
+def _range_sql(year: int) -> str:
+    start, end = year_bounds(year)
+    return f"FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+
+
+# Колонки праздника без id: его выдает последовательность holidays_id_seq
+_STAGING_COLUMNS = [field for field in HolidayRecord._fields if field != "id"]
+
+
+def is_lock_conflict(error: DBAPIError) -> bool:
+    """Whether ``error`` is a lock timeout or deadlock, i.e. worth retrying."""
+    return getattr(error.orig, "sqlstate", None) in LOCK_CONFLICT_SQLSTATES
+
+
+async def retry_on_lock_conflict(db: AsyncSession, change: Callable[[], Awaitable[T]]) -> T:
+    """Run ``change`` in a savepoint of ``db``'s transaction, retrying it after a lock conflict.
+
+    A conflict rolls back to the savepoint, releasing the locks ``change``
+    took, and ``change`` runs again at most ``settings.partition_lock_retries``
+    more times; the work done before the savepoint is kept.
+    """
+    for attempt in range(settings.partition_lock_retries + 1):
+        try:
+            async with db.begin_nested():
+                return await change()
+        except DBAPIError as e:
+            if not is_lock_conflict(e) or attempt == settings.partition_lock_retries:
+                if is_lock_conflict(e):
+                    lock_conflicts.inc(outcome="failed")
+                raise
+            lock_conflicts.inc(outcome="retried")
+            await asyncio.sleep(LOCK_RETRY_BACKOFF * (attempt + 1) * random.uniform(0.5, 1.5))
+
+
+class PartitionCatalog:
+    """Cached knowledge of whether ``holidays`` is partitioned and by which years."""
+
+    def __init__(self):
+        self._partitioned: Optional[bool] = None
+        self._years: Set[int] = set()
+
+    def forget(self):
+        self._partitioned = None
+        self._years = set()
+
+    async def is_partitioned(self, db: AsyncSession) -> bool:
+        if db.get_bind().dialect.name != "postgresql":
+            return False
+        if self._partitioned is None:
+            self._partitioned = bool((await db.execute(text(
+                "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('holidays'))"
+            ))).scalar())
+        return self._partitioned
+
+    async def years(self, db: AsyncSession) -> List[int]:
+        """Years that have their own partition."""
+        rows = await db.execute(text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass('holidays')"
+        ))
+        prefix = partition_name(0)[:-1]
+        self._years = {
+            int(name[len(prefix):]) for (name,) in rows
+            if name.startswith(prefix) and name[len(prefix):].isdigit()
+        }
+        return sorted(self._years)
+
+    async def ensure_year_partitions(self, db: AsyncSession, years: Iterable[int]) -> List[int]:
+        """Create partitions for ``years`` that lack one; returns the created years.
+
+        Rows of such a year already stored in the default partition are moved
+        into the new partition. Runs in the caller's transaction; creating a
+        partition locks the parent table, so commit promptly.
+        """
+        if not await self.is_partitioned(db):
+            return []
+        wanted = set(years)
+        if not wanted <= self._years:
+            await self.years(db)
+        created = []
+        for year in sorted(wanted - self._years):
+            start, end = year_bounds(year)
+            bounds = {"start": start, "end": end}
+            in_default = (await db.execute(
+                text(f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE date >= :start AND date < :end)"),
+                bounds,
+            )).scalar()
+            name = partition_name(year)
+            if in_default:
+                await db.execute(text(f"CREATE TABLE {name} (LIKE holidays INCLUDING DEFAULTS)"))
+                await db.execute(
+                    text(f"INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} WHERE date >= :start AND date < :end"),
+                    bounds,
+                )
+                await db.execute(
+                    text(f"DELETE FROM {DEFAULT_PARTITION} WHERE date >= :start AND date < :end"), bounds
+                )
+                await db.execute(text(f"ALTER TABLE holidays ATTACH PARTITION {name} FOR VALUES {_range_sql(year)}"))
+            else:
+                await db.execute(text(f"CREATE TABLE {name} PARTITION OF holidays FOR VALUES {_range_sql(year)}"))
+            self._years.add(year)
+            created.append(year)
+        return created
+
+    async def lock_maintenance(self, db: AsyncSession):
+        """Wait for other partition changes; the lock is held until the transaction ends."""
+        await db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY})
+
+    async def lock_holidays(self, db: AsyncSession):
+        """Lock the parent table in ACCESS EXCLUSIVE mode until the transaction ends.
+
+        Gives up with a lock timeout after ``settings.partition_lock_timeout_ms``.
+        """
+        await db.execute(text(f"SET LOCAL lock_timeout = {int(settings.partition_lock_timeout_ms)}"))
+        await db.execute(text("LOCK TABLE holidays IN ACCESS EXCLUSIVE MODE"))
+        await db.execute(text("SET LOCAL lock_timeout TO DEFAULT"))
+
+    async def create_staging(self, db: AsyncSession, year: int) -> str:
+        """Create an empty staging copy of the partition of ``year``.
+
+        The copy has the partition's indexes and a CHECK constraint on the
+        year range, so attaching it later needs neither an index build nor
+        a validation scan. Nothing here blocks queries of ``holidays``; the
+        rows to keep are copied by ``swap_staging``, which must run in the
+        same transaction.
+        """
+        name, staging = partition_name(year), staging_name(year)
+        await self.lock_maintenance(db)
+        await db.execute(text(f"DROP TABLE IF EXISTS {staging}"))
+        await db.execute(text(f"CREATE TABLE {staging} (LIKE {name} INCLUDING ALL)"))
+        start, end = year_bounds(year)
+        await db.execute(text(
+            f"ALTER TABLE {staging} ADD CONSTRAINT {staging}_range "
+            f"CHECK (date >= '{start.isoformat()}' AND date < '{end.isoformat()}')"
+        ))
+        return staging
+
+    async def insert_staging(self, db: AsyncSession, year: int, rows: List[dict]) -> int:
+        """Insert holiday rows (without ``id``) into the staging copy of ``year``.
+
+        Returns the number of rows inserted; duplicates are skipped.
+        """
+        if not rows:
+            return 0
+        target = table(staging_name(year), *(column(name) for name in _STAGING_COLUMNS))
+        result = await db.execute(
+            insert(target).on_conflict_do_nothing().returning(target.c.date),
+            [{name: row.get(name) for name in _STAGING_COLUMNS} for row in rows],
+        )
+        return len(result.all())
+
+    async def swap_staging(self, db: AsyncSession, year: int, keep_where: str, params: dict):
+        """Copy the live rows matching ``keep_where`` into the staging copy and swap it in.
+
+        Runs under an ACCESS EXCLUSIVE lock of ``holidays`` held until
+        commit, so no write made before the swap is lost; queries of the
+        table wait for the copy, the catalog changes and the rest of the
+        transaction. Runs in the transaction of ``create_staging`` together
+        with whatever else must change atomically with the swap.
+        """
+        name, staging = partition_name(year), staging_name(year)
+        await self.lock_holidays(db)
+        await db.execute(text(f"INSERT INTO {staging} SELECT * FROM {name} WHERE {keep_where}"), params)
+        await db.execute(text(f"ALTER TABLE holidays DETACH PARTITION {name}"))
+        await db.execute(text(f"ALTER TABLE {name} RENAME TO {name}_old"))
+        await db.execute(text(f"ALTER TABLE {staging} RENAME TO {name}"))
+        await db.execute(text(f"ALTER TABLE holidays ATTACH PARTITION {name} FOR VALUES {_range_sql(year)}"))
+        await db.execute(text(f"ALTER TABLE {name} DROP CONSTRAINT {staging}_range"))
+        await db.execute(text(f"DROP TABLE {name}_old"))
+
+    async def drop_year_partition(self, db: AsyncSession, year: int) -> bool:
+        """Detach and drop the partition of ``year``; False if it has none.
+
+        Locks ``holidays`` in ACCESS EXCLUSIVE mode until commit.
+        """
+        await self.lock_maintenance(db)
+        if year not in await self.years(db):
+            return False
+        name = partition_name(year)
+        await self.lock_holidays(db)
+        await db.execute(text(f"ALTER TABLE holidays DETACH PARTITION {name}"))
+        await db.execute(text(f"DROP TABLE {name}"))
+        self._years.discard(year)
+        return True
+
+
+partition_catalog = PartitionCatalog()
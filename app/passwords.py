@@ -0,0 +1,78 @@
+"""bcrypt hashing off the event loop.
+
+bcrypt is deliberately slow (hundreds of milliseconds per call at the default
+cost), so hashing and verification run on a dedicated thread pool; the bcrypt
+C extension releases the GIL while it works. The number of calls waiting for
+a worker is bounded: past that limit ``PasswordHasherBusy`` is raised at once
+and the API answers 503 instead of queueing logins without end. passlib is
+imported on the first hash or verification, not at worker boot.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from app.config import settings
+
+
+class PasswordHasherBusy(Exception):
+    """All hashing workers are busy and the wait queue is full."""
+
+
+class PasswordHasher:
+    def __init__(self, rounds: int, workers: int, queue_size: int):
+        self.rounds = rounds
+        self._context = None
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self.in_flight = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def context(self):
+        if self._context is None:
+            from passlib.context import CryptContext
+
+            # min/max совпадают с rounds, чтобы хеши с другой стоимостью
+            # считались устаревшими и перехешировались при входе
+            self._context = CryptContext(
+                schemes=["bcrypt"],
+                deprecated="auto",
+                bcrypt__default_rounds=self.rounds,
+                bcrypt__min_rounds=self.rounds,
+                bcrypt__max_rounds=self.rounds,
+            )
+        return self._context
+
+    def _submit(self, func, *args):
+        if self.in_flight >= self.capacity:
+            raise PasswordHasherBusy()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def _run(self, func, *args):
+        future = self._submit(func, *args)
+        self.in_flight += 1
+        try:
+            return await future
+        finally:
+            self.in_flight -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Verify a password; also return a new hash if the stored one is outdated."""
+        return await self._run(self.context.verify_and_update, password, hashed_password)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    rounds=settings.bcrypt_rounds,
+    workers=settings.password_hash_workers,
+    queue_size=settings.password_hash_queue_size,
+)
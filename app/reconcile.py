@@ -0,0 +1,78 @@
+"""Diff of library holidays against the rows stored for a jurisdiction.
+
+A plain import only inserts missing rows, so when a release of the
+``holidays`` library renames or moves a holiday the old row stays next to
+the new one. ``diff_holidays`` compares the rows generated for one
+``(country, year)`` unit with the non-custom rows stored for it and returns
+the smallest set of changes that makes them equal:
+
+1. rows with the same natural key ``(country, state, date, name)`` are the
+   same holiday, updated only if ``federal`` differs;
+2. of the remaining rows, a stored and a library row of the same
+   ``(country, state, date)`` are a rename;
+3. then rows of the same ``(country, state, name)`` are a move to another
+   date;
+4. library rows left over are inserted, stored rows left over (stale rows
+   and duplicates) are deleted.
+
+Renames and moves keep the row id. ``notes`` are never compared: the
+library has none.
+"""
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+from app.calendar_index import HolidayRecord
+
+
+class HolidayDiff(NamedTuple):
+    inserts: List[dict]
+    # (строка в базе, новые значения измененных полей)
+    updates: List[Tuple[HolidayRecord, dict]]
+    deletes: List[HolidayRecord]
+    unchanged: int
+
+
+def _changed_fields(stored: HolidayRecord, row: dict) -> dict:
+    return {
+        field: row[field]
+        for field in ("name", "date", "federal")
+        if getattr(stored, field) != row[field]
+    }
+
+
+def _pair(stored: List[HolidayRecord], rows: List[dict], fields: Tuple[str, ...], updates: list):
+    """Pair leftover rows agreeing on ``fields``; returns what stays unpaired."""
+    by_key: Dict[tuple, List[HolidayRecord]] = defaultdict(list)
+    for record in sorted(stored, key=lambda record: (record.date, record.name or "")):
+        by_key[tuple(getattr(record, field) for field in fields)].append(record)
+    unpaired = []
+    for row in sorted(rows, key=lambda row: (row["date"], row["name"])):
+        candidates = by_key.get(tuple(row[field] for field in fields))
+        if candidates:
+            record = candidates.pop(0)
+            updates.append((record, _changed_fields(record, row)))
+        else:
+            unpaired.append(row)
+    return [record for records in by_key.values() for record in records], unpaired
+
+
+def diff_holidays(stored: Sequence[HolidayRecord], rows: Sequence[dict]) -> HolidayDiff:
+    """Changes turning the ``stored`` non-custom rows of a unit into the library ``rows``."""
+    library = {(row["country"], row["state"], row["date"], row["name"]): row for row in rows}
+    updates: List[Tuple[HolidayRecord, dict]] = []
+    leftover_stored: List[HolidayRecord] = []
+    unchanged = 0
+    for record in stored:
+        row = library.pop((record.country, record.state, record.date, record.name), None)
+        if row is None:
+            # Сюда же попадают дубликаты: вторая строка с тем же ключом уже без пары
+            leftover_stored.append(record)
+        elif record.federal != row["federal"]:
+            updates.append((record, {"federal": row["federal"]}))
+        else:
+            unchanged += 1
+
+    leftover_rows = list(library.values())
+    for fields in (("country", "state", "date"), ("country", "state", "name")):
+        leftover_stored, leftover_rows = _pair(leftover_stored, leftover_rows, fields, updates)
+    return HolidayDiff(inserts=leftover_rows, updates=updates, deletes=leftover_stored, unchanged=unchanged)
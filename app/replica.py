@@ -0,0 +1,200 @@
+"""Routing of read-only requests to an optional read replica.
+
+With ``REPLICA_DATABASE_URL`` set, routes that depend on ``get_replica_db``
+read from the replica unless one of these sends them to the primary:
+
+* the replica is unreachable (``replica_down``);
+* it lags behind the primary by more than ``REPLICA_MAX_LAG_SECONDS``
+  (``lag``);
+* the request carries ``X-Min-Data-Version`` newer than the replica's data
+  version (``read_your_writes``).
+
+Lag is measured on the holidays data version (``app.data_version``), which
+every write bumps: ``ReplicaMonitor`` reads it from both databases every
+``REPLICA_CHECK_INTERVAL`` seconds, and the lag is the time since the
+replica was first seen behind the primary. This works the same for a
+streaming-replication standby and for a local stand-in such as a second
+database that is synced by hand.
+
+Responses to successful writes carry ``X-Data-Version``; a client that sends
+it back as ``X-Min-Data-Version`` always sees its own writes.
+"""
+import asyncio
+import time
+from typing import Optional
+
+from fastapi import Request
+from sqlalchemy import select
+
+from app.config import settings
+from app.data_version import DataVersion, data_version
+from app.database import readonly_session, replica_session
+from app.metrics import registry, sample_lines
+from app.models import HolidaysDataVersion
+
+
+MIN_VERSION_HEADER = "x-min-data-version"
+VERSION_HEADER = b"x-data-version"
+
+read_routing = registry.counter(
+    "db_read_routing_total", "Read-only sessions by target database and reason", ["target", "reason"]
+)
+replica_checks = registry.counter("db_replica_checks_total", "Replica lag checks by outcome", ["outcome"])
+
+
+async def _read_version(session_factory) -> Optional[tuple]:
+    async with session_factory() as db:
+        row = (await db.execute(
+            select(HolidaysDataVersion.version, HolidaysDataVersion.updated_at).where(HolidaysDataVersion.id == 1)
+        )).one_or_none()
+    return tuple(row) if row else None
+
+
+class ReplicaMonitor:
+    def __init__(self, check_interval: float, max_lag: float):
+        self.check_interval = check_interval
+        self.max_lag = max_lag
+        # Версия данных реплики; сессии реплики используют ее для ETag и кешей
+        self.data_version = DataVersion(check_interval=check_interval)
+        self.healthy = False
+        self.primary_version: Optional[int] = None
+        self.replica_version: Optional[int] = None
+        self._behind_since: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return replica_session is not None
+
+    @property
+    def lag_seconds(self) -> Optional[float]:
+        if not self.healthy:
+            return None
+        if self._behind_since is None:
+            return 0.0
+        return time.monotonic() - self._behind_since
+
+    async def check(self):
+        """Compare the data versions of the primary and the replica once."""
+        try:
+            primary = await _read_version(readonly_session)
+            replica = await _read_version(replica_session)
+        except Exception as e:
+            if self.healthy:
+                print(f"Реплика недоступна: {e}")
+            self.healthy = False
+            replica_checks.inc(outcome="error")
+            return
+        self.healthy = True
+        replica_checks.inc(outcome="ok")
+        if primary:
+            data_version.set(*primary)
+        if replica:
+            self.data_version.set(*replica)
+        self.primary_version = primary[0] if primary else 0
+        self.replica_version = replica[0] if replica else 0
+        if self.replica_version >= self.primary_version:
+            self._behind_since = None
+        elif self._behind_since is None:
+            self._behind_since = time.monotonic()
+
+    async def _run(self):
+        while True:
+            await self.check()
+            await asyncio.sleep(self.check_interval)
+
+    async def start(self):
+        if self.enabled and self._task is None:
+            await self.check()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def route(self, min_version: Optional[int]) -> str:
+        """Reason to read from the primary, or ``"replica"``."""
+        if not self.enabled:
+            return "no_replica"
+        if not self.healthy:
+            return "replica_down"
+        if self.lag_seconds > self.max_lag:
+            return "lag"
+        if min_version is not None and (self.replica_version or 0) < min_version:
+            return "read_your_writes"
+        return "replica"
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "healthy": self.healthy,
+            "lag_seconds": None if self.lag_seconds is None else round(self.lag_seconds, 3),
+            "max_lag_seconds": self.max_lag,
+            "primary_version": self.primary_version,
+            "replica_version": self.replica_version,
+        }
+
+    def metric_lines(self):
+        if not self.enabled:
+            return []
+        return [
+            *sample_lines("db_replica_up", "Whether the last replica check succeeded", int(self.healthy)),
+            *sample_lines("db_replica_lag_seconds", "Time the replica has been behind the primary", self.lag_seconds),
+        ]
+
+
+replica_monitor = ReplicaMonitor(
+    check_interval=settings.replica_check_interval, max_lag=settings.replica_max_lag_seconds
+)
+registry.add_collector(replica_monitor.metric_lines)
+
+
+def _min_version(request: Request) -> Optional[int]:
+    value = request.headers.get(MIN_VERSION_HEADER)
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+# Зависимость для маршрутов чтения, которым допустима реплика
+async def get_replica_db(request: Request):
+    reason = replica_monitor.route(_min_version(request))
+    if reason == "replica":
+        read_routing.inc(target="replica", reason="replica")
+        async with replica_session() as session:
+            session.info["data_version"] = replica_monitor.data_version
+            yield session
+        return
+    read_routing.inc(target="primary", reason=reason)
+    async with readonly_session() as session:
+        yield session
+
+
+class DataVersionMiddleware:
+    """Add ``X-Data-Version`` to successful write responses.
+
+    The value is this worker's holidays data version after the write, which
+    is at least the version the write produced; sent back as
+    ``X-Min-Data-Version`` it routes later reads to an up-to-date database.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in ("GET", "HEAD", "OPTIONS"):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400 and data_version.version:
+                message["headers"] = [*message.get("headers", []), (VERSION_HEADER, str(data_version.version).encode())]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
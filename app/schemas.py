@@ -1,6 +1,8 @@
-from datetime import date
-from typing import Optional, List
-from pydantic import BaseModel, Field
+from datetime import date, datetime
+from typing import Any, Dict, Literal, Optional, List
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+from app.filters import HolidayFilter
 
 # User Schemas
 class UserBase(BaseModel):
@@ -9,10 +11,11 @@ class UserBase(BaseModel):
 class UserCreate(UserBase):
     password: str
 
-class User(UserBase):
+class UserInDB(UserBase):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     is_active: bool
-    from_attributes = True
 
 # Token Schemas
 class Token(BaseModel):
@@ -43,7 +46,185 @@ class HolidayUpdate(HolidayBase):
     notes: Optional[str] = None
     is_custom: Optional[bool] = False
 
-class Holiday(HolidayBase):
+class HolidayInDB(HolidayBase):
+    model_config = ConfigDict(from_attributes=True)
+
+    # Регионы из библиотеки holidays бывают длиннее двух букв (ENG, NSW, 971)
+    state: Optional[str] = None
     id: int
     owner_id: Optional[int] = None
-    from_attributes = True
\ No newline at end of file
+
+class HolidaySearchResult(HolidayInDB):
+    score: float
+
+# Batch Query Schemas
+MAX_BATCH_QUERIES = 100
+
+class HolidayQuerySpec(HolidayFilter):
+    """One sub-query of ``POST /holidays/query``: the ``GET /holidays`` parameters."""
+    year: Optional[int] = Field(None, ge=1, le=9999)
+    month: Optional[int] = Field(None, ge=1, le=12)
+    skip: int = Field(0, ge=0)
+    limit: int = Field(100, ge=1, le=200)
+
+class HolidayBatchQuery(BaseModel):
+    queries: List[HolidayQuerySpec] = Field(min_length=1, max_length=MAX_BATCH_QUERIES)
+
+class HolidayQueryResult(BaseModel):
+    index: int
+    holidays: List[HolidayInDB]
+    next_cursor: Optional[str] = None
+
+class HolidayBatchQueryResult(BaseModel):
+    results: List[HolidayQueryResult]
+
+# Aggregation Schemas
+class HolidayGroupCount(BaseModel):
+    """Holiday count of one group; only the requested group fields are set."""
+    country: Optional[str] = None
+    state: Optional[str] = None
+    year: Optional[int] = None
+    month: Optional[int] = None
+    federal: Optional[bool] = None
+    is_custom: Optional[bool] = None
+    count: int
+
+# Bulk Schemas
+MAX_BULK_ITEMS = 1000
+# В теле класса поле date = None затеняет тип date: аннотацию берем снаружи
+OptionalDate = Optional[date]
+
+class HolidayBulkCreate(BaseModel):
+    """One item of ``POST /holidays/bulk``: a ``HolidayCreate`` checked per item.
+
+    Missing required fields are accepted here and checked in
+    ``bulk_create_holidays``, so best_effort mode can report them as failed.
+    """
+    name: Optional[str] = None
+    date: OptionalDate = None
+    country: Optional[str] = Field(None, min_length=2, max_length=2)
+    state: Optional[str] = Field(None, min_length=2, max_length=2)
+    federal: Optional[bool] = False
+    notes: Optional[str] = None
+
+class HolidayBulkUpdate(BaseModel):
+    """One item of ``PATCH /holidays/bulk``: the holiday id and the fields to change.
+
+    Explicit nulls are accepted here and checked per item in
+    ``bulk_update_holidays``, so best_effort mode can report them as failed.
+    """
+    model_config = ConfigDict(extra="forbid")
+
+    id: int
+    name: Optional[str] = None
+    date: OptionalDate = None
+    country: Optional[str] = Field(None, min_length=2, max_length=2)
+    state: Optional[str] = Field(None, min_length=2, max_length=2)
+    federal: Optional[bool] = None
+    notes: Optional[str] = None
+
+class HolidayBulkDelete(BaseModel):
+    ids: List[int] = Field(min_length=1, max_length=MAX_BULK_ITEMS)
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    status: Literal["created", "updated", "deleted", "failed", "skipped"]
+    error: Optional[str] = None
+    holiday: Optional[HolidayInDB] = None
+
+class BulkResult(BaseModel):
+    committed: bool
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
+
+class HolidayImportResult(BaseModel):
+    country: str
+    years: List[int]
+    candidates: int
+    imported: int
+    elapsed_seconds: float
+    rows_per_second: float
+
+class HolidayChange(BaseModel):
+    action: Literal["inserted", "updated", "deleted"]
+    id: Optional[int] = None
+    country: str
+    state: Optional[str] = None
+    date: date
+    name: str
+    # Прежние значения измененных полей (только для updated)
+    previous: Optional[Dict[str, Any]] = None
+
+class HolidayReconcileResult(BaseModel):
+    country: str
+    years: List[int]
+    dry_run: bool
+    inserted: int
+    updated: int
+    deleted: int
+    unchanged: int
+    elapsed_seconds: float
+    changes: List[HolidayChange]
+
+class ImportJobInDB(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    country: str
+    state: Optional[str] = None
+    year_from: int
+    year_to: int
+    status: Literal["queued", "running", "succeeded", "failed"]
+    progress: float
+    candidates: Optional[int] = None
+    imported: Optional[int] = None
+    rows_per_second: Optional[float] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    duration_seconds: Optional[float] = None
+
+class ImportJobSubmitted(BaseModel):
+    job: ImportJobInDB
+    deduplicated: bool
+
+# Business Day Schemas
+MAX_BUSINESS_DAY_BATCH = 10_000
+# Около 20 лет рабочих дней: больше битсетов за один сдвиг не готовим
+MAX_BUSINESS_DAY_OFFSET = 5_000
+# Интервал в сотню лет - сотня битсетов на один ответ
+MAX_BUSINESS_DAY_SPAN_YEARS = 100
+# Коды регионов библиотеки holidays короче; точная проверка - is_supported_jurisdiction
+MAX_STATE_LENGTH = 32
+
+class BusinessDayOffset(BaseModel):
+    date: date
+    n: int = Field(ge=-MAX_BUSINESS_DAY_OFFSET, le=MAX_BUSINESS_DAY_OFFSET)
+
+class BusinessDayRange(BaseModel):
+    start: date
+    end: date
+
+    @model_validator(mode="after")
+    def check_span(self):
+        if abs(self.end.year - self.start.year) > MAX_BUSINESS_DAY_SPAN_YEARS:
+            raise ValueError(f"start and end must be at most {MAX_BUSINESS_DAY_SPAN_YEARS} years apart")
+        return self
+
+class BusinessDayBatchRequest(BaseModel):
+    country: str = Field("US", min_length=2, max_length=2)
+    state: Optional[str] = Field(None, min_length=1, max_length=MAX_STATE_LENGTH)
+    include_custom: bool = False
+    is_business_day: List[date] = Field(default_factory=list, max_length=MAX_BUSINESS_DAY_BATCH)
+    add_business_days: List[BusinessDayOffset] = Field(default_factory=list, max_length=MAX_BUSINESS_DAY_BATCH)
+    business_days_between: List[BusinessDayRange] = Field(default_factory=list, max_length=MAX_BUSINESS_DAY_BATCH)
+    next_business_day: List[date] = Field(default_factory=list, max_length=MAX_BUSINESS_DAY_BATCH)
+
+class BusinessDayBatchResult(BaseModel):
+    is_business_day: List[bool] = []
+    add_business_days: List[date] = []
+    business_days_between: List[int] = []
+    next_business_day: List[date] = []
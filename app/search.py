@@ -0,0 +1,108 @@
+"""Fuzzy holiday name search and autocomplete.
+
+On PostgreSQL both run on the ``pg_trgm`` GIN index ``ix_holidays_name_trgm``:
+search matches ``name % q`` (trigram similarity above
+``pg_trgm.similarity_threshold``) or a plain substring and ranks by
+``similarity(name, q)``; autocomplete is an ``ILIKE 'prefix%'`` over distinct
+names. Other backends (SQLite in tests) get the same results from a Python
+implementation of the ``pg_trgm`` similarity over the candidate rows.
+
+Autocomplete answers are cached per data version, so any write to the
+holidays table makes them stale at once.
+"""
+import re
+from typing import List, Optional, Set, Tuple
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache import TTLCache
+from app.config import settings
+from app.data_version import data_version_for
+from app.models import Holiday
+
+
+# Порог pg_trgm.similarity_threshold по умолчанию; его же использует запасной путь
+SIMILARITY_THRESHOLD = 0.3
+
+autocomplete_cache = TTLCache(
+    max_size=settings.autocomplete_cache_max_size, ttl=settings.autocomplete_cache_ttl_seconds
+)
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def trigrams(value: str) -> Set[str]:
+    """Trigram set of ``value`` as built by ``pg_trgm``."""
+    result = set()
+    for word in _WORD.findall(value.lower()):
+        padded = f"  {word} "
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+def trigram_similarity(a: str, b: str) -> float:
+    """``pg_trgm`` ``similarity(a, b)``: shared trigrams over all trigrams."""
+    left, right = trigrams(a), trigrams(b)
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _is_postgresql(db: AsyncSession) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+async def search_holidays(
+    db: AsyncSession, q: str, country: Optional[str] = None, limit: int = 20
+) -> List[Tuple[Holiday, float]]:
+    """Holidays whose name is similar to ``q``, best matches first, with their score."""
+    substring = Holiday.name.ilike(f"%{_escape_like(q)}%", escape="\\")
+    if _is_postgresql(db):
+        score = func.similarity(Holiday.name, q)
+        query = select(Holiday, score).filter(or_(Holiday.name.op("%")(q), substring))
+        if country:
+            query = query.filter(Holiday.country == country)
+        query = query.order_by(score.desc(), Holiday.date, Holiday.id).limit(limit)
+        return [(holiday, float(value)) for holiday, value in (await db.execute(query)).all()]
+
+    query = select(Holiday)
+    if country:
+        query = query.filter(Holiday.country == country)
+    needle = q.lower()
+    scored = []
+    for holiday in (await db.execute(query)).scalars():
+        name = holiday.name or ""
+        value = trigram_similarity(name, q)
+        if value >= SIMILARITY_THRESHOLD or needle in name.lower():
+            scored.append((holiday, value))
+    scored.sort(key=lambda item: (-item[1], item[0].date, item[0].id))
+    return scored[:limit]
+
+
+async def autocomplete_names(
+    db: AsyncSession, prefix: str, country: Optional[str] = None, limit: int = 10
+) -> List[str]:
+    """Distinct holiday names starting with ``prefix`` (case-insensitive)."""
+    version, _ = await data_version_for(db).current(db)
+    key = (version, prefix.lower(), country, limit)
+    names = autocomplete_cache.get(key)
+    if names is not None:
+        return names
+
+    query = (
+        select(Holiday.name)
+        .filter(Holiday.name.ilike(f"{_escape_like(prefix)}%", escape="\\"))
+        .distinct()
+        .order_by(Holiday.name)
+        .limit(limit)
+    )
+    if country:
+        query = query.filter(Holiday.country == country)
+    names = list((await db.execute(query)).scalars())
+    autocomplete_cache.set(key, names)
+    return names
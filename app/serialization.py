@@ -0,0 +1,64 @@
+"""Fast JSON encoding of holiday lists.
+
+``GET /holidays`` normally returns ORM objects that FastAPI validates one by
+one through ``HolidayInDB`` and then encodes. For large pages that per-row
+work dominates the request. ``holidays_response`` takes plain
+``HolidayRecord`` tuples (Core rows or calendar index entries) and encodes
+them straight to bytes: with ``orjson`` when it is installed, otherwise with
+the standard ``json`` module using the same settings as Starlette's
+``JSONResponse``. Either way the body is byte-for-byte what the
+``response_model`` path would have produced.
+"""
+import json
+from operator import itemgetter
+from typing import Iterable, Optional
+
+from fastapi import Response
+
+from app.calendar_index import HolidayRecord
+from app.schemas import HolidayInDB
+
+try:
+    import orjson
+except ImportError:  # необязательная зависимость
+    orjson = None
+
+
+# Поля ответа в порядке HolidayInDB (is_custom в ответ не входит)
+HOLIDAY_JSON_FIELDS = tuple(HolidayInDB.model_fields)
+
+_values = itemgetter(*(HolidayRecord._fields.index(field) for field in HOLIDAY_JSON_FIELDS))
+_DATE_POSITION = HOLIDAY_JSON_FIELDS.index("date")
+
+
+def _rows(records: Iterable[HolidayRecord], isoformat: bool) -> list:
+    rows = []
+    for record in records:
+        values = _values(record)
+        if isoformat:
+            values = list(values)
+            values[_DATE_POSITION] = values[_DATE_POSITION].isoformat()
+        rows.append(dict(zip(HOLIDAY_JSON_FIELDS, values)))
+    return rows
+
+
+def dump_holidays(records: Iterable[HolidayRecord]) -> bytes:
+    """JSON array of holidays in the ``HolidayInDB`` format."""
+    if orjson is not None:
+        return orjson.dumps(_rows(records, isoformat=False))
+    return json.dumps(
+        _rows(records, isoformat=True), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def encoded_response(content: bytes, headers: Optional[Response] = None) -> Response:
+    """Already encoded JSON body carrying the headers set on the endpoint's ``Response``."""
+    response = Response(content=content, media_type="application/json")
+    if headers is not None:
+        response.headers.raw.extend(headers.headers.raw)
+    return response
+
+
+def holidays_response(records: Iterable[HolidayRecord], headers: Optional[Response] = None) -> Response:
+    """Encoded holiday list carrying the headers set on the endpoint's ``Response``."""
+    return encoded_response(dump_holidays(records), headers)
@@ -0,0 +1,230 @@
+"""Prebuilt snapshot of library holidays.
+
+Generating holidays with the ``holidays`` library means importing the whole
+package and expanding its rules, which slows down every worker boot. The
+snapshot stores the rows of ``build_holiday_rows`` for a fixed set of
+countries and years in one binary file that is mapped with ``mmap``; rows
+of a ``(country, year)`` are decoded only when an import asks for them.
+
+Layout (little-endian)::
+
+    magic "HSNP" | format u16 | header length u32 | JSON header
+    records: ordinal u32, name u32, state u16 (0 = national), federal u8, pad
+    strings: count u32 | offsets u32 * (count + 1) | UTF-8 blob
+
+The JSON header holds the ``holidays`` library version the snapshot was
+built with, the record count and a ``{country: {year: [start, count]}}``
+directory; the sections follow it back to back. A snapshot built with
+another library version is ignored, and so is a malformed one (truncated,
+sizes that do not add up): the import then generates the rows itself.
+
+Build it with::
+
+    python -m app.snapshot --countries US,CA,DE --start-year 2020 --end-year 2035 --output holidays.snapshot
+"""
+import argparse
+import json
+import mmap
+import struct
+from datetime import date
+from importlib.metadata import PackageNotFoundError, version
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+MAGIC = b"HSNP"
+FORMAT_VERSION = 1
+
+_PREAMBLE = struct.Struct("<4sHI")
+_RECORD = struct.Struct("<IIHBx")
+_U32 = struct.Struct("<I")
+
+# Индекс региона в записи - u16, остальные поля и смещения - u32
+MAX_STATE_INDEX = 0xFFFF
+MAX_U32 = 0xFFFFFFFF
+
+# Ошибки разбора испорченного файла снимка
+FORMAT_ERRORS = (struct.error, ValueError, KeyError, TypeError, AttributeError)
+
+
+def library_version() -> Optional[str]:
+    """Version of the installed ``holidays`` package, without importing it."""
+    try:
+        return version("holidays")
+    except PackageNotFoundError:
+        return None
+
+
+def build_snapshot(path: str, countries: Sequence[str], years: Sequence[int]) -> int:
+    """Write a snapshot of ``countries`` x ``years``; returns the number of rows."""
+    from app.holiday_generation import build_holiday_rows
+
+    strings: Dict[str, int] = {"": 0}
+    records = bytearray()
+    directory: Dict[str, Dict[str, List[int]]] = {}
+    position = 0
+
+    def intern(value: str) -> int:
+        return strings.setdefault(value, len(strings))
+
+    for country in countries:
+        for year in years:
+            rows = build_holiday_rows([year], country)
+            for row in rows:
+                state = intern(row["state"]) if row["state"] else 0
+                if state > MAX_STATE_INDEX:
+                    raise ValueError(
+                        f"Too many distinct names and regions for the snapshot format: region {row['state']!r} "
+                        f"of {country} {year} gets string #{state}, the limit is {MAX_STATE_INDEX}"
+                    )
+                records += _RECORD.pack(row["date"].toordinal(), intern(row["name"]), state, row["federal"])
+            directory.setdefault(country, {})[str(year)] = [position, len(rows)]
+            position += len(rows)
+
+    encoded = [value.encode() for value in strings]
+    offsets = [0]
+    for value in encoded:
+        offsets.append(offsets[-1] + len(value))
+    if offsets[-1] > MAX_U32:
+        raise ValueError(f"Snapshot strings take {offsets[-1]} bytes, the limit is {MAX_U32}")
+    string_section = _U32.pack(len(encoded)) + struct.pack(f"<{len(offsets)}I", *offsets) + b"".join(encoded)
+
+    header = json.dumps(
+        {"library_version": library_version(), "records": position, "directory": directory},
+        separators=(",", ":"),
+    ).encode()
+
+    with open(path, "wb") as file:
+        file.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+        file.write(header)
+        file.write(records)
+        file.write(string_section)
+    return position
+
+
+class HolidaySnapshot:
+    def __init__(self):
+        self.path: Optional[str] = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._directory: Dict[str, Dict[int, Tuple[int, int]]] = {}
+        self._records_offset = 0
+        self._offsets_offset = 0
+        self._blob_offset = 0
+        self._string_count = 0
+        self._strings: Dict[int, str] = {}
+
+    @property
+    def loaded(self) -> bool:
+        return self._mmap is not None
+
+    def load(self, path: str) -> bool:
+        """Map ``path``; returns False (and stays unloaded) if it is missing, stale or malformed."""
+        self.close()
+        try:
+            with open(path, "rb") as file:
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            return False
+
+        try:
+            loaded = self._load(mapped)
+        except FORMAT_ERRORS as e:
+            print(f"Снимок праздников {path} поврежден, праздники будут сгенерированы: {e}")
+            loaded = False
+        if not loaded:
+            self.close()
+            mapped.close()
+            return False
+        self.path = path
+        self._mmap = mapped
+        return True
+
+    def _load(self, mapped: mmap.mmap) -> bool:
+        magic, format_version, header_length = _PREAMBLE.unpack_from(mapped, 0)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            return False
+        header = json.loads(mapped[_PREAMBLE.size:_PREAMBLE.size + header_length])
+        if header["library_version"] != library_version():
+            return False
+
+        records = header["records"]
+        self._records_offset = _PREAMBLE.size + header_length
+        strings_offset = self._records_offset + records * _RECORD.size
+        self._string_count = _U32.unpack_from(mapped, strings_offset)[0]
+        self._offsets_offset = strings_offset + _U32.size
+        self._blob_offset = self._offsets_offset + _U32.size * (self._string_count + 1)
+        blob_length = _U32.unpack_from(mapped, self._blob_offset - _U32.size)[0]
+        if self._blob_offset + blob_length != len(mapped):
+            raise ValueError(f"expected {self._blob_offset + blob_length} bytes, the file has {len(mapped)}")
+        self._directory = {
+            country: {int(year): (start, count) for year, (start, count) in years.items()}
+            for country, years in header["directory"].items()
+        }
+        for country, years in self._directory.items():
+            for year, (start, count) in years.items():
+                if start < 0 or count < 0 or start + count > records:
+                    raise ValueError(f"rows of {country} {year} lie outside the {records} records")
+        return True
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+        self.path = None
+        self._mmap = None
+        self._directory = {}
+        self._string_count = 0
+        self._strings = {}
+
+    def __len__(self):
+        return sum(count for years in self._directory.values() for _, count in years.values())
+
+    def _string(self, index: int) -> str:
+        value = self._strings.get(index)
+        if value is None:
+            if index >= self._string_count:
+                raise ValueError(f"string #{index} is out of range, the snapshot has {self._string_count}")
+            start, end = struct.unpack_from("<II", self._mmap, self._offsets_offset + _U32.size * index)
+            value = self._mmap[self._blob_offset + start:self._blob_offset + end].decode()
+            self._strings[index] = value
+        return value
+
+    def rows(self, country: str, year: int, subdivisions: Optional[Sequence[str]] = None) -> Optional[List[dict]]:
+        """Rows of ``build_holiday_rows([year], country, subdivisions)``, or None if not covered."""
+        span = self._directory.get(country, {}).get(year) if self._mmap is not None else None
+        if span is None:
+            return None
+        start, count = span
+        allowed = set(subdivisions) if subdivisions else None
+        rows = []
+        first = self._records_offset + start * _RECORD.size
+        try:
+            for ordinal, name, state, federal in _RECORD.iter_unpack(self._mmap[first:first + count * _RECORD.size]):
+                state_code = self._string(state) if state else None
+                if allowed is not None and state_code is not None and state_code not in allowed:
+                    continue
+                rows.append(dict(
+                    name=self._string(name), date=date.fromordinal(ordinal), country=country,
+                    state=state_code, federal=bool(federal), is_custom=False,
+                ))
+        except FORMAT_ERRORS as e:
+            # Строки года испорчены: этот год сгенерирует библиотека
+            print(f"Снимок праздников {self.path}: не удалось прочитать {country} {year}: {e}")
+            return None
+        return rows
+
+
+holiday_snapshot = HolidaySnapshot()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a prebuilt holiday snapshot")
+    parser.add_argument("--countries", default="US")
+    parser.add_argument("--start-year", type=int, required=True)
+    parser.add_argument("--end-year", type=int, required=True)
+    parser.add_argument("--output", default="holidays.snapshot")
+    args = parser.parse_args()
+    rows = build_snapshot(args.output, args.countries.split(","), range(args.start_year, args.end_year + 1))
+    print(f"{args.output}: {rows} rows")
+
+
+if __name__ == "__main__":
+    main()
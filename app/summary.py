@@ -0,0 +1,154 @@
+"""Holiday counts per group for the aggregation endpoints.
+
+The ``holiday_summary`` table keeps one row per combination of country,
+state, year, month, federal and custom flags with the number of holidays in
+it. Every write to ``holidays`` applies the matching count delta in the same
+transaction (``apply_summary_delta``), so ``aggregate_holidays`` answers any
+GROUP BY over these columns from the summary alone and never scans the base
+table. ``rebuild_summary`` recomputes the table from scratch for backfills,
+or a single year after a year is reimported.
+"""
+from collections import Counter
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Integer, cast, delete, exists, extract, false, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Holiday, HolidaySummary
+
+
+GROUP_FIELDS = ("country", "state", "year", "month", "federal", "is_custom")
+
+# Размер пачки для UPSERT дельт
+SUMMARY_BATCH_SIZE = 1000
+
+SummaryKey = Tuple[str, str, int, int, bool, bool]
+
+
+def summary_key(holiday) -> SummaryKey:
+    """Group of a ``Holiday`` or ``HolidayRecord`` in the summary table."""
+    return (
+        holiday.country or "",
+        holiday.state or "",
+        holiday.date.year,
+        holiday.date.month,
+        bool(holiday.federal),
+        bool(holiday.is_custom),
+    )
+
+
+def count_delta(added: Iterable = (), removed: Iterable = ()) -> Counter:
+    """Summary delta for added and removed holidays."""
+    delta = Counter()
+    for holiday in added:
+        delta[summary_key(holiday)] += 1
+    for holiday in removed:
+        delta[summary_key(holiday)] -= 1
+    return delta
+
+
+async def apply_summary_delta(db: AsyncSession, delta: Dict[SummaryKey, int]):
+    """Add ``delta`` to the summary counts inside the current transaction."""
+    rows = [
+        dict(zip(GROUP_FIELDS, key), holidays=change)
+        for key, change in delta.items() if change
+    ]
+    if not rows:
+        return
+    # crud импортирует этот модуль: берем его помощник при вызове
+    from app.crud import _insert
+
+    upsert = _insert(db)
+    for offset in range(0, len(rows), SUMMARY_BATCH_SIZE):
+        stmt = upsert(HolidaySummary).values(rows[offset:offset + SUMMARY_BATCH_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(GROUP_FIELDS),
+            set_={"holidays": HolidaySummary.holidays + stmt.excluded.holidays},
+        )
+        await db.execute(stmt)
+    if any(row["holidays"] < 0 for row in rows):
+        # Опустевшие группы удаляем, чтобы они не попадали в ответы
+        await db.execute(delete(HolidaySummary).where(HolidaySummary.holidays <= 0))
+
+
+async def rebuild_summary(db: AsyncSession, year: Optional[int] = None):
+    """Recompute the summary from ``holidays`` inside the current transaction.
+
+    With ``year`` only that year's rows are recomputed, from a date range
+    the planner can prune to one partition.
+    """
+    year_key = cast(extract("year", Holiday.date), Integer)
+    month = cast(extract("month", Holiday.date), Integer)
+    keys = [
+        func.coalesce(Holiday.country, ""),
+        func.coalesce(Holiday.state, ""),
+        year_key,
+        month,
+        func.coalesce(Holiday.federal, false()),
+        func.coalesce(Holiday.is_custom, false()),
+    ]
+    groups = select(*keys, func.count()).group_by(*keys)
+    stale = delete(HolidaySummary)
+    if year is not None:
+        groups = groups.filter(Holiday.date >= date(year, 1, 1), Holiday.date < date(year + 1, 1, 1))
+        stale = stale.filter(HolidaySummary.year == year)
+    await db.execute(stale)
+    await db.execute(insert(HolidaySummary).from_select([*GROUP_FIELDS, "holidays"], groups))
+
+
+async def summary_is_stale(db: AsyncSession) -> bool:
+    """True when holidays exist but the summary is empty (a database created before it)."""
+    has_summary = (await db.execute(select(exists().select_from(HolidaySummary)))).scalar()
+    if has_summary:
+        return False
+    return bool((await db.execute(select(exists().select_from(Holiday)))).scalar())
+
+
+async def aggregate_holidays(
+    db: AsyncSession,
+    group_by: Sequence[str],
+    country: Optional[str] = None,
+    state: Optional[str] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    month: Optional[int] = None,
+    federal: Optional[bool] = None,
+    is_custom: Optional[bool] = None,
+) -> List[dict]:
+    """Holiday counts grouped by ``group_by`` (a subset of ``GROUP_FIELDS``).
+
+    Each item holds the group values and ``count``; national holidays have
+    ``state`` None. Without ``group_by`` the result is a single total.
+    """
+    unknown = set(group_by) - set(GROUP_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown group_by fields: {', '.join(sorted(unknown))}")
+
+    columns = [getattr(HolidaySummary, field) for field in group_by]
+    query = select(*columns, func.coalesce(func.sum(HolidaySummary.holidays), 0))
+    if country:
+        query = query.where(HolidaySummary.country == country)
+    if state:
+        query = query.where(HolidaySummary.state == state)
+    if year_from is not None:
+        query = query.where(HolidaySummary.year >= year_from)
+    if year_to is not None:
+        query = query.where(HolidaySummary.year <= year_to)
+    if month is not None:
+        query = query.where(HolidaySummary.month == month)
+    if federal is not None:
+        query = query.where(HolidaySummary.federal == federal)
+    if is_custom is not None:
+        query = query.where(HolidaySummary.is_custom == is_custom)
+    if columns:
+        query = query.group_by(*columns).order_by(*columns)
+
+    result = []
+    for row in await db.execute(query):
+        item = dict(zip(group_by, row))
+        if "state" in item:
+            item["state"] = item["state"] or None
+        item["count"] = int(row[-1])
+        result.append(item)
+    return result
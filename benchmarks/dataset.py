@@ -0,0 +1,52 @@
+"""Benchmark dataset helpers shared by the scripts in this package.
+
+Import these only after ``DATABASE_URL`` is set: the ``app`` modules read
+their settings at import time.
+"""
+import random
+from datetime import date, timedelta
+
+
+async def create_schema():
+    from app.database import engine, Base
+    import app.models  # noqa: F401  регистрирует таблицы в Base.metadata
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def bench_user_id(db, email: str = "bench@example.com") -> int:
+    """Id of the benchmark user, creating it without a password if missing."""
+    from sqlalchemy import insert, select
+    from app.models import User
+
+    owner_id = (await db.execute(select(User.id).where(User.email == email))).scalar()
+    if owner_id is None:
+        owner_id = (await db.execute(
+            insert(User).values(email=email, hashed_password="", is_active=True).returning(User.id)
+        )).scalar_one()
+    return owner_id
+
+
+async def seed_custom_holidays(db, owner_id: int, count: int, start_year: int, end_year: int, seed: int = 42):
+    """Insert ``count`` reproducible custom holidays spread over the year range."""
+    from sqlalchemy import insert
+    from app.models import Holiday
+
+    rng = random.Random(seed)
+    days = (date(end_year, 12, 31) - date(start_year, 1, 1)).days
+    rows = [
+        dict(
+            name=f"Company day {i}",
+            date=date(start_year, 1, 1) + timedelta(days=rng.randrange(days)),
+            country="US",
+            state=rng.choice([None, "NY", "CA", "TX"]),
+            federal=False,
+            is_custom=True,
+            owner_id=owner_id,
+        )
+        for i in range(count)
+    ]
+    for offset in range(0, len(rows), 1000):
+        await db.execute(insert(Holiday).values(rows[offset:offset + 1000]))
+    await db.commit()
@@ -0,0 +1,360 @@
+"""Benchmark and load test of the API hot paths.
+
+Seeds a database with library holidays for several countries over a range of
+years (all states of each country) plus synthetic custom holidays, then
+measures:
+
+* ``import_holidays_from_lib`` throughput per country;
+* ``GET /holidays`` latency for common filter combinations, offset page
+  depths and cursor page walks;
+* ``POST /token`` login throughput;
+* mixed concurrent read/write load.
+
+Requests go through an in-process ASGI client, so the numbers include the
+whole FastAPI stack but no network. Results are written as JSON; with
+``--baseline`` they are compared metric by metric and the script exits with
+status 1 when any metric regresses by more than ``--threshold``::
+
+    python -m benchmarks.hot_paths --output bench.json
+    python -m benchmarks.hot_paths --baseline bench.json --threshold 0.25
+
+Without ``--database-url`` (or ``BENCH_DATABASE_URL``) a SQLite file is used
+as a stand-in for PostgreSQL. The script clears the holidays table: use a
+dedicated database.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timezone
+
+
+LIST_CASES = {
+    "year": dict(year=2020),
+    "year_month": dict(year=2020, month=7),
+    "country_state_year": dict(country="US", state="NY", year=2021),
+    "country_federal_year": dict(country="US", federal="true", year=2022),
+    "states_date_range": dict(country="US", states="NY,TX,FL", start_date="2015-01-01", end_date="2016-12-31"),
+    "custom_only": dict(is_custom="true"),
+    "name_search": dict(name="day"),
+    "month_only": dict(month=12),
+}
+
+PAGE_DEPTHS = (0, 10, 50)
+
+BENCH_EMAIL = "bench-login@example.com"
+BENCH_PASSWORD = "bench-password"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=os.environ.get("BENCH_DATABASE_URL", "sqlite+aiosqlite:///./bench.db"))
+    parser.add_argument("--countries", default="US,CA,DE")
+    parser.add_argument("--start-year", type=int, default=2010)
+    parser.add_argument("--end-year", type=int, default=2030)
+    parser.add_argument("--custom-rows", type=int, default=5000)
+    parser.add_argument("--iterations", type=int, default=50, help="requests per latency case")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of mixed load")
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-seed", action="store_true", help="reuse the data already in the database")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against this results file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative regression (0.2 = 20%%)")
+    return parser.parse_args()
+
+
+def latency_summary(samples) -> dict:
+    """Percentiles of durations given in seconds, in milliseconds."""
+    ordered = sorted(samples)
+    if not ordered:
+        return {}
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))] * 1000
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(percentile(0.50), 3),
+        "p95_ms": round(percentile(0.95), 3),
+        "p99_ms": round(percentile(0.99), 3),
+    }
+
+
+async def timed(client, method, url, **kwargs):
+    started = time.perf_counter()
+    response = await client.request(method, url, **kwargs)
+    return response, time.perf_counter() - started
+
+
+async def seed(args) -> dict:
+    from app.crud import clear_holidays_table, import_holidays_from_lib
+    from app.database import async_session
+    from benchmarks.dataset import bench_user_id, create_schema, seed_custom_holidays
+
+    await create_schema()
+    results = {}
+    async with async_session() as db:
+        await clear_holidays_table(db)
+        for country in args.countries.split(","):
+            result = await import_holidays_from_lib(db, args.start_year, country, end_year=args.end_year)
+            results[country] = {
+                "rows": result.imported,
+                "elapsed_seconds": result.elapsed_seconds,
+                "rows_per_second": result.rows_per_second,
+            }
+            print(f"import {country}: {result.imported} rows, {result.rows_per_second} rows/s")
+        owner_id = await bench_user_id(db)
+        await seed_custom_holidays(db, owner_id, args.custom_rows, args.start_year, args.end_year, args.seed)
+    return results
+
+
+async def ensure_login_user(client):
+    response = await client.post("/register", json={"email": BENCH_EMAIL, "password": BENCH_PASSWORD})
+    if response.status_code not in (200, 400):
+        response.raise_for_status()
+
+
+async def login(client) -> dict:
+    response = await client.post("/token", data={"username": BENCH_EMAIL, "password": BENCH_PASSWORD})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def bench_list(client, args) -> dict:
+    results = {}
+    for name, params in LIST_CASES.items():
+        samples = []
+        for _ in range(args.iterations):
+            response, elapsed = await timed(client, "GET", "/holidays", params={**params, "limit": args.page_size})
+            response.raise_for_status()
+            samples.append(elapsed)
+        results[name] = latency_summary(samples)
+
+    # Глубокие страницы через skip и обход тех же страниц курсором
+    for depth in PAGE_DEPTHS:
+        params = {"limit": args.page_size, "skip": depth * args.page_size, "order_by": "date"}
+        samples = []
+        for _ in range(args.iterations):
+            response, elapsed = await timed(client, "GET", "/holidays", params=params)
+            response.raise_for_status()
+            samples.append(elapsed)
+        results[f"offset_page_{depth}"] = latency_summary(samples)
+
+    samples = []
+    cursor = None
+    for _ in range(max(PAGE_DEPTHS) + 1):
+        params = {"limit": args.page_size, "order_by": "date"}
+        if cursor:
+            params["cursor"] = cursor
+        response, elapsed = await timed(client, "GET", "/holidays", params=params)
+        response.raise_for_status()
+        samples.append(elapsed)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    results["cursor_walk"] = latency_summary(samples)
+    return results
+
+
+async def bench_login(client, args) -> dict:
+    semaphore = asyncio.Semaphore(args.concurrency)
+    samples, errors = [], 0
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            response, elapsed = await timed(
+                client, "POST", "/token", data={"username": BENCH_EMAIL, "password": BENCH_PASSWORD}
+            )
+        if response.status_code == 200:
+            samples.append(elapsed)
+        else:
+            errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(args.logins)))
+    wall = time.perf_counter() - started
+    return {**latency_summary(samples), "errors": errors, "logins_per_second": round(len(samples) / wall, 2)}
+
+
+async def bench_mixed(client, args) -> dict:
+    headers = await login(client)
+    rng = random.Random(args.seed)
+    deadline = time.perf_counter() + args.duration
+    samples = {"read": [], "write": []}
+    errors = 0
+    cases = list(LIST_CASES.values())
+
+    async def worker(number):
+        nonlocal errors
+        own_ids = []
+        while time.perf_counter() < deadline:
+            if rng.random() >= args.write_ratio:
+                kind = "read"
+                params = dict(rng.choice(cases))
+                if "year" in params:
+                    params["year"] = rng.randint(args.start_year, args.end_year)
+                response, elapsed = await timed(client, "GET", "/holidays", params={**params, "limit": args.page_size})
+            else:
+                kind = "write"
+                action = rng.choice(["create", "update", "delete"]) if own_ids else "create"
+                if action == "create":
+                    body = {
+                        "name": f"Load {number}-{len(own_ids)}",
+                        "date": date(rng.randint(args.start_year, args.end_year), rng.randint(1, 12), rng.randint(1, 28)).isoformat(),
+                        "country": "US",
+                    }
+                    response, elapsed = await timed(client, "POST", "/holidays", json=body, headers=headers)
+                    if response.status_code == 201:
+                        own_ids.append(response.json()["id"])
+                elif action == "update":
+                    holiday_id = rng.choice(own_ids)
+                    response, elapsed = await timed(
+                        client, "PUT", f"/holidays/{holiday_id}", json={"notes": "updated"}, headers=headers
+                    )
+                else:
+                    holiday_id = own_ids.pop(rng.randrange(len(own_ids)))
+                    response, elapsed = await timed(client, "DELETE", f"/holidays/{holiday_id}", headers=headers)
+            if response.status_code >= 400:
+                errors += 1
+            else:
+                samples[kind].append(elapsed)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(number) for number in range(args.concurrency)))
+    wall = time.perf_counter() - started
+    total = len(samples["read"]) + len(samples["write"])
+    return {
+        "read": latency_summary(samples["read"]),
+        "write": latency_summary(samples["write"]),
+        "errors": errors,
+        "requests_per_second": round(total / wall, 2),
+    }
+
+
+def flatten(results: dict, prefix: str = "") -> dict:
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)):
+            flat[name] = value
+    return flat
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Metrics that got worse than the baseline by more than ``threshold``.
+
+    ``*_per_second`` metrics are better when higher, ``*_ms`` and
+    ``*_seconds`` when lower; other values (counts) are not compared, nor is
+    p99, which is too noisy over a few dozen samples.
+    """
+    current, previous = flatten(results), flatten(baseline)
+    regressions = []
+    for name, value in sorted(current.items()):
+        base = previous.get(name)
+        if not base:
+            continue
+        if name.endswith("_per_second"):
+            change = (base - value) / base
+        elif name.endswith("p99_ms"):
+            continue
+        elif name.endswith("_ms") or name.endswith("_seconds"):
+            change = (value - base) / base
+        else:
+            continue
+        if change > threshold:
+            regressions.append((name, base, value, change))
+    return regressions
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args) -> dict:
+    import httpx
+    from app.database import engine
+    from app.main import app
+
+    results = {}
+    try:
+        if not args.skip_seed:
+            results["import"] = await seed(args)
+
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                await ensure_login_user(client)
+                # Прогрев: индекс календаря строится в фоне после старта
+                for _ in range(100):
+                    response = await client.get("/holidays", params={"year": args.start_year})
+                    if response.status_code == 200 and response.json():
+                        break
+                    await asyncio.sleep(0.1)
+                await asyncio.sleep(0.5)
+
+                results["list_holidays"] = await bench_list(client, args)
+                results["login"] = await bench_login(client, args)
+                results["mixed"] = await bench_mixed(client, args)
+    finally:
+        # Потоки aiosqlite не дают процессу завершиться, пока движок не закрыт
+        await engine.dispose()
+    return results
+
+
+def main():
+    args = parse_args()
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+
+    results = asyncio.run(run(args))
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "database": args.database_url.split(":", 1)[0],
+            "countries": args.countries,
+            "years": [args.start_year, args.end_year],
+            "custom_rows": args.custom_rows,
+            "concurrency": args.concurrency,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    print(text)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline["results"], args.threshold)
+        for name, base, value, change in regressions:
+            print(f"REGRESSION {name}: {base} -> {value} ({change:+.0%})", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions over {args.threshold:.0%} against {args.baseline}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Compare the two ways ``GET /holidays`` can build its JSON body.
+
+* ``model``: ORM ``Holiday`` objects validated through ``HolidayInDB`` and
+  encoded like FastAPI does for a ``response_model``;
+* ``fast``: Core rows as ``HolidayRecord`` tuples encoded by
+  ``app.serialization.dump_holidays`` (orjson when installed).
+
+Each path is measured twice: encoding only, over rows already in memory, and
+end to end, through the API with the calendar index disabled so every page
+is read from the database. Both paths must produce identical bytes; the
+script checks this before timing anything.
+
+    python -m benchmarks.serialization --pages 200 --page-size 200
+
+Without ``--database-url`` (or ``BENCH_DATABASE_URL``) a SQLite file is used.
+The holidays table is cleared and reseeded unless ``--skip-seed`` is given.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=os.environ.get("BENCH_DATABASE_URL", "sqlite+aiosqlite:///./bench.db"))
+    parser.add_argument("--countries", default="US,CA,DE")
+    parser.add_argument("--start-year", type=int, default=2010)
+    parser.add_argument("--end-year", type=int, default=2030)
+    parser.add_argument("--custom-rows", type=int, default=5000)
+    parser.add_argument("--page-size", type=int, default=200)
+    parser.add_argument("--pages", type=int, default=200, help="pages per measurement")
+    parser.add_argument("--skip-seed", action="store_true", help="reuse the data already in the database")
+    return parser.parse_args()
+
+
+def model_body(holidays) -> bytes:
+    """What FastAPI does with ``response_model=List[HolidayInDB]``."""
+    from typing import List
+    from fastapi.responses import JSONResponse
+    from pydantic import TypeAdapter
+    from app.schemas import HolidayInDB
+
+    adapter = TypeAdapter(List[HolidayInDB])
+    content = adapter.dump_python(adapter.validate_python(list(holidays), from_attributes=True), mode="json")
+    return JSONResponse(content).body
+
+
+def rate(rows: int, seconds: float) -> dict:
+    return {"rows": rows, "seconds": round(seconds, 3), "rows_per_second": round(rows / seconds, 1)}
+
+
+async def seed(args):
+    from app.crud import clear_holidays_table, import_holidays
+    from app.database import async_session
+    from benchmarks.dataset import bench_user_id, create_schema, seed_custom_holidays
+
+    await create_schema()
+    async with async_session() as db:
+        await clear_holidays_table(db)
+        result = await import_holidays(db, args.countries.split(","), args.start_year, args.end_year)
+        print(f"{result.country}: {result.imported} rows")
+        owner_id = await bench_user_id(db)
+        await seed_custom_holidays(db, owner_id, args.custom_rows, args.start_year, args.end_year)
+
+
+async def bench_encoding(args) -> dict:
+    from sqlalchemy import select
+    from app.calendar_index import HolidayRecord, RECORD_COLUMNS
+    from app.database import async_session
+    from app.models import Holiday
+    from app.serialization import dump_holidays
+
+    async with async_session() as db:
+        query = select(Holiday).order_by(Holiday.id).limit(args.page_size)
+        orm_rows = (await db.execute(query)).scalars().all()
+        records = [HolidayRecord(*row) for row in await db.execute(query.with_only_columns(*RECORD_COLUMNS))]
+
+    if model_body(orm_rows) != dump_holidays(records):
+        raise SystemExit("Fast path output differs from the response_model output")
+
+    results = {}
+    for name, encode, rows in (("model", model_body, orm_rows), ("fast", dump_holidays, records)):
+        started = time.perf_counter()
+        for _ in range(args.pages):
+            encode(rows)
+        results[name] = rate(len(rows) * args.pages, time.perf_counter() - started)
+    return results
+
+
+async def bench_api(args) -> dict:
+    import httpx
+    from app.config import settings
+    from app.main import app
+
+    settings.calendar_index_enabled = False
+    results, bodies = {}, {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name, fast in (("model", False), ("fast", True)):
+                settings.fast_json_enabled = fast
+                rows, cursor = 0, None
+                started = time.perf_counter()
+                for _ in range(args.pages):
+                    params = {"limit": args.page_size, "order_by": "date"}
+                    if cursor:
+                        params["cursor"] = cursor
+                    response = await client.get("/holidays", params=params)
+                    response.raise_for_status()
+                    bodies.setdefault(cursor, {})[name] = response.content
+                    rows += len(response.json())
+                    cursor = response.headers.get("X-Next-Cursor")
+                    if not cursor:
+                        break
+                results[name] = rate(rows, time.perf_counter() - started)
+    if any(len(set(page.values())) != 1 for page in bodies.values()):
+        raise SystemExit("API responses differ between the two paths")
+    return results
+
+
+async def run(args) -> dict:
+    from app.database import engine
+
+    try:
+        if not args.skip_seed:
+            await seed(args)
+        results = {"encoding": await bench_encoding(args), "api": await bench_api(args)}
+    finally:
+        # Потоки aiosqlite не дают процессу завершиться, пока движок не закрыт
+        await engine.dispose()
+    for section in results.values():
+        section["speedup"] = round(section["fast"]["rows_per_second"] / section["model"]["rows_per_second"], 2)
+    return results
+
+
+def main():
+    args = parse_args()
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+
+    results = asyncio.run(run(args))
+    from app.serialization import orjson
+    results["encoder"] = "orjson" if orjson is not None else "json"
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Shared fixtures: the API runs in-process against a throwaway SQLite database.
+
+The ``app`` modules read their settings at import time, so the environment
+is set here, before any of them is imported. Tests are plain functions that
+run their async part with the ``run`` fixture: a fresh event loop and empty
+tables for every test, the engine disposed at the end.
+"""
+import asyncio
+import os
+import tempfile
+from contextlib import asynccontextmanager
+from datetime import date
+
+import pytest
+
+_database_dir = tempfile.mkdtemp(prefix="holydays-tests-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_database_dir}/test.db"
+os.environ["SECRET_KEY"] = "test-secret"
+os.environ["BCRYPT_ROUNDS"] = "4"
+
+import httpx  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from app.auth import AuthUser, get_current_active_user, user_cache  # noqa: E402
+from app.business_days import business_calendar  # noqa: E402
+from app.calendar_index import calendar_index  # noqa: E402
+from app.coalescing import listing_flight  # noqa: E402
+from app.data_version import data_version  # noqa: E402
+from app.database import Base, async_session, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import Holiday, User  # noqa: E402
+
+
+async def _reset_database():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    user_cache.clear()
+    business_calendar.invalidate()
+    calendar_index.invalidate()
+    listing_flight.clear()
+    data_version.invalidate()
+
+
+@pytest.fixture
+def run():
+    """Run ``scenario()`` (a coroutine function) on empty tables; returns its result."""
+    def run_scenario(scenario):
+        async def main():
+            await _reset_database()
+            try:
+                return await scenario()
+            finally:
+                await engine.dispose()
+
+        return asyncio.run(main())
+
+    return run_scenario
+
+
+@asynccontextmanager
+async def api_client(user: AuthUser = None):
+    """HTTP client for the app; with ``user`` every request is authenticated as that user."""
+    if user is not None:
+        app.dependency_overrides[get_current_active_user] = lambda: user
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            yield client
+    finally:
+        app.dependency_overrides.pop(get_current_active_user, None)
+
+
+async def create_user(email: str = "user@example.com") -> AuthUser:
+    async with async_session() as db:
+        user_id = (await db.execute(
+            insert(User).values(email=email, hashed_password="", is_active=True).returning(User.id)
+        )).scalar_one()
+        await db.commit()
+    return AuthUser(id=user_id, email=email, is_active=True)
+
+
+async def add_holidays(*rows: dict) -> list:
+    """Insert holiday rows directly; returns their ids in order."""
+    async with async_session() as db:
+        ids = []
+        for row in rows:
+            values = {**dict(state=None, federal=False, notes=None, is_custom=False, owner_id=None), **row}
+            ids.append((await db.execute(insert(Holiday).values(values).returning(Holiday.id))).scalar_one())
+        await db.commit()
+    return ids
+
+
+def holiday(name: str, day: date, **values) -> dict:
+    return dict(name=name, date=day, country=values.pop("country", "US"), **values)
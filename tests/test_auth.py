@@ -0,0 +1,40 @@
+from app.auth import AuthUser, user_cache
+from app.database import async_session
+from app.models import User
+
+
+def test_cached_user_is_dropped_after_commit_not_at_flush(run):
+    async def scenario():
+        async with async_session() as db:
+            user = User(email="user@example.com", hashed_password="", is_active=True)
+            db.add(user)
+            await db.commit()
+            cached = AuthUser(id=user.id, email=user.email, is_active=True)
+            user_cache.set(user.email, cached)
+
+            user.is_active = False
+            await db.flush()
+            # До коммита другие запросы все еще читают из базы активного пользователя
+            assert user_cache.get(user.email) == cached
+            await db.commit()
+            assert user_cache.get(user.email) is None
+
+    run(scenario)
+
+
+def test_rolled_back_change_keeps_the_cache(run):
+    async def scenario():
+        async with async_session() as db:
+            user = User(email="user@example.com", hashed_password="", is_active=True)
+            db.add(user)
+            await db.commit()
+            cached = AuthUser(id=user.id, email=user.email, is_active=True)
+
+            user.is_active = False
+            await db.flush()
+            await db.rollback()
+            user_cache.set(cached.email, cached)
+            await db.commit()
+            assert user_cache.get(cached.email) == cached
+
+    run(scenario)
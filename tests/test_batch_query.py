@@ -0,0 +1,90 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+
+from app.calendar_index import calendar_index
+from app.config import settings
+from app.database import async_session
+from app.filters import HolidayFilter, apply_filters
+from app.models import Holiday
+from tests.conftest import add_holidays, api_client, holiday
+
+
+ORDERINGS = [["id"], ["name"], ["-name", "date"], ["-state"], ["federal", "-notes"]]
+
+
+async def seed():
+    return await add_holidays(*[
+        holiday(["b", "B", "a", "Ä", "_x", "A b"][i % 6] + f" {i % 4}", date(2024, 1 + i % 12, 1 + i % 5),
+                country=["US", "DE"][i % 2], state=[None, "NY", "BY"][i % 3], federal=i % 3 == 0,
+                notes=None if i % 4 else "note")
+        for i in range(30)
+    ])
+
+
+async def expected_ids(**filters):
+    async with async_session() as db:
+        query = await apply_filters(select(Holiday.id), HolidayFilter(**filters))
+        return list((await db.execute(query)).scalars())
+
+
+@pytest.mark.parametrize("calendar_index_enabled", [False, True])
+def test_pages_follow_the_sql_order(run, monkeypatch, calendar_index_enabled):
+    monkeypatch.setattr(settings, "calendar_index_enabled", calendar_index_enabled)
+
+    async def scenario():
+        await seed()
+        if calendar_index_enabled:
+            async with async_session() as db:
+                await calendar_index.rebuild(db)
+        specs = [{"order_by": order_by, "limit": 4} for order_by in ORDERINGS] + [{"country": "DE", "limit": 3}]
+        walked = [[] for _ in specs]
+        async with api_client() as client:
+            while any(spec is not None for spec in specs):
+                response = await client.post("/holidays/query", json={
+                    "queries": [spec or {"limit": 1} for spec in specs],
+                })
+                assert response.status_code == 200
+                for index, result in enumerate(response.json()["results"]):
+                    if specs[index] is None:
+                        continue
+                    assert result["index"] == index
+                    walked[index].extend(row["id"] for row in result["holidays"])
+                    cursor = result["next_cursor"]
+                    specs[index] = {**specs[index], "cursor": cursor} if cursor else None
+        for order_by, ids in zip(ORDERINGS, walked):
+            assert ids == await expected_ids(order_by=order_by)
+        assert walked[-1] == await expected_ids(country="DE")
+
+    run(scenario)
+
+
+def test_year_month_and_skip(run, monkeypatch):
+    monkeypatch.setattr(settings, "calendar_index_enabled", False)
+
+    async def scenario():
+        await seed()
+        async with api_client() as client:
+            response = await client.post("/holidays/query", json={"queries": [
+                {"year": 2024, "month": 3, "order_by": ["date"]},
+                {"year": 2025},
+                {"skip": 5, "limit": 2},
+            ]})
+        first, empty, skipped = response.json()["results"]
+        assert [row["date"][:7] for row in first["holidays"]] == ["2024-03"] * len(first["holidays"])
+        assert first["holidays"] and first["next_cursor"] is None
+        assert empty["holidays"] == []
+        assert [row["id"] for row in skipped["holidays"]] == (await expected_ids())[5:7]
+
+    run(scenario)
+
+
+def test_invalid_cursor_names_the_query(run):
+    async def scenario():
+        async with api_client() as client:
+            response = await client.post("/holidays/query", json={"queries": [{}, {"cursor": "broken"}]})
+        assert response.status_code == 400
+        assert response.json()["detail"].startswith("queries[1]")
+
+    run(scenario)
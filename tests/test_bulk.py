@@ -0,0 +1,163 @@
+from datetime import date
+
+from sqlalchemy import select
+
+from app.database import async_session
+from app.models import Holiday
+from tests.conftest import add_holidays, api_client, create_user, holiday
+
+
+async def stored_names():
+    async with async_session() as db:
+        return dict((await db.execute(select(Holiday.id, Holiday.name))).all())
+
+
+async def owned_holidays():
+    """Two custom holidays of the test user and one of another user."""
+    user = await create_user()
+    other = await create_user("other@example.com")
+    ids = await add_holidays(
+        holiday("Company Day", date(2024, 3, 1), is_custom=True, owner_id=user.id),
+        holiday("Team Day", date(2024, 6, 1), is_custom=True, owner_id=user.id),
+        holiday("Their Day", date(2024, 9, 1), is_custom=True, owner_id=other.id),
+    )
+    return user, ids
+
+
+def test_bulk_create(run):
+    async def scenario():
+        user = await create_user()
+        async with api_client(user) as client:
+            response = await client.post("/holidays/bulk", json=[
+                {"name": "A", "date": "2024-01-02", "country": "US"},
+                {"name": "B", "date": "2024-01-03", "country": "US", "state": "NY"},
+            ])
+        result = response.json()
+        assert result["committed"] is True
+        assert [item["status"] for item in result["results"]] == ["created", "created"]
+        assert all(item["holiday"]["owner_id"] == user.id for item in result["results"])
+        assert sorted((await stored_names()).values()) == ["A", "B"]
+
+    run(scenario)
+
+
+def test_bulk_create_modes(run):
+    items = [
+        {"name": "A", "date": "2024-01-02", "country": "US"},
+        {"date": "2024-01-03", "country": "US"},
+        {"name": "C", "date": "2024-01-04", "country": None},
+    ]
+
+    async def scenario():
+        user = await create_user()
+        async with api_client(user) as client:
+            atomic = await client.post("/holidays/bulk", json=items)
+            assert await stored_names() == {}
+            best_effort = await client.post("/holidays/bulk", params={"mode": "best_effort"}, json=items)
+        assert atomic.status_code == 200
+        assert atomic.json()["committed"] is False
+        assert [item["status"] for item in atomic.json()["results"]] == ["skipped", "failed", "failed"]
+        result = best_effort.json()
+        assert (result["committed"], result["succeeded"], result["failed"]) == (True, 1, 2)
+        assert "name" in result["results"][1]["error"]
+        assert "country" in result["results"][2]["error"]
+        assert list((await stored_names()).values()) == ["A"]
+
+    run(scenario)
+
+
+def test_atomic_update_applies_nothing_when_an_item_fails(run):
+    async def scenario():
+        user, (mine, also_mine, theirs) = await owned_holidays()
+        async with api_client(user) as client:
+            response = await client.patch("/holidays/bulk", json=[
+                {"id": mine, "name": "Renamed"},
+                {"id": theirs, "name": "Stolen"},
+            ])
+        result = response.json()
+        assert result["committed"] is False
+        assert [item["status"] for item in result["results"]] == ["skipped", "failed"]
+        assert (await stored_names())[mine] == "Company Day"
+
+    run(scenario)
+
+
+def test_best_effort_update_applies_the_valid_items(run):
+    async def scenario():
+        user, (mine, also_mine, theirs) = await owned_holidays()
+        async with api_client(user) as client:
+            response = await client.patch("/holidays/bulk", params={"mode": "best_effort"}, json=[
+                {"id": mine, "name": "Renamed"},
+                {"id": theirs, "name": "Stolen"},
+                {"id": also_mine, "name": None},
+                {"id": mine + 1000, "notes": "missing"},
+            ])
+        assert response.status_code == 200
+        result = response.json()
+        assert result["committed"] is True
+        assert (result["succeeded"], result["failed"]) == (1, 3)
+        assert [item["status"] for item in result["results"]] == ["updated", "failed", "failed", "failed"]
+        assert "name" in result["results"][2]["error"]
+        names = await stored_names()
+        assert (names[mine], names[also_mine], names[theirs]) == ("Renamed", "Team Day", "Their Day")
+
+    run(scenario)
+
+
+def test_bulk_update_changes_the_date(run):
+    async def scenario():
+        user, (mine, _, _) = await owned_holidays()
+        async with api_client(user) as client:
+            response = await client.patch("/holidays/bulk", json=[{"id": mine, "date": "2024-03-04"}])
+        assert response.json()["results"][0]["holiday"]["date"] == "2024-03-04"
+        async with async_session() as db:
+            assert (await db.get(Holiday, mine)).date == date(2024, 3, 4)
+
+    run(scenario)
+
+
+def test_bulk_update_cannot_null_required_fields_atomically(run):
+    async def scenario():
+        user, (mine, also_mine, _) = await owned_holidays()
+        async with api_client(user) as client:
+            response = await client.patch("/holidays/bulk", json=[
+                {"id": mine, "notes": "ok"},
+                {"id": also_mine, "date": None, "country": None},
+            ])
+        result = response.json()
+        assert result["committed"] is False
+        assert result["results"][1]["status"] == "failed"
+
+    run(scenario)
+
+
+def test_bulk_update_cannot_change_is_custom(run):
+    async def scenario():
+        user, (mine, _, _) = await owned_holidays()
+        async with api_client(user) as client:
+            response = await client.patch(
+                "/holidays/bulk", params={"mode": "best_effort"}, json=[{"id": mine, "is_custom": False}]
+            )
+        assert response.status_code == 422
+        async with async_session() as db:
+            assert (await db.get(Holiday, mine)).is_custom is True
+
+    run(scenario)
+
+
+def test_bulk_delete_modes(run):
+    async def scenario():
+        user, (mine, also_mine, theirs) = await owned_holidays()
+        async with api_client(user) as client:
+            atomic = await client.request("DELETE", "/holidays/bulk", json={"ids": [mine, theirs]})
+            assert atomic.json()["committed"] is False
+            assert set(await stored_names()) == {mine, also_mine, theirs}
+
+            best_effort = await client.request(
+                "DELETE", "/holidays/bulk", params={"mode": "best_effort"}, json={"ids": [mine, theirs, mine]}
+            )
+        result = best_effort.json()
+        assert [item["status"] for item in result["results"]] == ["deleted", "failed", "failed"]
+        assert set(await stored_names()) == {also_mine, theirs}
+
+    run(scenario)
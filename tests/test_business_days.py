@@ -0,0 +1,146 @@
+import asyncio
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from app.business_days import BusinessCalendar
+from app.schemas import MAX_BUSINESS_DAY_OFFSET, MAX_BUSINESS_DAY_SPAN_YEARS
+from tests.conftest import add_holidays, api_client, holiday
+
+
+KEY = ("US", None, None)
+
+
+class FixedCalendar(BusinessCalendar):
+    """Business calendar over a fixed set of holiday dates instead of the database."""
+
+    def __init__(self, holidays):
+        super().__init__()
+        self.holidays = set(holidays)
+
+    async def _load_holidays(self, db, key, start, end):
+        return [day for day in self.holidays if start <= day <= end]
+
+
+def reference_is_business_day(holidays, day: date) -> bool:
+    return day.weekday() < 5 and day not in holidays
+
+
+def reference_between(holidays, start: date, end: date) -> int:
+    if end < start:
+        return -reference_between(holidays, end, start)
+    return sum(
+        reference_is_business_day(holidays, start + timedelta(days=i)) for i in range((end - start).days)
+    )
+
+
+def reference_add(holidays, day: date, n: int) -> date:
+    if n == 0:
+        while not reference_is_business_day(holidays, day):
+            day += timedelta(days=1)
+        return day
+    step = timedelta(days=1 if n > 0 else -1)
+    remaining = abs(n)
+    while remaining:
+        day += step
+        remaining -= reference_is_business_day(holidays, day)
+    return day
+
+
+@pytest.fixture
+def holidays():
+    rng = random.Random(7)
+    start = date(2019, 1, 1)
+    days = {start + timedelta(days=rng.randrange(365 * 8)) for _ in range(200)}
+    return days | {date(2024, 2, 29), date(2020, 12, 31)}
+
+
+def test_matches_brute_force(holidays):
+    calendar = FixedCalendar(holidays)
+    rng = random.Random(11)
+    asyncio.run(calendar.prepare(None, KEY, range(2019, 2027)))
+    for _ in range(300):
+        a = date(2019, 1, 1) + timedelta(days=rng.randrange(365 * 8))
+        b = date(2019, 1, 1) + timedelta(days=rng.randrange(365 * 8))
+        assert calendar.is_business_day(KEY, a) == reference_is_business_day(holidays, a)
+        assert calendar.business_days_between(KEY, a, b) == reference_between(holidays, a, b)
+
+
+@pytest.mark.parametrize("n", [0, 1, -1, 5, -5, 260, -260, 700, -700])
+def test_offset_matches_brute_force(holidays, n):
+    calendar = FixedCalendar(holidays)
+    rng = random.Random(n)
+    for _ in range(40):
+        day = date(2021, 1, 1) + timedelta(days=rng.randrange(365 * 3))
+        assert asyncio.run(calendar.offset(None, KEY, day, n)) == reference_add(holidays, day, n)
+
+
+def test_offset_across_year_boundary():
+    calendar = FixedCalendar({date(2024, 12, 31), date(2025, 1, 1)})
+    assert asyncio.run(calendar.offset(None, KEY, date(2024, 12, 30), 1)) == date(2025, 1, 2)
+    assert asyncio.run(calendar.offset(None, KEY, date(2025, 1, 2), -1)) == date(2024, 12, 30)
+
+
+def test_offset_is_bounded(run):
+    async def scenario():
+        async with api_client() as client:
+            too_far = await client.get(
+                "/business-days/add", params={"date": "2024-01-02", "n": MAX_BUSINESS_DAY_OFFSET + 1}
+            )
+            batch = await client.post("/business-days/batch", json={
+                "add_business_days": [{"date": "2024-01-02", "n": -MAX_BUSINESS_DAY_OFFSET - 1}],
+            })
+            allowed = await client.get("/business-days/add", params={"date": "2024-01-02", "n": 10})
+        assert too_far.status_code == 422
+        assert batch.status_code == 422
+        assert allowed.json()["result"] == "2024-01-16"
+
+    run(scenario)
+
+
+def test_span_is_bounded(run):
+    async def scenario():
+        last = date(2000 + MAX_BUSINESS_DAY_SPAN_YEARS, 1, 1)
+        async with api_client() as client:
+            too_long = await client.get(
+                "/business-days/between", params={"start": "1999-12-31", "end": last.isoformat()}
+            )
+            batch = await client.post("/business-days/batch", json={
+                "business_days_between": [{"start": last.isoformat(), "end": "1999-01-01"}],
+            })
+            allowed = await client.get(
+                "/business-days/between", params={"start": "2000-01-01", "end": last.isoformat()}
+            )
+        assert too_long.status_code == 422
+        assert batch.status_code == 422
+        assert allowed.status_code == 200
+
+    run(scenario)
+
+
+def test_library_subdivisions_are_accepted(run):
+    async def scenario():
+        await add_holidays(
+            holiday("Easter Monday", date(2024, 4, 1), country="GB", state="ENG"),
+            holiday("St Andrew's Day", date(2024, 12, 2), country="GB", state="SCT"),
+        )
+        async with api_client() as client:
+            england = await client.get(
+                "/business-days/is-business-day", params={"date": "2024-04-01", "country": "GB", "state": "ENG"}
+            )
+            scotland = await client.get(
+                "/business-days/is-business-day", params={"date": "2024-04-01", "country": "GB", "state": "SCT"}
+            )
+            unknown = await client.get(
+                "/business-days/is-business-day", params={"date": "2024-04-01", "country": "US", "state": "ENG"}
+            )
+            batch = await client.post("/business-days/batch", json={
+                "country": "GB", "state": "ENG", "is_business_day": ["2024-04-01", "2024-04-02"],
+            })
+        assert england.json()["is_business_day"] is False
+        assert scotland.json()["is_business_day"] is True
+        assert unknown.status_code == 400
+        assert batch.json()["is_business_day"] == [False, True]
+
+    run(scenario)
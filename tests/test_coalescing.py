@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from app.coalescing import SingleFlight
+
+
+def flight(cache_ttl: float = 0) -> SingleFlight:
+    return SingleFlight("test", cache_ttl=cache_ttl, cache_max_size=16)
+
+
+class Fetch:
+    """Fetch function that counts its calls and finishes when released."""
+
+    def __init__(self, result="page"):
+        self.result = result
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+def test_concurrent_calls_share_one_execution():
+    async def scenario():
+        shared, fetch = flight(), Fetch()
+        waiters = [asyncio.ensure_future(shared.run("key", fetch)) for _ in range(5)]
+        await asyncio.sleep(0)
+        fetch.release.set()
+        assert await asyncio.gather(*waiters) == ["page"] * 5
+        assert fetch.calls == 1
+        assert (shared.executed, shared.coalesced) == (1, 4)
+        assert shared.stats()["in_flight"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_different_keys_run_separately():
+    async def scenario():
+        shared, first, second = flight(), Fetch("a"), Fetch("b")
+        first.release.set()
+        second.release.set()
+        assert await asyncio.gather(shared.run(1, first), shared.run(2, second)) == ["a", "b"]
+        assert (first.calls, second.calls) == (1, 1)
+
+    asyncio.run(scenario())
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    async def scenario():
+        shared, failing = flight(cache_ttl=60), Fetch(RuntimeError("boom"))
+        waiters = [asyncio.ensure_future(shared.run("key", failing)) for _ in range(3)]
+        await asyncio.sleep(0)
+        failing.release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+        retry = Fetch()
+        retry.release.set()
+        assert await shared.run("key", retry) == "page"
+        assert retry.calls == 1
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_does_not_cancel_the_shared_execution():
+    async def scenario():
+        shared, fetch = flight(), Fetch()
+        leader = asyncio.ensure_future(shared.run("key", fetch))
+        follower = asyncio.ensure_future(shared.run("key", fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+        fetch.release.set()
+        assert await follower == "page"
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("cache_ttl, calls", [(0, 2), (60, 1)])
+def test_micro_cache_serves_sequential_calls(cache_ttl, calls):
+    async def scenario():
+        shared, fetch = flight(cache_ttl), Fetch()
+        fetch.release.set()
+        assert [await shared.run("key", fetch), await shared.run("key", fetch)] == ["page", "page"]
+        assert fetch.calls == calls
+
+    asyncio.run(scenario())
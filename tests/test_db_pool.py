@@ -0,0 +1,50 @@
+import pytest
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.config import settings
+from app.database import engine
+from app.db_pool import InstrumentedPool, pool_stats
+from tests.conftest import api_client
+
+
+def test_pool_endpoint_reports_checkouts(run):
+    async def scenario():
+        # После dispose() движок работает с новым пулом: статистика следует за ним
+        await engine.dispose()
+        pool_stats.reset()
+        async with api_client() as client:
+            for _ in range(3):
+                assert (await client.get("/holidays")).status_code == 200
+            stats = (await client.get("/db/pool")).json()
+        assert stats["checkouts"] >= 3
+        assert stats["pool_size"] == settings.db_pool_size
+        assert stats["checked_out"] == 0
+        assert stats["timeouts"] == 0
+        assert stats["checked_in"] >= 1
+        assert 1 <= stats["peak_checked_out"] <= settings.db_pool_size + settings.db_max_overflow
+        assert pool_stats.pool is engine.sync_engine.pool
+
+    run(scenario)
+
+
+def test_checkout_timeout_is_counted(run, tmp_path):
+    async def scenario():
+        pool_stats.reset()
+        small = create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path}/pool.db",
+            poolclass=InstrumentedPool, pool_size=1, max_overflow=0, pool_timeout=0.1,
+        )
+        try:
+            async with small.connect() as held:
+                await held.execute(text("SELECT 1"))
+                with pytest.raises(exc.TimeoutError):
+                    async with small.connect():
+                        pass
+        finally:
+            await small.dispose()
+        stats = pool_stats.snapshot()
+        assert stats["timeouts"] == 1
+        assert stats["wait_seconds_max"] >= 0.1
+
+    run(scenario)
@@ -0,0 +1,173 @@
+import csv
+import io
+import json
+from datetime import date
+
+import pytest
+from starlette.requests import ClientDisconnect
+
+from app import export
+from app import main as app_main
+from app.database import engine
+from app.filters import HolidayFilter
+from tests.conftest import add_holidays, api_client, holiday
+
+
+ROWS = [
+    holiday("New Year's Day", date(2024, 1, 1), federal=True),
+    holiday("Lincoln's Birthday", date(2024, 2, 12), state="NY", notes="Schools closed, banks open; see notes"),
+    holiday("Día de la Raza — " + "a very long holiday name " * 3, date(2024, 10, 12), state="CA"),
+]
+
+
+async def export_response(params):
+    async with api_client() as client:
+        return await client.get("/holidays/export", params=params)
+
+
+def unfold(body: str) -> list:
+    return body.replace("\r\n ", "").split("\r\n")
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    # Несколько чанков даже на трех строках
+    monkeypatch.setattr(export, "EXPORT_CHUNK_SIZE", 2)
+
+
+def test_ndjson(run):
+    async def scenario():
+        ids = await add_holidays(*ROWS)
+        response = await export_response({"format": "ndjson"})
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["id"] for line in lines] == ids
+        assert lines[1] == {
+            "id": ids[1], "name": "Lincoln's Birthday", "date": "2024-02-12", "country": "US", "state": "NY",
+            "federal": False, "notes": "Schools closed, banks open; see notes", "is_custom": False, "owner_id": None,
+        }
+
+    run(scenario)
+
+
+def test_csv(run):
+    async def scenario():
+        await add_holidays(*ROWS)
+        response = await export_response({"format": "csv", "country": "US", "end_date": "2024-06-30"})
+        assert response.headers["content-disposition"] == 'attachment; filename="holidays.csv"'
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert [row["date"] for row in rows] == ["2024-01-01", "2024-02-12"]
+        assert rows[1]["notes"] == "Schools closed, banks open; see notes"
+        assert response.text.count("id,name,date") == 1
+
+    run(scenario)
+
+
+def test_empty_csv_has_a_header(run):
+    async def scenario():
+        response = await export_response({"format": "csv"})
+        assert response.status_code == 200
+        assert response.text.splitlines() == ["id,name,date,country,state,federal,notes,is_custom,owner_id"]
+
+    run(scenario)
+
+
+def test_ics(run):
+    async def scenario():
+        ids = await add_holidays(*ROWS)
+        response = await export_response({"format": "ics"})
+        body = response.text
+        assert response.headers["content-type"].startswith("text/calendar")
+        assert all(len(line.encode()) <= 75 for line in body.split("\r\n"))
+        lines = unfold(body)
+        assert lines[0] == "BEGIN:VCALENDAR"
+        assert lines[-2:] == ["END:VCALENDAR", ""]
+        assert lines.count("BEGIN:VEVENT") == lines.count("END:VEVENT") == 3
+        assert f"UID:holiday-{ids[1]}@holydays-api" in lines
+        assert "DTSTART;VALUE=DATE:20240212" in lines
+        assert "DTEND;VALUE=DATE:20240213" in lines
+        assert "LOCATION:US-NY" in lines
+        assert "DESCRIPTION:Schools closed\\, banks open\\; see notes" in lines
+        assert f"SUMMARY:{ROWS[2]['name']}" in lines
+
+    run(scenario)
+
+
+def test_error_mid_stream_is_not_a_clean_body(run, monkeypatch):
+    calls = []
+
+    def failing_ndjson(records):
+        calls.append(records)
+        if len(calls) > 1:
+            raise RuntimeError("connection lost")
+        return "".join(json.dumps({"id": record.id}) + "\n" for record in records)
+
+    monkeypatch.setattr(export, "_ndjson", failing_ndjson)
+    errors_before = export.export_errors._values.get(("ndjson",), 0)
+
+    async def scenario():
+        await add_holidays(*ROWS)
+        with pytest.raises(RuntimeError, match="connection lost"):
+            await export_response({"format": "ndjson"})
+
+    run(scenario)
+    assert export.export_errors._values[("ndjson",)] == errors_before + 1
+
+
+@pytest.mark.parametrize("spec_version", ["2.3", "2.4"])
+def test_session_is_closed_when_the_client_goes_away(run, monkeypatch, spec_version):
+    closed = []
+    session_factory = export.async_session
+
+    def tracked_session():
+        session = session_factory()
+        close = session.close
+
+        async def tracked_close():
+            closed.append(session)
+            await close()
+
+        session.close = tracked_close
+        return session
+
+    monkeypatch.setattr(export, "async_session", tracked_session)
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        # Сервер ASGI 2.3 (uvicorn) молча отбрасывает отправку после отключения,
+        # по спецификации 2.4 send падает с OSError
+        if spec_version == "2.4" and message["type"] == "http.response.body":
+            raise OSError("connection reset")
+
+    async def scenario():
+        await add_holidays(*ROWS)
+        query = await app_main.holidays_query(HolidayFilter(), None, None, None)
+        response = await export.stream_export(query, "ndjson")
+        scope = {"type": "http", "asgi": {"spec_version": spec_version}}
+        try:
+            await response(scope, receive, send)
+        except ClientDisconnect:
+            pass
+        assert len(closed) == 1
+        assert engine.pool.checkedout() == 0
+
+    run(scenario)
+
+
+def test_invalid_filter_is_rejected_before_streaming(run):
+    async def scenario():
+        response = await export_response({"format": "csv", "cursor": "broken"})
+        assert response.status_code == 400
+
+    run(scenario)
+
+
+def test_unknown_format(run):
+    async def scenario():
+        response = await export_response({"format": "xml"})
+        assert response.status_code == 422
+
+    run(scenario)
+
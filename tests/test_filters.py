@@ -0,0 +1,86 @@
+import base64
+import json
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+
+from app.database import async_session
+from app.filters import HolidayFilter, apply_filters, decode_cursor, encode_cursor
+from app.models import Holiday
+from tests.conftest import add_holidays, api_client, holiday
+
+
+def raw_cursor(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+class Row:
+    def __init__(self, **values):
+        self.__dict__.update(values)
+
+
+def test_cursor_round_trip():
+    row = Row(id=7, date=date(2024, 7, 4), name="Independence Day", state=None)
+    cursor = encode_cursor(row, ["-date", "state"])
+    assert decode_cursor(cursor, ["-date", "state"]) == [date(2024, 7, 4), None, 7]
+
+
+def test_cursor_for_another_ordering_is_rejected():
+    cursor = encode_cursor(Row(id=1, name="A"), ["name"])
+    with pytest.raises(ValueError, match="does not match"):
+        decode_cursor(cursor, ["-name"])
+
+
+@pytest.mark.parametrize("order_by, cursor", [
+    (["id"], "not base64!"),
+    (["id"], raw_cursor(["id"])),
+    (["id"], raw_cursor({"o": ["id"]})),
+    (["id"], raw_cursor({"o": ["id"], "v": ["abc"]})),
+    (["id"], raw_cursor({"o": ["id"], "v": [[1]]})),
+    (["id"], raw_cursor({"o": ["id"], "v": [True]})),
+    (["id"], raw_cursor({"o": ["id"], "v": [None]})),
+    (["date"], raw_cursor({"o": ["date", "id"], "v": ["2024-13-01", 1]})),
+    (["date"], raw_cursor({"o": ["date", "id"], "v": [20240101, 1]})),
+    (["federal"], raw_cursor({"o": ["federal", "id"], "v": ["yes", 1]})),
+    (["name"], raw_cursor({"o": ["name", "id"], "v": [{"a": 1}, 1]})),
+])
+def test_malformed_cursor_is_rejected(order_by, cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor, order_by)
+
+
+def test_invalid_cursor_is_a_bad_request(run):
+    async def scenario():
+        async with api_client() as client:
+            response = await client.get("/holidays", params={"cursor": raw_cursor({"o": ["id"], "v": ["abc"]})})
+        assert response.status_code == 400
+
+    run(scenario)
+
+
+@pytest.mark.parametrize("order_by", [
+    ["id"], ["-id"], ["date"], ["-date", "name"], ["state"], ["-state", "-date"], ["federal", "notes"],
+])
+def test_cursor_pages_match_a_single_ordered_query(run, order_by):
+    async def scenario():
+        await add_holidays(*[
+            holiday(f"Day {i % 5}", date(2024, 1 + i % 3, 1 + i % 4), state=[None, "NY", "CA"][i % 3],
+                    federal=i % 2 == 0, notes=None if i % 4 else "note")
+            for i in range(23)
+        ])
+        async with async_session() as db:
+            query = await apply_filters(select(Holiday), HolidayFilter(order_by=order_by))
+            expected = [row.id for row in (await db.execute(query)).scalars()]
+            walked, cursor = [], None
+            while True:
+                query = await apply_filters(select(Holiday), HolidayFilter(order_by=order_by, cursor=cursor))
+                page = (await db.execute(query.limit(4))).scalars().all()
+                walked.extend(row.id for row in page)
+                if len(page) < 4:
+                    break
+                cursor = encode_cursor(page[-1], order_by)
+        assert walked == expected
+        assert sorted(walked) == sorted(set(walked))
+
+    run(scenario)
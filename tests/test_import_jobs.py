@@ -0,0 +1,127 @@
+import asyncio
+from datetime import timedelta
+
+from sqlalchemy import insert
+
+from app import jobs
+from app.database import async_session
+from app.jobs import ImportJobRunner, get_import_job
+from app.models import ImportJob
+from app.schemas import HolidayImportResult
+
+
+def fake_import(calls, duration=0.0, error=None):
+    async def import_holidays(db, countries, year_from, year_to, subdivisions=None, progress=None):
+        calls.append((countries, year_from, year_to))
+        await asyncio.sleep(duration)
+        if error is not None:
+            raise error
+        return HolidayImportResult(
+            country=",".join(countries), years=list(range(year_from, year_to + 1)),
+            candidates=3, imported=2, elapsed_seconds=duration, rows_per_second=1.0,
+        )
+
+    return import_holidays
+
+
+async def job_status(job_id):
+    async with async_session() as db:
+        return await get_import_job(db, job_id)
+
+
+async def wait_for(job_id, statuses, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        job = await job_status(job_id)
+        if job.status in statuses or asyncio.get_running_loop().time() > deadline:
+            return job
+        await asyncio.sleep(0.02)
+
+
+def test_submit_runs_and_deduplicates(run, monkeypatch):
+    calls = []
+    monkeypatch.setattr(jobs, "import_holidays", fake_import(calls, duration=0.1))
+
+    async def scenario():
+        runner = ImportJobRunner(workers=1, stale_after=60)
+        await runner.start()
+        try:
+            async with async_session() as db:
+                job, deduplicated = await runner.submit(db, "US", None, 2024, 2025)
+                again, deduplicated_again = await runner.submit(db, "US", None, 2024, 2025)
+            assert (deduplicated, deduplicated_again, again.id) == (False, True, job.id)
+            done = await wait_for(job.id, ("succeeded", "failed"))
+        finally:
+            await runner.stop()
+        assert (done.status, done.progress, done.imported) == ("succeeded", 1.0, 2)
+        assert calls == [(["US"], 2024, 2025)]
+
+    run(scenario)
+
+
+def test_failed_import_is_recorded(run, monkeypatch):
+    monkeypatch.setattr(jobs, "import_holidays", fake_import([], error=ValueError("Unknown country")))
+
+    async def scenario():
+        runner = ImportJobRunner(workers=1, stale_after=60)
+        await runner.start()
+        try:
+            async with async_session() as db:
+                job, _ = await runner.submit(db, "XX", None, 2024, 2024)
+            done = await wait_for(job.id, ("succeeded", "failed"))
+        finally:
+            await runner.stop()
+        assert (done.status, done.error) == ("failed", "Unknown country")
+        assert done.finished_at is not None
+
+    run(scenario)
+
+
+def test_stale_job_is_requeued_while_running(run, monkeypatch):
+    calls = []
+    monkeypatch.setattr(jobs, "import_holidays", fake_import(calls))
+
+    async def scenario():
+        runner = ImportJobRunner(workers=1, stale_after=0.3)
+        await runner.start()
+        try:
+            # Задача процесса, который упал уже после запуска этого
+            async with async_session() as db:
+                abandoned = (await db.execute(insert(ImportJob).values(
+                    country="DE", year_from=2024, year_to=2024, status="running", progress=0.5,
+                    heartbeat_at=jobs._now() - timedelta(seconds=10),
+                ).returning(ImportJob.id))).scalar_one()
+                await db.commit()
+            done = await wait_for(abandoned, ("succeeded",))
+        finally:
+            await runner.stop()
+        assert done.status == "succeeded"
+        assert calls == [(["DE"], 2024, 2024)]
+
+    run(scenario)
+
+
+def test_slow_job_keeps_its_heartbeat(run, monkeypatch):
+    calls = []
+    # Импорт без вызовов progress дольше нескольких сроков устаревания
+    monkeypatch.setattr(jobs, "import_holidays", fake_import(calls, duration=1.0))
+
+    async def scenario():
+        runner = ImportJobRunner(workers=1, stale_after=0.3)
+        other_process = ImportJobRunner(workers=1, stale_after=0.3)
+        await runner.start()
+        try:
+            async with async_session() as db:
+                job, _ = await runner.submit(db, "US", None, 2024, 2024)
+            await asyncio.sleep(0.6)
+            other_process._queue = asyncio.Queue()
+            await other_process.requeue_stale()
+            assert (await job_status(job.id)).status == "running"
+            assert other_process._queue.empty()
+            done = await wait_for(job.id, ("succeeded",))
+        finally:
+            await runner.stop()
+        assert done.status == "succeeded"
+        assert len(calls) == 1
+
+    run(scenario)
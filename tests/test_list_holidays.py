@@ -0,0 +1,82 @@
+from datetime import date
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.calendar_index import HolidayRecord
+from app.config import settings
+from app.schemas import HolidayInDB
+from app.serialization import dump_holidays
+from tests.conftest import add_holidays, api_client, create_user, holiday
+
+
+PARAMS = [
+    {},
+    {"year": 2024, "limit": 3},
+    {"country": "DE", "limit": 2},
+    {"states": "NY,CA", "total": "exact"},
+]
+
+
+async def seed():
+    user = await create_user()
+    await add_holidays(
+        holiday("New Year's Day", date(2024, 1, 1), federal=True),
+        holiday("Tag der Deutschen Einheit", date(2024, 10, 3), country="DE", federal=True),
+        holiday("Reformationstag", date(2024, 10, 31), country="DE", state="BB"),
+        holiday("Heilige Drei Könige", date(2024, 1, 6), country="DE", state="BY"),
+        holiday("Lincoln's Birthday", date(2024, 2, 12), state="NY", notes="Observed \"in\" NY\n"),
+        holiday("César Chávez Day", date(2024, 3, 31), state="CA"),
+        holiday("Company Day", date(2025, 5, 2), is_custom=True, owner_id=user.id, notes="ünïcödé ✓"),
+    )
+
+
+def test_dump_holidays_matches_json_response():
+    records = [
+        HolidayRecord(1, "Día de Reyes", date(2024, 1, 6), "ES", None, True, None, False, None),
+        HolidayRecord(2, 'Quote "and" \\ slash', date(2024, 12, 31), "US", "NY", False, "ⓝⓞⓣⓔ", True, 5),
+    ]
+    expected = JSONResponse(jsonable_encoder([HolidayInDB.model_validate(record) for record in records])).body
+    assert dump_holidays(records) == expected
+
+
+@pytest.mark.parametrize("params", PARAMS)
+def test_fast_paths_match_the_response_model_path(run, monkeypatch, params):
+    async def scenario():
+        await seed()
+        bodies = {}
+        async with api_client() as client:
+            for fast_json, coalesce in [(False, False), (True, False), (True, True), (False, True)]:
+                monkeypatch.setattr(settings, "fast_json_enabled", fast_json)
+                monkeypatch.setattr(settings, "coalesce_requests_enabled", coalesce)
+                response = await client.get("/holidays", params=params)
+                assert response.status_code == 200
+                bodies[fast_json, coalesce] = (
+                    response.content, response.headers.get("x-total-count"), response.headers.get("x-next-cursor")
+                )
+        assert bodies[False, False][0] != b"[]"
+        assert len(set(bodies.values())) == 1
+
+    run(scenario)
+
+
+def test_conditional_get(run):
+    async def scenario():
+        await seed()
+        user = await create_user("writer@example.com")
+        async with api_client(user) as client:
+            first = await client.get("/holidays", params={"year": 2024})
+            etag = first.headers["etag"]
+            cached = await client.get("/holidays", params={"year": 2024}, headers={"If-None-Match": etag})
+            other_query = await client.get("/holidays", params={"year": 2025}, headers={"If-None-Match": etag})
+            created = await client.post("/holidays", json={"name": "New", "date": "2024-08-01", "country": "US"})
+            after_write = await client.get("/holidays", params={"year": 2024}, headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.headers["etag"] == etag
+        assert other_query.status_code == 200
+        assert created.status_code == 201
+        assert after_write.status_code == 200
+        assert after_write.headers["etag"] != etag
+
+    run(scenario)
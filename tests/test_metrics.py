@@ -0,0 +1,60 @@
+import pytest
+
+from app.metrics import CONTENT_TYPE, MetricsRegistry
+from tests.conftest import api_client
+
+
+def samples(body: str) -> dict:
+    return dict(line.rsplit(" ", 1) for line in body.splitlines() if line and not line.startswith("#"))
+
+
+def test_metrics_endpoint(run):
+    async def scenario():
+        async with api_client() as client:
+            await client.get("/holidays")
+            await client.get("/holidays/import/123456")
+            response = await client.get("/metrics")
+        assert response.headers["content-type"] == CONTENT_TYPE
+        values = samples(response.text)
+        assert float(values['http_requests_total{method="GET",route="/holidays",status="200"}']) >= 1
+        # Путь с id попадает в шаблон маршрута, а не в отдельную серию
+        assert float(values['http_requests_total{method="GET",route="/holidays/import/{job_id}",status="401"}']) >= 1
+        assert not any("123456" in name for name in values)
+        assert 'http_request_duration_seconds_count{method="GET",route="/holidays"}' in values
+        assert any(name.startswith('db_query_duration_seconds_count{statement="SELECT"}') for name in values)
+        assert "db_pool_checkouts" in values
+        assert "# TYPE db_pool_checkouts counter" in response.text
+
+    run(scenario)
+
+
+def test_registry_rendering():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests", ["path"])
+    assert registry.counter("requests_total", "Requests", ["path"]) is requests
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    requests.inc(path='a"b\n')
+    requests.inc(2, path='a"b\n')
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+    registry.add_collector(lambda: ["custom 1"])
+
+    lines = registry.render().splitlines()
+    assert "# TYPE requests_total counter" in lines
+    assert 'requests_total{path="a\\"b\\n"} 3' in lines
+    assert [line for line in lines if line.startswith("latency_seconds")] == [
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1.0"} 2',
+        'latency_seconds_bucket{le="+Inf"} 3',
+        "latency_seconds_sum 5.55",
+        "latency_seconds_count 3",
+    ]
+    assert lines[-1] == "custom 1"
+
+
+def test_metric_redefinition_is_rejected():
+    registry = MetricsRegistry()
+    registry.counter("requests_total", "Requests", ["path"])
+    with pytest.raises(ValueError, match="already registered"):
+        registry.gauge("requests_total", "Requests", ["path"])
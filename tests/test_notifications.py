@@ -0,0 +1,115 @@
+import asyncio
+import sys
+from datetime import date
+from types import SimpleNamespace
+
+from app import notifications
+from app.calendar_index import calendar_index
+from app.database import async_session
+from app.notifications import ChangeListener, WORKER_ID, change_events
+from tests.conftest import add_holidays, holiday
+
+
+def outcomes():
+    return {key[0]: value for key, value in change_events._values.items()}
+
+
+def change(version, ids, src="other", day=date(2024, 7, 4)):
+    return {"v": version, "src": src, "op": "change", "ids": ids, "j": [["US", None]],
+            "from": day.isoformat(), "to": day.isoformat()}
+
+
+async def indexed_listener(version):
+    """A listener at ``version`` and a calendar index loaded with one holiday."""
+    await add_holidays(holiday("New Year's Day", date(2024, 1, 1)))
+    async with async_session() as db:
+        await calendar_index.rebuild(db)
+    listener = ChangeListener()
+    listener.version = version
+    return listener
+
+
+def test_next_version_patches_the_index(run):
+    async def scenario():
+        listener = await indexed_listener(5)
+        [new] = await add_holidays(holiday("Independence Day", date(2024, 7, 4)))
+        await listener.apply(change(6, [new]))
+        assert listener.version == 6
+        assert calendar_index.loaded and len(calendar_index) == 2
+
+    run(scenario)
+
+
+def test_old_and_own_events_are_not_applied(run):
+    async def scenario():
+        listener = await indexed_listener(5)
+        [new] = await add_holidays(holiday("Independence Day", date(2024, 7, 4)))
+        before = outcomes()
+        await listener.apply(change(5, [new]))
+        await listener.apply(change(6, [new], src=WORKER_ID))
+        after = outcomes()
+        assert after["duplicate"] == before.get("duplicate", 0) + 1
+        assert after["own"] == before.get("own", 0) + 1
+        assert listener.version == 6
+        assert len(calendar_index) == 1
+
+    run(scenario)
+
+
+def test_version_gap_flushes_and_rebuilds_the_index(run):
+    async def scenario():
+        listener = await indexed_listener(5)
+        flushed = []
+        listener.add_flush_handler(lambda: flushed.append(True))
+        await add_holidays(holiday("Independence Day", date(2024, 7, 4)))
+        await listener.apply(change(8, []))
+        assert listener.version == 8
+        assert flushed == [True]
+        assert not calendar_index.loaded
+        await asyncio.gather(*listener._rebuilds)
+        assert calendar_index.loaded and len(calendar_index) == 2
+
+    run(scenario)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = asyncio.Event()
+
+    def add_termination_listener(self, callback):
+        self.on_terminate = callback
+
+    async def add_listener(self, channel, callback):
+        self.channel = channel
+
+    def is_closed(self):
+        return self.closed.is_set()
+
+    async def close(self):
+        self.closed.set()
+
+
+def test_first_connect_flushes_caches_filled_before_it(run, monkeypatch):
+    connection = FakeConnection()
+
+    async def connect(dsn):
+        return connection
+
+    monkeypatch.setitem(sys.modules, "asyncpg", SimpleNamespace(connect=connect))
+
+    async def scenario():
+        listener = await indexed_listener(None)
+        # Изменение прошло до подписки: индекс его не видел
+        await add_holidays(holiday("Independence Day", date(2024, 7, 4)))
+        monkeypatch.setattr(listener, "_current_version", lambda: asyncio.sleep(0, result=3))
+        listener._queue = asyncio.Queue()
+        listener._subscribed = asyncio.Event()
+        listener._tasks = [asyncio.create_task(listener._listen(notifications.make_url("postgresql://db/test")))]
+        await listener.wait_subscribed(timeout=5)
+        assert listener.connected and listener.version == 3
+        await asyncio.gather(*listener._rebuilds)
+        assert len(calendar_index) == 2
+        await listener.stop()
+        assert connection.is_closed()
+
+    run(scenario)
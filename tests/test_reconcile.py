@@ -0,0 +1,65 @@
+from datetime import date
+
+from app.calendar_index import HolidayRecord
+from app.reconcile import diff_holidays
+
+
+def stored(id, name, day, state=None, federal=True):
+    return HolidayRecord(
+        id=id, name=name, date=day, country="US", state=state, federal=federal,
+        notes=None, is_custom=False, owner_id=None,
+    )
+
+
+def library(name, day, state=None, federal=True):
+    return dict(name=name, date=day, country="US", state=state, federal=federal, is_custom=False)
+
+
+def test_identical_rows_are_unchanged():
+    diff = diff_holidays(
+        [stored(1, "New Year's Day", date(2024, 1, 1)), stored(2, "Patriots' Day", date(2024, 4, 15), "MA", False)],
+        [library("New Year's Day", date(2024, 1, 1)), library("Patriots' Day", date(2024, 4, 15), "MA", False)],
+    )
+    assert diff == ([], [], [], 2)
+
+
+def test_federal_flag_change_is_an_update():
+    record = stored(1, "Juneteenth", date(2024, 6, 19), federal=False)
+    diff = diff_holidays([record], [library("Juneteenth", date(2024, 6, 19))])
+    assert diff.updates == [(record, {"federal": True})]
+    assert not diff.inserts and not diff.deletes
+
+
+def test_rename_on_the_same_date_keeps_the_row():
+    record = stored(1, "Washington's Birthday", date(2024, 2, 19))
+    diff = diff_holidays([record], [library("Presidents' Day", date(2024, 2, 19))])
+    assert diff.updates == [(record, {"name": "Presidents' Day"})]
+    assert not diff.inserts and not diff.deletes
+
+
+def test_move_to_another_date_keeps_the_row():
+    record = stored(1, "Inauguration Day", date(2025, 1, 21))
+    diff = diff_holidays([record], [library("Inauguration Day", date(2025, 1, 20))])
+    assert diff.updates == [(record, {"date": date(2025, 1, 20)})]
+
+
+def test_rename_is_scoped_to_the_jurisdiction():
+    record = stored(1, "Lincoln's Birthday", date(2024, 2, 12), "CT", False)
+    diff = diff_holidays([record], [library("Lincoln Day", date(2024, 2, 12), "NY", False)])
+    assert diff.inserts == [library("Lincoln Day", date(2024, 2, 12), "NY", False)]
+    assert diff.deletes == [record]
+    assert diff.updates == []
+
+
+def test_stale_rows_and_duplicates_are_deleted_and_new_rows_inserted():
+    keep = stored(1, "Christmas Day", date(2024, 12, 25))
+    duplicate = stored(2, "Christmas Day", date(2024, 12, 25))
+    stale = stored(3, "Old Holiday", date(2024, 3, 3))
+    diff = diff_holidays(
+        [keep, duplicate, stale],
+        [library("Christmas Day", date(2024, 12, 25)), library("Thanksgiving", date(2024, 11, 28))],
+    )
+    assert diff.unchanged == 1
+    assert diff.inserts == [library("Thanksgiving", date(2024, 11, 28))]
+    assert sorted(record.id for record in diff.deletes) == [2, 3]
+    assert diff.updates == []
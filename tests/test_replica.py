@@ -0,0 +1,105 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import replica
+from app.config import settings
+from app.database import Base
+from app.models import Holiday, HolidaysDataVersion
+from app.replica import ReplicaMonitor
+from tests.conftest import add_holidays, api_client, create_user, holiday
+
+
+@pytest.fixture
+def replica_database(tmp_path, monkeypatch):
+    """A second SQLite database standing in for the replica; yields its session factory."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/replica.db")
+    session_factory = sessionmaker(
+        engine.execution_options(isolation_level="AUTOCOMMIT"), class_=AsyncSession, expire_on_commit=False
+    )
+    monkeypatch.setattr(replica, "replica_session", session_factory)
+    monkeypatch.setattr(settings, "calendar_index_enabled", False)
+    monitor = ReplicaMonitor(check_interval=60, max_lag=0)
+    monkeypatch.setattr(replica, "replica_monitor", monitor)
+    yield engine, monitor
+
+
+async def seed_replica(engine, version: int, *rows: dict):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(HolidaysDataVersion).values(id=1, version=version))
+        for row in rows:
+            await conn.execute(insert(Holiday).values(**row))
+
+
+async def listed_names(client, **headers):
+    response = await client.get("/holidays", headers=headers)
+    assert response.status_code == 200
+    return [row["name"] for row in response.json()]
+
+
+def test_reads_go_to_an_up_to_date_replica(run, replica_database):
+    engine, monitor = replica_database
+
+    async def scenario():
+        try:
+            await add_holidays(holiday("Primary Day", date(2024, 1, 1)))
+            await seed_replica(engine, 0, holiday("Replica Day", date(2024, 1, 1)))
+            await monitor.check()
+            assert monitor.route(None) == "replica"
+            async with api_client() as client:
+                assert await listed_names(client) == ["Replica Day"]
+                # Клиент уже видел версию, до которой реплика не дошла
+                assert await listed_names(client, **{"X-Min-Data-Version": "5"}) == ["Primary Day"]
+        finally:
+            await engine.dispose()
+
+    run(scenario)
+
+
+def test_lagging_replica_is_skipped(run, replica_database):
+    engine, monitor = replica_database
+
+    async def scenario():
+        try:
+            await seed_replica(engine, 0, holiday("Replica Day", date(2024, 1, 1)))
+            user = await create_user()
+            async with api_client(user) as client:
+                write = await client.post("/holidays", json={"name": "Primary Day", "date": "2024-01-01", "country": "US"})
+                assert int(write.headers["X-Data-Version"]) >= 1
+                await monitor.check()
+                assert monitor.replica_version < monitor.primary_version
+                assert monitor.route(None) == "lag"
+                assert await listed_names(client) == ["Primary Day"]
+                assert monitor.stats()["lag_seconds"] > 0
+        finally:
+            await engine.dispose()
+
+    run(scenario)
+
+
+def test_unreachable_replica_is_skipped(run, replica_database, tmp_path, monkeypatch):
+    _, monitor = replica_database
+    unreachable = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/missing/replica.db")
+    monkeypatch.setattr(replica, "replica_session", sessionmaker(unreachable, class_=AsyncSession))
+
+    async def scenario():
+        try:
+            await monitor.check()
+        finally:
+            await unreachable.dispose()
+        assert (monitor.healthy, monitor.route(None), monitor.lag_seconds) == (False, "replica_down", None)
+        async with api_client() as client:
+            assert await listed_names(client) == []
+
+    run(scenario)
+
+
+def test_no_replica_reads_the_primary():
+    monitor = ReplicaMonitor(check_interval=60, max_lag=5)
+    assert not monitor.enabled
+    assert monitor.route(None) == "no_replica"
+    assert monitor.metric_lines() == []
@@ -0,0 +1,58 @@
+from datetime import date
+
+import pytest
+
+from app.search import trigram_similarity, trigrams
+from tests.conftest import add_holidays, api_client, create_user, holiday
+
+
+ROWS = [
+    holiday("Independence Day", date(2024, 7, 4), federal=True),
+    holiday("Independence Day", date(2024, 10, 3), country="DE"),
+    holiday("Indigenous Peoples' Day", date(2024, 10, 14)),
+    holiday("Labor Day", date(2024, 9, 2), federal=True),
+    holiday("100% Fun Day", date(2024, 6, 1)),
+]
+
+
+def test_trigrams_follow_pg_trgm():
+    # Значения из документации pg_trgm
+    assert trigrams("cat") == {"  c", " ca", "cat", "at "}
+    assert trigram_similarity("word", "two words") == pytest.approx(0.363636, abs=1e-6)
+    assert trigram_similarity("", "word") == 0.0
+
+
+def test_search_ranks_typos_and_substrings(run):
+    async def scenario():
+        await add_holidays(*ROWS)
+        async with api_client() as client:
+            typo = (await client.get("/holidays/search", params={"q": "Indepndence"})).json()
+            us_only = (await client.get("/holidays/search", params={"q": "independence", "country": "us"})).json()
+            substring = (await client.get("/holidays/search", params={"q": "bor"})).json()
+            too_short = await client.get("/holidays/search", params={"q": "a"})
+        assert [row["name"] for row in typo][:2] == ["Independence Day", "Independence Day"]
+        assert typo[0]["score"] >= typo[-1]["score"]
+        assert [(row["name"], row["country"]) for row in us_only] == [("Independence Day", "US")]
+        assert [row["name"] for row in substring] == ["Labor Day"]
+        assert too_short.status_code == 422
+
+    run(scenario)
+
+
+def test_autocomplete(run):
+    async def scenario():
+        await add_holidays(*ROWS)
+        user = await create_user()
+        async with api_client(user) as client:
+            names = (await client.get("/holidays/autocomplete", params={"prefix": "ind"})).json()
+            german = (await client.get("/holidays/autocomplete", params={"prefix": "IN", "country": "de"})).json()
+            percent = (await client.get("/holidays/autocomplete", params={"prefix": "%"})).json()
+            await client.post("/holidays", json={"name": "Indie Day", "date": "2024-05-05", "country": "US"})
+            refreshed = (await client.get("/holidays/autocomplete", params={"prefix": "ind"})).json()
+        assert names == ["Independence Day", "Indigenous Peoples' Day"]
+        assert german == ["Independence Day"]
+        assert percent == []
+        # Запись меняет версию данных: кеш прежнего ответа не используется
+        assert refreshed == ["Independence Day", "Indie Day", "Indigenous Peoples' Day"]
+
+    run(scenario)
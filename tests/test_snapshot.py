@@ -0,0 +1,62 @@
+import struct
+
+import pytest
+
+from app import snapshot
+from app.holiday_generation import build_holiday_rows
+from app.snapshot import HolidaySnapshot, build_snapshot
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    path = tmp_path / "holidays.snapshot"
+    build_snapshot(str(path), ["US", "DE"], [2024, 2025])
+    return path
+
+
+def loaded(path) -> HolidaySnapshot:
+    holiday_snapshot = HolidaySnapshot()
+    holiday_snapshot.load(str(path))
+    return holiday_snapshot
+
+
+def test_rows_match_the_library(snapshot_path):
+    holiday_snapshot = loaded(snapshot_path)
+    assert holiday_snapshot.loaded
+    for country, year in [("US", 2024), ("DE", 2025)]:
+        assert holiday_snapshot.rows(country, year) == build_holiday_rows([year], country)
+    assert holiday_snapshot.rows("US", 2024, ["NY"]) == build_holiday_rows([2024], "US", ["NY"])
+    assert holiday_snapshot.rows("US", 2030) is None
+    holiday_snapshot.close()
+
+
+@pytest.mark.parametrize("damage", [
+    lambda data: data[:-7],
+    lambda data: data + b"\0",
+    lambda data: data[:10],
+    lambda data: b"",
+    lambda data: data[:10] + b"{broken" + data[17:],
+])
+def test_malformed_file_is_not_loaded(snapshot_path, damage):
+    snapshot_path.write_bytes(damage(snapshot_path.read_bytes()))
+    holiday_snapshot = loaded(snapshot_path)
+    assert not holiday_snapshot.loaded
+    assert holiday_snapshot.rows("US", 2024) is None
+
+
+def test_corrupt_record_falls_back_to_generation(snapshot_path):
+    data = bytearray(snapshot_path.read_bytes())
+    _, _, header_length = snapshot._PREAMBLE.unpack_from(data, 0)
+    # Имя первой записи указывает за пределы таблицы строк
+    struct.pack_into("<I", data, snapshot._PREAMBLE.size + header_length + 4, 0xFFFFFF)
+    snapshot_path.write_bytes(bytes(data))
+    holiday_snapshot = loaded(snapshot_path)
+    assert holiday_snapshot.loaded
+    assert holiday_snapshot.rows("US", 2024) is None
+    holiday_snapshot.close()
+
+
+def test_region_index_overflow_is_rejected(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot, "MAX_STATE_INDEX", 3)
+    with pytest.raises(ValueError, match="limit is 3"):
+        build_snapshot(str(tmp_path / "holidays.snapshot"), ["US"], [2024])
@@ -0,0 +1,94 @@
+from collections import Counter
+from datetime import date
+
+from sqlalchemy import select
+
+from app.database import async_session
+from app.models import Holiday, HolidaySummary
+from app.summary import rebuild_summary, summary_is_stale, summary_key
+from tests.conftest import add_holidays, api_client, create_user, holiday
+
+
+async def summary_counts():
+    async with async_session() as db:
+        rows = (await db.execute(select(HolidaySummary))).scalars()
+        return {
+            (row.country, row.state, row.year, row.month, row.federal, row.is_custom): row.holidays
+            for row in rows
+        }
+
+
+async def holiday_counts():
+    async with async_session() as db:
+        return dict(Counter(summary_key(row) for row in (await db.execute(select(Holiday))).scalars()))
+
+
+def test_writes_keep_the_summary_exact(run):
+    async def scenario():
+        user = await create_user()
+        async with api_client(user) as client:
+            created = (await client.post("/holidays", json={
+                "name": "Company Day", "date": "2024-03-01", "country": "US", "state": "NY",
+            })).json()
+            bulk = (await client.post("/holidays/bulk", json=[
+                {"name": "Team Day", "date": "2024-03-15", "country": "US"},
+                {"name": "Offsite", "date": "2025-06-01", "country": "DE"},
+            ])).json()
+            updated = await client.put(f"/holidays/{created['id']}", json={"federal": True, "notes": "moved"})
+            deleted = await client.delete(f"/holidays/{bulk['results'][0]['id']}")
+        assert (bulk["committed"], updated.status_code, deleted.status_code) == (True, 200, 204)
+        assert await summary_counts() == await holiday_counts()
+        assert await summary_counts() == {
+            ("US", "NY", 2024, 3, True, True): 1,
+            ("DE", "", 2025, 6, False, True): 1,
+        }
+
+    run(scenario)
+
+
+def test_stats_group_and_filter(run):
+    async def scenario():
+        await add_holidays(
+            holiday("New Year's Day", date(2024, 1, 1), federal=True),
+            holiday("Memorial Day", date(2024, 5, 27), federal=True),
+            holiday("Lincoln's Birthday", date(2024, 2, 12), state="NY"),
+            holiday("Neujahr", date(2025, 1, 1), country="DE", federal=True),
+        )
+        async with async_session() as db:
+            assert await summary_is_stale(db)
+            await rebuild_summary(db)
+            await db.commit()
+            assert not await summary_is_stale(db)
+        async with api_client() as client:
+            total = (await client.get("/holidays/stats")).json()
+            by_country = (await client.get("/holidays/stats", params={"group_by": "country,year"})).json()
+            us_states = (await client.get("/holidays/stats", params={"group_by": "state", "country": "us"})).json()
+            january = (await client.get("/holidays/stats", params={"group_by": "month", "month": 1})).json()
+            unknown = await client.get("/holidays/stats", params={"group_by": "owner"})
+        assert total == [{"count": 4}]
+        assert by_country == [
+            {"country": "DE", "year": 2025, "count": 1},
+            {"country": "US", "year": 2024, "count": 3},
+        ]
+        assert us_states == [{"state": None, "count": 2}, {"state": "NY", "count": 1}]
+        assert january == [{"month": 1, "count": 2}]
+        assert unknown.status_code == 400
+
+    run(scenario)
+
+
+def test_year_rebuild_leaves_other_years(run):
+    async def scenario():
+        await add_holidays(holiday("A", date(2024, 1, 1)), holiday("B", date(2025, 1, 1)))
+        async with async_session() as db:
+            await rebuild_summary(db)
+            await db.commit()
+        await add_holidays(holiday("C", date(2024, 7, 4)), holiday("D", date(2025, 7, 4)))
+        async with async_session() as db:
+            await rebuild_summary(db, year=2024)
+            await db.commit()
+        counts = await summary_counts()
+        assert counts[("US", "", 2024, 7, False, False)] == 1
+        assert ("US", "", 2025, 7, False, False) not in counts
+
+    run(scenario)
@@ -0,0 +1,89 @@
+from collections import Counter
+from datetime import date
+
+from sqlalchemy import select
+
+from app.calendar_index import calendar_index
+from app.database import async_session
+from app.models import Holiday, HolidaySummary
+from app.summary import rebuild_summary, summary_key
+from tests.conftest import add_holidays, api_client, create_user, holiday
+
+
+async def stored():
+    async with async_session() as db:
+        return {(row.name, row.date, row.country, row.is_custom) for row in (await db.execute(select(Holiday))).scalars()}
+
+
+async def summary_is_exact() -> bool:
+    async with async_session() as db:
+        summary = {
+            (row.country, row.state, row.year, row.month, row.federal, row.is_custom): row.holidays
+            for row in (await db.execute(select(HolidaySummary))).scalars()
+        }
+        counts = Counter(summary_key(row) for row in (await db.execute(select(Holiday))).scalars())
+    return summary == dict(counts)
+
+
+async def seed_years(owner_id):
+    await add_holidays(
+        holiday("Stale Day", date(2024, 3, 3), is_custom=False),
+        holiday("Company Day", date(2024, 3, 3), is_custom=True, owner_id=owner_id),
+        holiday("Tag der Deutschen Einheit", date(2024, 10, 3), country="DE", is_custom=False),
+        holiday("Old Day", date(2023, 3, 3), is_custom=False),
+    )
+    async with async_session() as db:
+        await rebuild_summary(db)
+        await db.commit()
+        await calendar_index.rebuild(db)
+
+
+def test_reimport_replaces_only_the_library_rows_of_the_year(run):
+    async def scenario():
+        admin = await create_user("admin@example.com")
+        await seed_years(admin.id)
+        async with api_client(admin) as client:
+            response = await client.post("/holidays/years/2024/reimport", params={"country": "us"})
+        assert response.status_code == 200
+        result = response.json()
+        assert result["years"] == [2024] and result["imported"] == result["candidates"] > 0
+        rows = await stored()
+        assert ("Stale Day", date(2024, 3, 3), "US", False) not in rows
+        assert ("Independence Day", date(2024, 7, 4), "US", False) in rows
+        assert {
+            ("Company Day", date(2024, 3, 3), "US", True),
+            ("Tag der Deutschen Einheit", date(2024, 10, 3), "DE", False),
+            ("Old Day", date(2023, 3, 3), "US", False),
+        } <= rows
+        async with async_session() as db:
+            assert len(calendar_index) == len((await db.execute(select(Holiday.id))).all())
+        assert await summary_is_exact()
+
+    run(scenario)
+
+
+def test_drop_year_deletes_custom_holidays_too(run):
+    async def scenario():
+        admin = await create_user("admin@example.com")
+        await seed_years(admin.id)
+        async with api_client(admin) as client:
+            response = await client.delete("/holidays/years/2024")
+        assert response.status_code == 200
+        assert await stored() == {("Old Day", date(2023, 3, 3), "US", False)}
+        assert len(calendar_index) == 1
+        assert await summary_is_exact()
+
+    run(scenario)
+
+
+def test_year_changes_need_an_admin(run):
+    async def scenario():
+        user = await create_user()
+        await seed_years(user.id)
+        async with api_client(user) as client:
+            reimport = await client.post("/holidays/years/2024/reimport")
+            drop = await client.delete("/holidays/years/2024")
+        assert (reimport.status_code, drop.status_code) == (403, 403)
+        assert len(await stored()) == 4
+
+    run(scenario)